@@ -0,0 +1,182 @@
+"""Packed asset bundle: one texture atlas, one sound bank, one index.
+
+``assets/assets.pack`` (built by ``generate_asset.py``) is laid out as::
+
+    b"SNKA" version:u32 index_length:u32 index(JSON) data...
+
+The data holds the atlas as raw RGBA pixels and every sound as its WAV
+bytes; the index gives each image's rectangle in the atlas and each sound's
+offset and length. At startup the file is memory-mapped and the atlas
+wrapped with ``pygame.image.frombuffer`` without copying. An image is cut
+out of the atlas, scaled and converted to the display's pixel format on
+first request and cached per size, so blits in the game loop never convert
+pixels. A sound is decoded the first time it is played.
+
+Paths resolve next to this module (or inside the PyInstaller bundle), not
+against the working directory. Without a pack, ``LooseAssets`` reads the
+individual files with the same caching.
+"""
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+
+import synth
+
+MAGIC = b"SNKA"
+VERSION = 1
+HEADER = struct.Struct("<II")  # version, index length
+ATLAS_WIDTH = 1024
+
+ASSET_DIR = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))),
+                         "assets")
+PACK_PATH = os.path.join(ASSET_DIR, "assets.pack")
+
+# ---------------- BUILD ----------------
+def build(asset_dir=ASSET_DIR, path=PACK_PATH):
+    """Pack ``asset_dir``/images/*.png and sounds/*.wav into ``path``"""
+    images = []
+    for name in sorted(os.listdir(os.path.join(asset_dir, "images"))):
+        if name.endswith(".png"):
+            surf = pygame.image.load(os.path.join(asset_dir, "images", name))
+            images.append((name, surf))
+
+    # shelf packing: rows of images, tallest first
+    rects, x, y, row = {}, 0, 0, 0
+    for name, surf in sorted(images, key=lambda item: -item[1].get_height()):
+        w, h = surf.get_size()
+        if x + w > ATLAS_WIDTH:
+            x, y, row = 0, y + row, 0
+        rects[name] = (x, y, w, h)
+        x += w
+        row = max(row, h)
+    width = max((x + w for x, y, w, h in rects.values()), default=1)
+    height = max((y + h for x, y, w, h in rects.values()), default=1)
+
+    pixels = bytearray(width * height * 4)
+    for name, surf in images:
+        x, y, w, h = rects[name]
+        data = pygame.image.tobytes(surf, "RGBA")
+        for r in range(h):
+            start = ((y + r) * width + x) * 4
+            pixels[start:start + w * 4] = data[r * w * 4:(r + 1) * w * 4]
+
+    index = {
+        "atlas": {"offset": 0, "length": len(pixels), "size": [width, height],
+                  "images": {name: {"rect": rects[name],
+                                    "alpha": bool(surf.get_flags() & pygame.SRCALPHA)}
+                             for name, surf in images}},
+        "sounds": {},
+    }
+    blobs = [bytes(pixels)]
+    offset = len(pixels)
+    for name in sorted(os.listdir(os.path.join(asset_dir, "sounds"))):
+        if name.endswith(".wav"):
+            with open(os.path.join(asset_dir, "sounds", name), "rb") as f:
+                data = f.read()
+            index["sounds"][name] = {"offset": offset, "length": len(data)}
+            blobs.append(data)
+            offset += len(data)
+
+    raw_index = json.dumps(index, separators=(",", ":")).encode()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + HEADER.pack(VERSION, len(raw_index)) + raw_index)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return path
+
+# ---------------- LOADING ----------------
+class _Assets:
+    """Converted, size-cached images and lazily decoded sounds"""
+
+    def __init__(self, synthesize=None):
+        if synthesize is None:
+            synthesize = bool(os.environ.get("SNAKE_SYNTH_SOUNDS"))
+        self.synthesize = synthesize  # build sounds with synth.py instead of decoding
+        self.images = {}  # (name, size) -> display-format surface
+        self.sounds = {}
+
+    def image(self, name, size=None):
+        """Image ``name`` scaled to ``size`` (an int or (w, h)) in display format"""
+        if isinstance(size, int):
+            size = (size, size)
+        key = (name, size)
+        surf = self.images.get(key)
+        if surf is None:
+            surf, alpha = self._load_image(name)
+            if size is not None and surf.get_size() != size:
+                surf = pygame.transform.scale(surf, size)
+            if pygame.display.get_surface() is not None:
+                surf = surf.convert_alpha() if alpha else surf.convert()
+            self.images[key] = surf
+        return surf
+
+    def sound(self, name):
+        """``pygame.mixer.Sound`` for ``name``, decoded on first use"""
+        snd = self.sounds.get(name)
+        if snd is None:
+            if self.synthesize and name in synth.SOUNDS:
+                snd = synth.make_sound(name)
+            if snd is None:
+                snd = self._load_sound(name)
+            self.sounds[name] = snd
+        return snd
+
+
+class AssetBundle(_Assets):
+    """Assets read from a memory-mapped pack file"""
+
+    def __init__(self, path=PACK_PATH, synthesize=None):
+        super().__init__(synthesize)
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:4] != MAGIC:
+            raise ValueError(f"{path} is not an asset pack")
+        version, length = HEADER.unpack_from(self.map, 4)
+        if version != VERSION:
+            raise ValueError(f"unsupported asset pack version {version}")
+        start = 4 + HEADER.size
+        self.index = json.loads(self.map[start:start + length])
+        self.base = start + length
+        atlas = self.index["atlas"]
+        view = memoryview(self.map)[self.base + atlas["offset"]:
+                                    self.base + atlas["offset"] + atlas["length"]]
+        self.atlas = pygame.image.frombuffer(view, atlas["size"], "RGBA")  # no copy
+
+    def _load_image(self, name):
+        entry = self.index["atlas"]["images"][name]
+        return self.atlas.subsurface(entry["rect"]), entry["alpha"]
+
+    def _load_sound(self, name):
+        entry = self.index["sounds"][name]
+        start = self.base + entry["offset"]
+        return pygame.mixer.Sound(file=io.BytesIO(self.map[start:start + entry["length"]]))
+
+
+class LooseAssets(_Assets):
+    """Assets read from the individual files under ``directory``"""
+
+    def __init__(self, directory=ASSET_DIR, synthesize=None):
+        super().__init__(synthesize)
+        self.directory = directory
+
+    def _load_image(self, name):
+        surf = pygame.image.load(os.path.join(self.directory, "images", name))
+        return surf, bool(surf.get_flags() & pygame.SRCALPHA)
+
+    def _load_sound(self, name):
+        return pygame.mixer.Sound(os.path.join(self.directory, "sounds", name))
+
+
+def open_assets(synthesize=None):
+    """The asset pack if it has been built, else the loose files"""
+    try:
+        return AssetBundle(PACK_PATH, synthesize)
+    except (OSError, ValueError):
+        return LooseAssets(ASSET_DIR, synthesize)
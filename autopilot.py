@@ -0,0 +1,511 @@
+"""Autopilot: a bot that plays survival and level games for demos and soak tests
+(not world games: its grid and searches span the whole board).
+
+While the snake is short it takes the shortest path to the food (BFS over
+precomputed neighbour tables), but only if the snake could still reach its
+own tail after eating; otherwise it stalls by following its tail along the
+longest route it can find. Body cells count as free once the tail will have
+left them by the time the head gets there. A path is searched once and then
+replayed one move per tick until the food moves or something blocks it. The
+plan goes on past the food along the checked route towards the tail, then
+round the loop that route closes with the body; that loop is longer than the
+snake, so there is a verified-safe next move to fall back on long after the
+food is eaten.
+
+Once the snake is long (and the board has no obstacles) it follows a
+Hamiltonian cycle over the grid. With the body laid out along the cycle a
+move is safe as long as it doesn't overtake the tail, so each decision is
+O(1) at any length and shortcuts towards the food are taken while they are.
+
+Searches are generators that pause every CHECK_EVERY cells so the caller
+can check a per-tick deadline (``budget``, less SLACK for what comes after).
+When a decision runs out of time it keeps to the last verified plan: the
+snake walks up to HOLD more moves of it while a search rooted where they
+end carries on over the next ticks, keeping its state between ``act()``
+calls. Only without such a plan does it fall back to the cycle successor or
+the cheapest open move. Either way a decision never holds up a frame.
+Cells blocked by obstacles and avoided items are cached until the items
+change. Decision latencies are kept for ``report()``:
+
+    python autopilot.py --mode survival --games 20
+"""
+import argparse
+import random
+import time
+from array import array
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+
+import engine
+
+BUDGET = 0.002  # seconds of search per decision
+MARGIN = 4  # cells a cycle shortcut keeps between the head and the tail
+BLOCKED = 1 << 30  # free_at value of cells that never clear
+CHECK_EVERY = 32  # cells a search expands between deadline checks
+HOLD = 3  # plan moves walked while a search that ran out of time carries on
+SLACK = 0.25  # share of the budget kept for the moves made after a search stops
+AVOID = ("bomb", "magnet")  # item kinds never stepped on; the magnet's pull wrecks any plan
+
+# ---------------- GRID ----------------
+class Grid:
+    """Cell indices, neighbour tables and a Hamiltonian cycle for one board size"""
+
+    def __init__(self, width, height, block):
+        cols, rows = width // block, height // block
+        self.cols, self.rows, self.size = cols, rows, cols * rows
+        self.cells = [(i % cols * block, i // cols * block) for i in range(self.size)]
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        self.neighbors = []
+        for i in range(self.size):
+            x, y = i % cols, i // cols
+            self.neighbors.append(tuple(
+                (y + dy) * cols + x + dx
+                for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0))
+                if 0 <= x + dx < cols and 0 <= y + dy < rows))
+
+        cycle = hamiltonian_cycle(cols, rows)
+        self.order = self.next = None  # cycle position and successor of each cell
+        if cycle is not None:
+            self.order = [0] * self.size
+            self.next = [0] * self.size
+            for pos, i in enumerate(cycle):
+                self.order[i] = pos
+                self.next[i] = cycle[(pos + 1) % self.size]
+
+    def direction(self, i, j):
+        (x0, y0), (x1, y1) = self.cells[i], self.cells[j]
+        return (x1 - x0, y1 - y0)
+
+
+def hamiltonian_cycle(cols, rows):
+    """Cell indices of a closed tour (top row, zigzag down, back up column 0), or None"""
+    if rows % 2 == 0 and cols > 1:
+        tour = [(x, 0) for x in range(cols)]
+        for y in range(1, rows):
+            xs = range(cols - 1, 0, -1) if y % 2 else range(1, cols)
+            tour.extend((x, y) for x in xs)
+        tour.extend((0, y) for y in range(rows - 1, 0, -1))
+        return [y * cols + x for x, y in tour]
+    if cols % 2 == 0 and rows > 1:  # same tour, transposed
+        return [x * cols + y for y, x in ((i % rows, i // rows)
+                for i in hamiltonian_cycle(rows, cols))]
+    return None
+
+
+@lru_cache(maxsize=None)
+def grid_for(width, height, block):
+    return Grid(width, height, block)
+
+# ---------------- SOLVER ----------------
+class _OutOfTime(Exception):
+    pass
+
+
+class Autopilot:
+    """Chooses a direction for every tick; call act(state) before engine.step()"""
+
+    def __init__(self, budget=BUDGET, long_length=None, enabled=False):
+        self.budget = budget
+        self.long_length = long_length  # length to switch to the cycle; None = a quarter of the board
+        self.enabled = enabled
+        self.latencies = array("d")  # seconds per decision
+        self.timeouts = 0  # decisions that ran out of budget
+        grid_for(engine.WIDTH, engine.HEIGHT, engine.BLOCK)  # build the tables before the first tick
+        self.new_game()
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    def new_game(self):
+        self.played = False  # set once act() has steered this game
+        self.state = None
+        self.plan = deque()  # verified cells to walk: to plan_food, then on towards the tail
+        self.plan_food = None
+        self.expected = None  # where the last decision put the head
+        self.run = 0  # consecutive moves that kept the body in cycle order
+        self.search = None  # food search rooted ``hold`` moves along the plan, still running
+        self.search_food = None
+        self.hold = 0
+        self.blocked = None  # free_at of an empty board, for self.state
+        self.blocked_by = None  # (state.items, its version) self.blocked was built from
+
+    def act(self, state):
+        """The direction to take this tick"""
+        start = time.perf_counter()
+        move = self._decide(state, start + self.budget * (1 - SLACK))
+        self.latencies.append(time.perf_counter() - start)
+        self.played = True
+        return move
+
+    def _decide(self, state, deadline):
+        g = self.grid = grid_for(state.width, state.height, state.block)
+        if state is not self.state:  # a new game or level
+            self.state = state
+            self.expected = None
+            self.blocked_by = None
+        head = g.index[state.head]
+        if head != self.expected:  # first move, or the magnet pulled the head
+            self.plan.clear()
+            self.search = None
+            self.run = 0
+        hx, hy = state.head
+        dx, dy = state.direction
+        back = g.index.get((hx - dx, hy - dy), -1)  # engine.turn() refuses to reverse
+
+        try:
+            move = self._choose(state, head, back, deadline)
+        except _OutOfTime:
+            self.timeouts += 1
+            self.search = None
+            move = self._fallback(state, head, back)
+        plan = self.plan
+        if plan and plan[0] == move:
+            plan.popleft()
+            self.hold = max(self.hold - 1, 0)
+        else:
+            plan.clear()
+            self.search = None
+        if move is None:
+            return state.direction  # boxed in
+        self._track(state, head, move)
+        self.expected = move
+        return g.direction(head, move)
+
+    def _choose(self, state, head, back, deadline):
+        g = self.grid
+        plan = self.plan
+        if self.search is not None:
+            if self.search_food == state.food:
+                self._continue(deadline)
+            if self.search is not None and (not self.hold or self.search_food != state.food):
+                self.search = None  # walked to its root, or the food went, without an answer
+        if (plan and (self.plan_food == state.food or self.search is not None)
+                and self._open(state, plan[0])):
+            return plan[0]
+        self.search = None
+
+        long_length = self.long_length or g.size // 4
+        if g.next is not None and not state.obstacles and len(state.snake) >= long_length:
+            move = self._cycle_move(state, head, back, deadline)
+            if move is not None:
+                return move
+
+        if state.food is not None:
+            body = [g.index[cell] for cell in state.snake.segments]
+            free_at = self._free_at(state, body, deadline)
+            if len(body) > 1 and (len(plan) <= HOLD or not self._open(state, plan[0])):
+                # little verified to fall back on: find a way to the tail first
+                route = self._finish(self._bfs(head, body[-1], free_at, back), deadline)
+                if route:
+                    plan.clear()
+                    plan.extend(self._chase(body, route))
+                    self.plan_food = None
+            try:
+                route = self._finish(self._food_search(state, head, back, free_at, body), deadline)
+            except _OutOfTime:
+                if not self._hold(state, head, free_at, body):
+                    raise
+                self.timeouts += 1
+                return plan[0]
+            if route:
+                plan.clear()
+                plan.extend(route)
+                self.plan_food = state.food
+                return plan[0]
+        return self._stall(state, head, back, deadline)
+
+    # ---- helpers ----
+    def _open(self, state, i):
+        """Whether the head could move onto cell ``i`` right now"""
+        cell = self.grid.cells[i]
+        return (cell not in state.snake and cell not in state.obstacles
+                and state.items.get(cell) not in AVOID)
+
+    def _free_at(self, state, body, deadline):
+        """Per cell, the first move on which the head may enter it, for the
+        body given as cell indices, head first"""
+        return self._finish(self._free_steps(state, body), deadline)
+
+    def _free_steps(self, state, body):
+        """Search generator building _free_at's table"""
+        items = state.items
+        if self.blocked_by != (items, items.version):
+            g = self.grid
+            blocked = [0] * g.size
+            index = g.index
+            for cell in state.obstacles:
+                blocked[index[cell]] = BLOCKED
+            for kind in AVOID:
+                for cell in items.of_kind(kind):
+                    blocked[index[cell]] = BLOCKED
+            self.blocked, self.blocked_by = blocked, (items, items.version)
+        free_at = self.blocked[:]
+        # the k-th segment from the tail is gone after k + 1 moves
+        for k, i in enumerate(reversed(body)):
+            free_at[i] = k + 2
+            if not k % 256:
+                yield
+        return free_at
+
+    def _finish(self, search, deadline):
+        """Run a search generator to its result; _OutOfTime at the deadline
+        leaves it paused, to be finished by a later call"""
+        try:
+            while True:
+                next(search)
+                if time.perf_counter() > deadline:
+                    raise _OutOfTime
+        except StopIteration as done:
+            return done.value
+
+    def _continue(self, deadline):
+        """Spend this tick's budget on the pending search; its route replaces
+        the plan past the search's root"""
+        try:
+            route = self._finish(self.search, deadline)
+        except _OutOfTime:
+            return
+        self.search = None
+        if route:
+            plan = self.plan
+            kept = list(islice(plan, self.hold))
+            plan.clear()
+            plan.extend(kept + route)
+            self.plan_food = self.search_food
+        self.hold = 0
+
+    def _bfs(self, start, goal, free_at, back=-1, depth=0):
+        """Search generator: shortest path from ``start`` (excluded) to
+        ``goal`` entering each cell only once it is free; None if there is none"""
+        neighbors = self.grid.neighbors
+        prev = [-1] * self.grid.size
+        prev[start] = start
+        frontier = [start]
+        expanded = 0
+        while frontier:
+            depth += 1
+            nxt = []
+            for i in frontier:
+                expanded += 1
+                if not expanded % CHECK_EVERY:
+                    yield
+                for j in neighbors[i]:
+                    if prev[j] >= 0 or free_at[j] > depth or j == back:
+                        continue
+                    prev[j] = i
+                    if j == goal:
+                        path = [j]
+                        while prev[path[-1]] != start:
+                            path.append(prev[path[-1]])
+                        path.reverse()
+                        return path
+                    nxt.append(j)
+            back = -1  # only the first move can't reverse
+            frontier = nxt
+        return None
+
+    def _food_search(self, state, start, back, free_at, body, depth=0):
+        """Search generator: shortest path from ``start``, ``depth`` moves
+        ahead of ``body``, to the food and on to the tail after eating it;
+        None if either part has no path"""
+        path = yield from self._bfs(start, self.grid.index[state.food], free_at, back, depth)
+        if path is None:
+            return None
+        # the body once the food is eaten: one segment longer
+        after = path[::-1] + body
+        del after[len(body) - depth + 1:]
+        free_at = yield from self._free_steps(state, after)
+        tail = yield from self._bfs(after[0], after[-1], free_at)
+        return path + self._chase(after, tail) if tail is not None else None
+
+    @staticmethod
+    def _chase(body, route):
+        """``route`` from the head ``body[0]`` towards the tail, up to where it
+        first meets the body, then along the body back to where the head was,
+        twice round: the loop is longer than the snake, so it can be walked
+        for as long as the snake doesn't grow"""
+        at = {i: k for k, i in enumerate(body)}
+        for k, i in enumerate(route):
+            if i in at:
+                loop = route[:k + 1] + body[at[i] - 1::-1] if at[i] else route[:k + 1]
+                return loop + loop
+        return route
+
+    def _hold(self, state, head, free_at, body):
+        """Root a food search up to HOLD moves along the verified plan, to
+        run over the next ticks while the snake walks there; False if there
+        is no plan to walk"""
+        plan = self.plan
+        if not plan or not self._open(state, plan[0]):
+            return False
+        hold = list(islice(plan, HOLD))
+        # the held cells are body until the tail has passed them
+        free_at = free_at[:]
+        for k, i in enumerate(hold, 1):
+            free_at[i] = max(free_at[i], k + len(body) + 1)
+        prev = hold[-2] if len(hold) > 1 else head
+        self.search = self._food_search(state, hold[-1], prev, free_at, hold[::-1] + body, len(hold))
+        self.search_food = state.food
+        self.hold = len(hold)
+        return True
+
+    def _stall(self, state, head, back, deadline):
+        """Open neighbour with the longest route to the tail; the fallback move if none"""
+        g = self.grid
+        body = [g.index[cell] for cell in state.snake.segments]
+        free_at = self._free_at(state, body, deadline)
+        tail = body[-1]
+        best, best_len = None, -1
+        for j in g.neighbors[head]:
+            if j == back or free_at[j] > 1:
+                continue
+            route = self._finish(self._bfs(j, tail, free_at, depth=1), deadline)
+            if route is not None and len(route) > best_len:
+                best, best_len = j, len(route)
+                # the plan to fall back on, even if the next search runs out of
+                # time; the food is searched for again next tick
+                self.plan.clear()
+                self.plan.extend([j] + self._chase([j] + body, route))
+                self.plan_food = None
+        return best if best is not None else self._fallback(state, head, back)
+
+    def _fallback(self, state, head, back):
+        """A move that needs no search: the next cell of the last verified
+        plan, else the next cell of the cycle, else the cheapest open move"""
+        plan = self.plan
+        if plan and self._open(state, plan[0]):
+            return plan[0]
+        succ = self.grid.next[head] if self.grid.next is not None else -1
+        if succ >= 0 and succ != back and self._open(state, succ):
+            return succ
+        return self._cheap_move(state, head, back)
+
+    def _cheap_move(self, state, head, back):
+        """Open neighbour with the most open neighbours; no search"""
+        g = self.grid
+        best, best_exits = None, -1
+        for j in g.neighbors[head]:
+            if j == back or not self._open(state, j):
+                continue
+            exits = sum(self._open(state, k) for k in g.neighbors[j])
+            if exits > best_exits:
+                best, best_exits = j, exits
+        return best
+
+    # ---- hamiltonian cycle ----
+    def _room(self, state, head):
+        """Cells ahead of the head on the cycle before the tail"""
+        g = self.grid
+        return (g.order[g.index[state.snake.tail]] - g.order[head]) % g.size
+
+    def _cycle_move(self, state, head, back, deadline):
+        g = self.grid
+        order, n = g.order, g.size
+        succ = g.next[head]
+        if self.run < len(state.snake):
+            # body not in cycle order yet: follow the cycle while that's safe
+            if succ != back and self._open(state, succ):
+                body = state.snake.segments
+                after = [succ] + [g.index[cell] for cell in body]
+                del after[len(body):]
+                free_at = self._free_at(state, after, deadline)
+                route = self._finish(self._bfs(succ, after[-1], free_at, depth=1), deadline)
+                if route:
+                    self.plan.clear()  # the checked way to the tail, to fall back on
+                    self.plan.extend([succ] + self._chase(after, route))
+                    self.plan_food = None
+                    return succ
+            return None
+
+        room = self._room(state, head)
+        h = order[head]
+        food = (order[g.index[state.food]] - h) % n if state.food is not None else n
+        limit = min(room - MARGIN - 1, food)  # never jump past the food or close to the tail
+        if self._open(state, succ):
+            if len(state.snake) * 2 > n:
+                return succ  # no shortcuts on a crowded board
+            best, best_ahead = succ, 1
+            for j in g.neighbors[head]:
+                ahead = (order[j] - h) % n
+                if best_ahead < ahead <= limit and self._open(state, j):
+                    best, best_ahead = j, ahead
+            return best
+        # an item sits on the cycle: hop over it, past the food if need be, as
+        # long as that keeps the body in order
+        best, best_ahead = None, n
+        for j in g.neighbors[head]:
+            ahead = (order[j] - h) % n
+            if 1 < ahead < min(room - MARGIN, best_ahead) and self._open(state, j):
+                best, best_ahead = j, ahead
+        if best is None and state.items.get(g.cells[succ]) == "magnet":
+            return succ  # its pull costs the order, leaving the cycle costs more
+        return best  # None: search a way around
+
+    def _track(self, state, head, move):
+        """Count moves that go forward on the cycle without overtaking the tail"""
+        g = self.grid
+        if g.order is None:
+            return
+        ahead = (g.order[move] - g.order[head]) % g.size
+        self.run = self.run + 1 if 0 < ahead < self._room(state, head) else 0
+
+    # ---- stats ----
+    def report(self):
+        """Decision latency summary in microseconds"""
+        times = sorted(self.latencies)
+        if not times:
+            return None
+        n = len(times)
+        pick = lambda p: times[min(n - 1, int(p / 100 * n))] * 1e6
+        return {
+            "decisions": n,
+            "mean_us": sum(times) / n * 1e6,
+            "p50_us": pick(50), "p95_us": pick(95), "p99_us": pick(99),
+            "max_us": times[-1] * 1e6,
+            "timeouts": self.timeouts,
+            "over_budget": sum(t > self.budget for t in times),
+        }
+
+# ---------------- HEADLESS PLAY ----------------
+def play(mode, seed, autopilot, max_ticks=1_000_000):
+    """Play one seeded run with the engine alone; returns the final state and ticks"""
+    rng = random.Random(seed)
+    level = 1
+    state = (engine.new_level(level, rng=rng) if mode == "level"
+             else engine.new_survival(rng=rng))
+    autopilot.new_game()
+    for tick in range(max_ticks):
+        engine.step(state, autopilot.act(state))
+        if state.result == engine.NEXT and level < len(engine.LEVELS):
+            level += 1
+            state = engine.new_level(level, state.score, rng=rng)
+        elif state.result is not None:
+            return state, tick + 1
+    return state, max_ticks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak-test the autopilot headless")
+    parser.add_argument("--mode", choices=("survival", "level"), default="survival")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--budget", type=float, default=BUDGET * 1000, help="ms per decision")
+    parser.add_argument("--long-length", type=int, help="length at which to follow the cycle")
+    parser.add_argument("--max-ticks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    autopilot = Autopilot(args.budget / 1000, args.long_length)
+    seeds = random.Random(args.seed)
+    start = time.perf_counter()
+    for game in range(args.games):
+        state, ticks = play(args.mode, seeds.getrandbits(63), autopilot, args.max_ticks)
+        result = "cleared" if state.result == engine.NEXT else state.death or "max ticks"
+        print(f"game {game + 1:3}: score {state.score:6}  length {len(state.snake):5}  "
+              f"ticks {ticks:7}  {result}")
+    stats = autopilot.report()
+    print(f"{stats['decisions']} decisions in {time.perf_counter() - start:.1f}s: "
+          f"mean {stats['mean_us']:.1f} us, p50 {stats['p50_us']:.1f}, p95 {stats['p95_us']:.1f}, "
+          f"p99 {stats['p99_us']:.1f}, max {stats['max_us']:.1f} us; "
+          f"{stats['timeouts']} searches cut short, "
+          f"{stats['over_budget']} decisions over the {args.budget:g} ms budget")
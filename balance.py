@@ -0,0 +1,281 @@
+"""Monte Carlo balancing: sweep the difficulty knobs over many bot games.
+
+Every combination of the swept parameters plays the same seeded games
+headless with ``engine.py`` (common random numbers, so differences between
+configurations are the parameters, not the luck of the draw). Games are
+split into chunks that run on a ``ProcessPoolExecutor``; each chunk sends
+back only aggregated counts, so the parent does almost no work and the run
+scales with the number of cores.
+
+Policies:
+
+- ``human``: greedy towards the food, avoiding instant death, but it misses
+  a turn with probability ``mistakes * speed / SLOW_SPEED``, so faster
+  levels are harder, as they are for a player
+- ``autopilot``: the ``autopilot.py`` solver (slow, near-perfect play)
+
+Results stream to a JSON Lines file as each configuration finishes: a
+header line, then per configuration the score histogram and percentiles,
+death causes, mean ticks and, in level mode, the clear rate per level.
+Level mode plays the levels of a level pack (``--pack``, default
+``SNAKE_LEVEL_PACK`` or the classic pack, as in the game); a level's apples,
+speed curve and extra rocks can be swept, its map stays as it is::
+
+    python balance.py --mode survival --games 5000 --sweep bomb_chance=100,150,200
+    python balance.py --mode level --sweep level3=6:5:15,6:5/6/8:25 --out levels.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import engine
+import levelpack
+from replay import DIRECTIONS
+
+# sweepable engine constants: --sweep name=v1,v2,...
+PARAMS = {
+    "bomb_chance": "BOMB_CHANCE",
+    "magnet_chance": "MAGNET_CHANCE",
+    "magnet_length": "MAGNET_LENGTH",
+    "scissor_chance": "SCISSOR_CHANCE",
+    "scissor_length": "SCISSOR_LENGTH",
+    "scissor_cut": "SCISSOR_CUT",
+}
+DEFAULTS = {name: getattr(engine, const) for name, const in PARAMS.items()}
+# pack levels are swept as levelN=apples:speed:rocks, the speed a curve s0/s1/...
+PACK = os.environ.get("SNAKE_LEVEL_PACK", levelpack.DEFAULT_PACK)
+
+
+def defaults(pack):
+    """DEFAULTS plus the (apples, speeds, rocks) of every level in ``pack``"""
+    values = dict(DEFAULTS)
+    for n in range(1, len(pack) + 1):
+        level = pack.level(n)
+        values[f"level{n}"] = (level.need, level.speeds, level.rocks)
+    return values
+
+# ---------------- POLICIES ----------------
+def human_move(state, rng, mistakes):
+    """Greedy step towards the food; sometimes misses the turn"""
+    if rng.random() < mistakes * state.speed / engine.SLOW_SPEED:
+        return None
+    hx, hy = state.head
+    fx, fy = state.food or state.head
+    options = []
+    for d in DIRECTIONS:
+        cell = (hx + d[0], hy + d[1])
+        if (0 <= cell[0] < state.width and 0 <= cell[1] < state.height
+                and cell not in state.snake and cell not in state.obstacles
+                and state.items.get(cell) != "bomb"):
+            options.append((abs(cell[0] - fx) + abs(cell[1] - fy) + rng.random() * 10, d))
+    return min(options)[1] if options else None
+
+
+def _policy(name, mistakes):
+    if name == "autopilot":
+        from autopilot import Autopilot
+
+        pilot = Autopilot(budget=1.0)  # no frame to protect here
+        return lambda state, rng: pilot.act(state)
+    return lambda state, rng: human_move(state, rng, mistakes)
+
+# ---------------- RESULTS ----------------
+class Tally:
+    """Aggregated outcome counts for one configuration"""
+
+    def __init__(self):
+        self.games = 0
+        self.ticks = 0
+        self.scores = Counter()  # score -> games
+        self.deaths = Counter()  # cause -> games
+        self.reached = Counter()  # level -> games that started it
+        self.cleared = Counter()  # level -> games that cleared it
+
+    def merge(self, other):
+        self.games += other.games
+        self.ticks += other.ticks
+        for mine, theirs in ((self.scores, other.scores), (self.deaths, other.deaths),
+                             (self.reached, other.reached), (self.cleared, other.cleared)):
+            mine.update(theirs)
+
+    def percentile(self, p):
+        target = p / 100 * self.games
+        seen = 0
+        for score in sorted(self.scores):
+            seen += self.scores[score]
+            if seen >= target:
+                return score
+        return 0
+
+    def to_json(self, params):
+        total = sum(score * n for score, n in self.scores.items())
+        row = {
+            "params": params,
+            "games": self.games,
+            "ticks_mean": round(self.ticks / self.games, 1),
+            "score": {"mean": round(total / self.games, 2),
+                      **{f"p{p}": self.percentile(p) for p in (10, 50, 90, 99)},
+                      "max": max(self.scores),
+                      "hist": sorted(self.scores.items())},
+            "deaths": {cause: round(n / self.games, 4) for cause, n in self.deaths.most_common()},
+        }
+        if self.reached:
+            row["clear_rate"] = {level: round(self.cleared[level] / n, 4)
+                                 for level, n in sorted(self.reached.items())}
+        return row
+
+# ---------------- WORKERS ----------------
+def apply(params, pack):
+    """Set the engine's constants for ``params`` (anything missing gets its
+    default); returns the pack's level layouts with the swept levels changed"""
+    values = dict(DEFAULTS, **params)
+    for name, const in PARAMS.items():
+        setattr(engine, const, values[name])
+    layouts = []
+    for n in range(1, len(pack) + 1):
+        level = pack.level(n)
+        if f"level{n}" in params:
+            need, speeds, rocks = params[f"level{n}"]
+            level = levelpack.Level(level.name, need, speeds, rocks, level.start, level.walls,
+                                    level.cols, level.rows)
+        layouts.append(level.layout())
+    return layouts
+
+
+def play(mode, seed, policy, max_ticks, tally, layouts):
+    rng = random.Random(seed)
+    bot_rng = random.Random(seed ^ 0x5EED)
+    level = 1
+    if mode == "level":
+        state = engine.new_level(level, rng=rng, layout=layouts[0])
+        tally.reached[level] += 1
+    else:
+        state = engine.new_survival(rng=rng)
+    for tick in range(max_ticks):
+        engine.step(state, policy(state, bot_rng))
+        if state.result == engine.NEXT:
+            tally.cleared[level] += 1
+            if level == len(layouts):
+                tally.deaths["cleared"] += 1
+                break
+            level += 1
+            tally.reached[level] += 1
+            state = engine.new_level(level, state.score, rng=rng, layout=layouts[level - 1])
+        elif state.result is not None:
+            tally.deaths[state.death] += 1
+            break
+    else:
+        tally.deaths["max ticks"] += 1
+    tally.games += 1
+    tally.ticks += tick + 1
+    tally.scores[state.score] += 1
+
+
+def run_chunk(config, params, mode, policy, mistakes, seeds, max_ticks, pack):
+    """Play one chunk of games under ``params``; returns (config, Tally)"""
+    layouts = apply(params, levelpack.open_pack(pack))
+    move = _policy(policy, mistakes)
+    tally = Tally()
+    for seed in seeds:
+        play(mode, seed, move, max_ticks, tally, layouts)
+    return config, tally
+
+# ---------------- SWEEP ----------------
+def parse_sweep(specs, known=DEFAULTS):
+    """["bomb_chance=100,150", "level2=6:8/10:12"] -> {name: [values]}"""
+    sweep = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in known:
+            raise SystemExit(f"unknown parameter {name!r}; choose from {', '.join(known)}")
+        if name.startswith("level"):
+            sweep[name] = []
+            for value in values.split(","):
+                need, speeds, rocks = value.split(":")
+                sweep[name].append((int(need), tuple(int(v) for v in speeds.split("/")), int(rocks)))
+        else:
+            sweep[name] = [int(value) for value in values.split(",")]
+    return sweep
+
+
+def configs(sweep):
+    names = list(sweep)
+    return [dict(zip(names, values)) for values in itertools.product(*sweep.values())]
+
+
+def run(mode, sweep, games, out, jobs=None, chunk=100, policy="human", mistakes=0.02,
+        seed=1, max_ticks=20_000, pack=PACK):
+    """Play ``games`` games per configuration and stream one result line each to ``out``"""
+    level_pack = levelpack.open_pack(pack)  # compiled here once, so workers hit the cache
+    grid = configs(sweep)
+    seeds = [random.Random(f"{seed}:{i}").getrandbits(63) for i in range(games)]
+    chunks = [seeds[i:i + chunk] for i in range(0, games, chunk)]
+    tallies = [Tally() for _ in grid]
+    left = [len(chunks)] * len(grid)
+    out.write(json.dumps({"mode": mode, "policy": policy, "mistakes": mistakes, "games": games,
+                          "seed": seed, "pack": level_pack.id, "defaults": defaults(level_pack),
+                          "sweep": sweep}) + "\n")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = [pool.submit(run_chunk, i, params, mode, policy, mistakes, part, max_ticks, pack)
+                   for i, params in enumerate(grid) for part in chunks]
+        for future in as_completed(futures):
+            i, tally = future.result()
+            tallies[i].merge(tally)
+            left[i] -= 1
+            if not left[i]:
+                row = tallies[i].to_json(grid[i])
+                out.write(json.dumps(row, separators=(",", ":")) + "\n")
+                out.flush()
+                print(_summary(row), file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    played = games * len(grid)
+    print(f"{played} games in {elapsed:.1f}s ({played / elapsed:,.0f} games/s, "
+          f"{jobs or os.cpu_count()} workers)", file=sys.stderr)
+
+
+def _summary(row):
+    params = " ".join(f"{k}={_format(v)}" for k, v in row["params"].items()) or "defaults"
+    s = row["score"]
+    deaths = ", ".join(f"{cause} {rate:.0%}" for cause, rate in row["deaths"].items())
+    line = f"{params}: score mean {s['mean']:.0f} p50 {s['p50']} p90 {s['p90']}; {deaths}"
+    if "clear_rate" in row:
+        line += "; clears " + " ".join(f"L{level} {rate:.0%}" for level, rate in row["clear_rate"].items())
+    return line
+
+
+def _format(value):
+    """A swept value as --sweep writes it"""
+    if isinstance(value, tuple):  # a level: apples:speed/curve:rocks
+        need, speeds, rocks = value
+        return f"{need}:{'/'.join(map(str, speeds))}:{rocks}"
+    return str(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep game balance over many headless bot games")
+    parser.add_argument("--mode", choices=("survival", "level"), default="survival")
+    parser.add_argument("--sweep", action="append", default=[], metavar="NAME=V1,V2",
+                        help=f"values to try for one of: {', '.join(DEFAULTS)}, levelN")
+    parser.add_argument("--pack", default=PACK, help="level pack name or path (level mode)")
+    parser.add_argument("--games", type=int, default=2000, help="games per configuration")
+    parser.add_argument("--policy", choices=("human", "autopilot"), default="human")
+    parser.add_argument("--mistakes", type=float, default=0.02,
+                        help="human policy's missed-turn chance per tick at the slow speed")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=100, help="games per task")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-ticks", type=int, default=20_000, help="cut off longer games")
+    parser.add_argument("--out", default="balance.jsonl")
+    args = parser.parse_args()
+
+    known = defaults(levelpack.open_pack(args.pack))
+    with open(args.out, "w") as out:
+        run(args.mode, parse_sweep(args.sweep, known), args.games, out, args.jobs, args.chunk,
+            args.policy, args.mistakes, args.seed, args.max_ticks, args.pack)
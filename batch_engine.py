@@ -0,0 +1,300 @@
+"""Vectorized batch engine: thousands of snake boards stepped at once.
+
+Each board follows the survival or level rules from ``engine.py`` but all
+boards live in NumPy arrays, so one ``step(actions)`` call advances every
+game together. Cells are indexed ``y * cols + x`` on the 40x30 grid; the
+snake body is a ring buffer of cell indices per board plus an occupancy
+count grid for O(1) collision checks. Finished boards reset themselves.
+
+Run ``python batch_engine.py`` to print throughput in boards*ticks/sec.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from engine import (WIDTH, HEIGHT, BLOCK, START_POS, APPLE_POINTS,
+                    SLOW_SPEED, FAST_SPEED, FAST_LENGTH,
+                    BOMB_CHANCE, MAGNET_CHANCE, MAGNET_LENGTH,
+                    SCISSOR_CHANCE, SCISSOR_LENGTH, SCISSOR_CUT,
+                    MAGNET_RADIUS, MAGNET_DURATION, LEVELS)
+
+COLS, ROWS = WIDTH // BLOCK, HEIGHT // BLOCK
+
+# ---------------- ACTIONS ----------------
+KEEP, UP, DOWN, LEFT, RIGHT = -1, 0, 1, 2, 3
+DX = np.array([0, 0, -1, 1])
+DY = np.array([-1, 1, 0, 0])
+OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT])
+
+# ---------------- END CAUSES ----------------
+ALIVE, WALL, SELF, OBSTACLE, BOMB, CLEARED, FULL = range(7)
+CAUSES = ["alive", "wall", "self", "obstacle", "bomb", "cleared", "full"]
+
+# level tables indexed by level number (index 0 unused)
+LEVEL_NEED = np.array([0] + [LEVELS[l][0] for l in sorted(LEVELS)])
+LEVEL_SPEED = np.array([1] + [LEVELS[l][1] for l in sorted(LEVELS)])
+LEVEL_OBSTACLES = np.array([0] + [LEVELS[l][2] for l in sorted(LEVELS)])
+LAST_LEVEL = max(LEVELS)
+
+# rejection-sampling rounds before falling back to an exact free-cell draw
+SAMPLE_TRIES = 8
+
+
+class BatchEngine:
+    """N independent boards advanced together by ``step(actions)``"""
+
+    def __init__(self, n, mode="survival", cols=COLS, rows=ROWS, seed=None):
+        self.n = n
+        self.mode = mode
+        self.cols = cols
+        self.rows = rows
+        self.cells = cols * rows
+        self.capacity = self.cells
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.arange(n)
+        self.start = (START_POS[1] // BLOCK) * cols + START_POS[0] // BLOCK
+
+        cell_t = np.int16 if self.cells < 2 ** 15 else np.int32
+        self.occ = np.zeros((n, self.cells), np.uint8)  # body segments per cell
+        self.obstacles = np.zeros((n, self.cells), bool)
+        self.body = np.zeros((n, self.capacity), cell_t)  # ring buffer of cells
+        self.head_ptr = np.zeros(n, np.int64)
+        self.length = np.zeros(n, np.int64)
+        self.direction = np.full(n, RIGHT, np.int64)
+
+        self.food = np.full(n, -1, np.int64)
+        self.bomb = np.full(n, -1, np.int64)
+        self.magnet = np.full(n, -1, np.int64)
+        self.scissor = np.full(n, -1, np.int64)
+        self.magnet_active = np.zeros(n, bool)
+        self.magnet_time = np.zeros(n, np.int64)
+        self.time = np.zeros(n, np.int64)
+
+        self.score = np.zeros(n, np.int64)
+        self.apples = np.zeros(n, np.int64)
+        self.level = np.ones(n, np.int64)
+        self.need = np.zeros(n, np.int64)
+        self.speed = np.full(n, SLOW_SPEED, np.int64)
+
+        # filled in for boards that finished on the last step
+        self.final_score = np.zeros(n, np.int64)
+        self.final_level = np.zeros(n, np.int64)
+        self.cause = np.zeros(n, np.int8)
+        self.episodes = 0
+
+        self.reset(self.boards)
+
+    # ---------------- BOARD SETUP ----------------
+    def reset(self, idx):
+        """Start fresh games on the given boards"""
+        self.score[idx] = 0
+        self.level[idx] = 1
+        self._start_snake(idx)
+
+    def _start_snake(self, idx):
+        self.occ[idx] = 0
+        self.head_ptr[idx] = 0
+        self.length[idx] = 1
+        self.body[idx, 0] = self.start
+        self.occ[idx, self.start] = 1
+        self.direction[idx] = RIGHT
+        self.bomb[idx] = -1
+        self.magnet[idx] = -1
+        self.scissor[idx] = -1
+        self.magnet_active[idx] = False
+        self.time[idx] = 0
+        self.apples[idx] = 0
+        self.food[idx] = self.rng.integers(0, self.cells, len(idx))
+        if self.mode == "level":
+            self._place_obstacles(idx)
+
+    def _place_obstacles(self, idx):
+        """Scatter each board's obstacles at random, like level_game()"""
+        self.obstacles[idx] = False
+        levels = self.level[idx]
+        self.need[idx] = LEVEL_NEED[levels]
+        self.speed[idx] = LEVEL_SPEED[levels]
+        for lvl in np.unique(levels):
+            count = LEVEL_OBSTACLES[lvl]
+            if not count:
+                continue
+            sub = idx[levels == lvl]
+            cells = self.rng.integers(0, self.cells, (len(sub), count))
+            self.obstacles[sub[:, None], cells] = True
+
+    # ---------------- BODY ----------------
+    def _push(self, idx, cells):
+        ptr = (self.head_ptr[idx] + 1) % self.capacity
+        self.head_ptr[idx] = ptr
+        self.body[idx, ptr] = cells
+        self.occ[idx, cells] += 1
+        self.length[idx] += 1
+
+    def _pop_tail(self, idx, count=1):
+        for _ in range(count):
+            tail = (self.head_ptr[idx] - self.length[idx] + 1) % self.capacity
+            self.occ[idx, self.body[idx, tail]] -= 1
+            self.length[idx] -= 1
+
+    def _sample(self, idx, avoid_body=False, avoid_obstacles=False, others=()):
+        """Random cell per board avoiding the given contents, -1 if full"""
+        out = self.rng.integers(0, self.cells, len(idx))
+        pending = np.arange(len(idx))
+        for _ in range(SAMPLE_TRIES):
+            rows, cells = idx[pending], out[pending]
+            bad = np.zeros(len(pending), bool)
+            if avoid_body:
+                bad |= self.occ[rows, cells] > 0
+            if avoid_obstacles:
+                bad |= self.obstacles[rows, cells]
+            for other in others:
+                bad |= other[rows] == cells
+            pending = pending[bad]
+            if not len(pending):
+                return out
+            out[pending] = self.rng.integers(0, self.cells, len(pending))
+
+        # Crowded boards: pick uniformly among the free cells directly
+        rows = idx[pending]
+        free = np.ones((len(rows), self.cells), bool)
+        if avoid_body:
+            free &= self.occ[rows] == 0
+        if avoid_obstacles:
+            free &= ~self.obstacles[rows]
+        for other in others:
+            taken = other[rows]
+            has = taken >= 0
+            free[np.flatnonzero(has), taken[has]] = False
+        keys = self.rng.random(free.shape)
+        keys[~free] = -1.0
+        out[pending] = np.where(free.any(axis=1), keys.argmax(axis=1), -1)
+        return out
+
+    # ---------------- STEP ----------------
+    def step(self, actions=None):
+        """Advance every board one tick; returns a mask of finished boards"""
+        boards = self.boards
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = (actions >= 0) & (actions != OPPOSITE[self.direction])
+            self.direction = np.where(turn, actions, self.direction)
+
+        survival = self.mode == "survival"
+        if survival:
+            self.speed = np.where(self.length >= FAST_LENGTH, FAST_SPEED, SLOW_SPEED)
+        self.time += 1000 // self.speed
+
+        head = self.body[boards, self.head_ptr].astype(np.int64)
+        hx = head % self.cols + DX[self.direction]
+        hy = head // self.cols + DY[self.direction]
+        wall = (hx < 0) | (hx >= self.cols) | (hy < 0) | (hy >= self.rows)
+        cell = np.where(wall, 0, hy * self.cols + hx)
+
+        cause = np.where(wall, WALL, ALIVE).astype(np.int8)
+        if not survival:
+            cause[(cause == ALIVE) & self.obstacles[boards, cell]] = OBSTACLE
+        cause[(cause == ALIVE) & (self.occ[boards, cell] > 0)] = SELF
+
+        live = np.flatnonzero(cause == ALIVE)
+        c = cell[live]
+        self._push(live, c)
+
+        # APPLE
+        ate = c == self.food[live]
+        eaters = live[ate]
+        self._pop_tail(live[~ate])
+        self.score[eaters] += APPLE_POINTS
+        self.apples[eaters] += 1
+        if survival:
+            self.food[eaters] = self.rng.integers(0, self.cells, len(eaters))
+            cause[live] = self._survival_items(live, c)
+        else:
+            self.food[eaters] = self._sample(eaters, avoid_body=True, avoid_obstacles=True)
+            cleared = eaters[self.apples[eaters] >= self.need[eaters]]
+            won = cleared[self.level[cleared] >= LAST_LEVEL]
+            cause[won] = CLEARED
+            advance = cleared[self.level[cleared] < LAST_LEVEL]
+            self.level[advance] += 1
+            self._start_snake(advance)
+
+        cause[(cause == ALIVE) & (self.length >= self.capacity - 2)] = FULL
+
+        done = cause != ALIVE
+        finished = np.flatnonzero(done)
+        if len(finished):
+            self.final_score[finished] = self.score[finished]
+            self.final_level[finished] = self.level[finished]
+            self.episodes += len(finished)
+            self.reset(finished)
+        self.cause = cause
+        return done
+
+    def _survival_items(self, live, c):
+        """Bomb, magnet and scissor rules for boards still alive this tick"""
+        cause = np.full(len(live), ALIVE, np.int8)
+        chance = self.rng.random((3, len(live)))
+
+        # BOMB
+        want = live[(self.bomb[live] < 0) & (chance[0] * BOMB_CHANCE < 1)]
+        self.bomb[want] = self._sample(want, avoid_body=True, others=(self.food,))
+        cause[self.bomb[live] == c] = BOMB
+        keep = cause == ALIVE
+        live, c, chance = live[keep], c[keep], chance[:, keep]
+
+        # MAGNET
+        want = live[(self.length[live] >= MAGNET_LENGTH) & (self.magnet[live] < 0)
+                    & (chance[1] * MAGNET_CHANCE < 1)]
+        self.magnet[want] = self._sample(want, avoid_body=True, others=(self.food, self.bomb))
+        got = live[self.magnet[live] == c]
+        self.magnet_active[got] = True
+        self.magnet_time[got] = self.time[got]
+        self.magnet[got] = -1
+
+        # SCISSOR
+        want = live[(self.length[live] >= SCISSOR_LENGTH) & (self.scissor[live] < 0)
+                    & (chance[2] * SCISSOR_CHANCE < 1)]
+        self.scissor[want] = self._sample(want, avoid_body=True, others=(self.food, self.bomb))
+        got = live[self.scissor[live] == c]
+        self._pop_tail(got[self.length[got] > SCISSOR_CUT], SCISSOR_CUT)
+        self.scissor[got] = -1
+
+        # MAGNET EFFECT
+        active = self.magnet_active[live]
+        pulling, head = live[active], c[active]
+        food = self.food[pulling]
+        dx = (head % self.cols - food % self.cols) * BLOCK
+        dy = (head // self.cols - food // self.cols) * BLOCK
+        near = (food >= 0) & (dx * dx + dy * dy < MAGNET_RADIUS * MAGNET_RADIUS)
+        pulled = pulling[near]
+        self._push(pulled, food[near])
+        self.score[pulled] += APPLE_POINTS
+        self.apples[pulled] += 1
+        self.food[pulled] = self.rng.integers(0, self.cells, len(pulled))
+        expired = pulling[self.time[pulling] - self.magnet_time[pulling] > MAGNET_DURATION]
+        self.magnet_active[expired] = False
+        return cause
+
+
+# ---------------- BENCHMARK ----------------
+def benchmark(n=4096, ticks=500, mode="survival", turn_chance=0.1, seed=0):
+    """Boards*ticks per second under a random-turn policy"""
+    eng = BatchEngine(n, mode, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        actions = rng.integers(0, 4, n)
+        actions[rng.random(n) >= turn_chance] = KEEP
+        eng.step(actions)
+    elapsed = time.perf_counter() - start
+    return n * ticks / elapsed, eng.episodes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch engine throughput")
+    parser.add_argument("--boards", type=int, default=4096)
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--mode", choices=["survival", "level"], default="survival")
+    args = parser.parse_args()
+    rate, episodes = benchmark(args.boards, args.ticks, args.mode)
+    print(f"{args.mode}: {rate:,.0f} boards*ticks/sec ({episodes} games finished)")
@@ -0,0 +1,96 @@
+"""Asset startup and blit cost: loose files vs the packed bundle.
+
+Startup is the work ``game.py`` does at import: the loose-file path loads
+and scales five PNGs and decodes four WAVs; the bundle memory-maps
+``assets/assets.pack`` and cuts five converted sprites out of its atlas,
+leaving the sounds until they are first played ("bundle + sounds" decodes
+them all up front too). The blit test draws the item sprites as the old
+code left them (unconverted) and as the bundle hands them out (display
+format).
+
+    python -m benchmarks.bench_assets
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import engine
+from assetpack import ASSET_DIR, PACK_PATH, AssetBundle
+
+IMAGES = ("apple.png", "bomb.png", "magnet.png", "scissor.png", "obstacle.png")
+SOUNDS = ("eat.wav", "bomb.wav", "power.wav", "gameover.wav")
+BLOCK = engine.BLOCK
+
+
+def _loose_startup():
+    """The old game.py: IMG lambda plus one Sound per file"""
+    images = [pygame.transform.scale(pygame.image.load(os.path.join(ASSET_DIR, "images", name)),
+                                     (BLOCK, BLOCK)) for name in IMAGES]
+    sounds = [pygame.mixer.Sound(os.path.join(ASSET_DIR, "sounds", name)) for name in SOUNDS]
+    return images, sounds
+
+
+def _bundle_startup():
+    bundle = AssetBundle(PACK_PATH, synthesize=False)
+    return bundle, [bundle.image(name, BLOCK) for name in IMAGES]
+
+
+def _ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def _blit_ms(screen, images, frames):
+    positions = [(x, y) for y in range(0, engine.HEIGHT, BLOCK) for x in range(0, engine.WIDTH, BLOCK)]
+    batch = [(images[i % len(images)], pos) for i, pos in enumerate(positions)]
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.blits(batch, doreturn=False)
+    return (time.perf_counter() - start) * 1000 / frames, len(batch)
+
+
+def run(runs=50, frames=100):
+    pygame.init()
+    pygame.mixer.init()
+    screen = pygame.display.set_mode((engine.WIDTH, engine.HEIGHT))
+    if not os.path.exists(PACK_PATH):
+        raise SystemExit("no asset pack: run python generate_asset.py first")
+
+    def everything():
+        bundle, _ = _bundle_startup()
+        for name in SOUNDS:
+            bundle.sound(name)
+
+    startup = [("loose files", _ms(_loose_startup, runs)),
+               ("bundle", _ms(_bundle_startup, runs)),
+               ("bundle + sounds", _ms(everything, runs))]
+    loose, _ = _loose_startup()
+    _, packed = _bundle_startup()
+    blits = [("unconverted",) + _blit_ms(screen, loose, frames),
+             ("display format",) + _blit_ms(screen, packed, frames)]
+    return startup, blits
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    startup, blits = run(args.runs, args.frames)
+    print(f"{'startup':>16} {'ms (median)':>12}")
+    for name, ms in startup:
+        print(f"{name:>16} {ms:>12.3f}")
+    print(f"\n{'sprites':>16} {'ms/frame':>12}")
+    for name, ms, count in blits:
+        print(f"{name:>16} {ms:>12.3f}  ({count} blits)")
@@ -0,0 +1,92 @@
+"""Per-tick cost of the snake body as the snake grows.
+
+The snake follows a Hamiltonian cycle over the 40x30 board, so even at
+length cells-1 it can keep moving forever. Compares the old list body
+(``head in snake`` / ``insert(0, head)`` / ``pop()``) with ``SnakeBody``
+and times a full ``engine.step`` at each length.
+
+    python -m benchmarks.bench_body
+"""
+import time
+
+import engine
+from body import SnakeBody
+
+COLS, ROWS = engine.WIDTH // engine.BLOCK, engine.HEIGHT // engine.BLOCK
+
+
+def hamiltonian_cycle(cols=COLS, rows=ROWS, block=engine.BLOCK):
+    """Pixel cells of a closed tour: along the top row, snaking back up column 0"""
+    cycle = [(x, 0) for x in range(cols)]
+    for y in range(1, rows):
+        xs = range(cols - 1, 0, -1) if y % 2 else range(1, cols)
+        cycle.extend((x, y) for x in xs)
+    cycle.extend((0, y) for y in range(rows - 1, 0, -1))
+    return [(x * block, y * block) for x, y in cycle]
+
+
+def _time_list(cycle, length, ticks):
+    snake = cycle[length - 1::-1]
+    n = len(cycle)
+    start = time.perf_counter()
+    for t in range(ticks):
+        head = cycle[(length + t) % n]
+        if head in snake:
+            raise RuntimeError("collision")
+        snake.insert(0, head)
+        snake.pop()
+    return (time.perf_counter() - start) / ticks
+
+
+def _time_body(cycle, length, ticks):
+    snake = SnakeBody(cycle[length - 1::-1])
+    n = len(cycle)
+    start = time.perf_counter()
+    for t in range(ticks):
+        head = cycle[(length + t) % n]
+        if head in snake:
+            raise RuntimeError("collision")
+        snake.push_head(head)
+        snake.pop_tail()
+    return (time.perf_counter() - start) / ticks
+
+
+def _time_engine(cycle, length, ticks):
+    # Level rules with no obstacles and an unreachable apple: pure movement
+    state = engine.new_level(1)
+    state.snake.truncate(len(state.snake))
+    for cell in cycle[length - 1::-1]:
+        state.snake.push_tail(cell)
+    state.food = (-engine.BLOCK, -engine.BLOCK)
+    state.need = float("inf")
+    n = len(cycle)
+    moves = []
+    for t in range(ticks):
+        (x0, y0), (x1, y1) = cycle[(length + t - 1) % n], cycle[(length + t) % n]
+        moves.append((x1 - x0, y1 - y0))
+    start = time.perf_counter()
+    for move in moves:
+        state.direction = move
+        engine.step(state)
+    if not state.alive:
+        raise RuntimeError(f"snake died: {state.death}")
+    return (time.perf_counter() - start) / ticks
+
+
+def run(ticks=20000):
+    cycle = hamiltonian_cycle()
+    results = []
+    for length in (1, 10, 100, 1000, len(cycle) - 1):
+        results.append({
+            "length": length,
+            "list_us": _time_list(cycle, length, ticks) * 1e6,
+            "body_us": _time_body(cycle, length, ticks) * 1e6,
+            "engine_us": _time_engine(cycle, length, ticks) * 1e6,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'length':>8} {'list us/tick':>14} {'SnakeBody us/tick':>18} {'engine.step us':>16}")
+    for r in run():
+        print(f"{r['length']:>8} {r['list_us']:>14.3f} {r['body_us']:>18.3f} {r['engine_us']:>16.3f}")
@@ -0,0 +1,66 @@
+"""Per-tick item cost as the board fills with items.
+
+Each tick the rules ask what lies under the head and, with the magnet on,
+which food is nearest inside the ring. Compares doing that by checking
+every item in turn (what separate ``head == bomb`` style tests become with
+many items) against the ``ItemGrid`` spatial hash, at 1 to 1000 items on
+the 40x30 board, half food and half bombs.
+
+    python -m benchmarks.bench_items
+"""
+import random
+import time
+
+import engine
+from freecells import board_cells
+from itemgrid import ItemGrid
+
+RADIUS = engine.MAGNET_RADIUS
+
+
+def _per_item(items, head):
+    """Every item compared against the head, circular magnet test included"""
+    hx, hy = head
+    hit = best = None
+    for cell, kind in items:
+        if cell == head:
+            hit = kind
+        if kind == "food":
+            d2 = (cell[0] - hx) ** 2 + (cell[1] - hy) ** 2
+            if d2 < RADIUS * RADIUS and (best is None or (d2, cell) < best):
+                best = (d2, cell)
+    return hit, best and best[1]
+
+
+def _grid(grid, head):
+    return grid.get(head), grid.nearest(head, RADIUS, "food")
+
+
+def run(ticks=20000, seed=0):
+    rng = random.Random(seed)
+    cells = board_cells(engine.WIDTH, engine.HEIGHT, engine.BLOCK)
+    heads = [rng.choice(cells) for _ in range(ticks)]
+    results = []
+    for count in (1, 10, 100, 1000):
+        items = [(cell, "food" if i % 2 == 0 else "bomb")
+                 for i, cell in enumerate(rng.sample(cells, count))]
+        grid = ItemGrid(RADIUS, engine.BLOCK)
+        for cell, kind in items:
+            grid.add(cell, kind)
+        if [_per_item(items, h) for h in heads[:500]] != [_grid(grid, h) for h in heads[:500]]:
+            raise RuntimeError("per-item and grid queries disagree")
+
+        row = {"items": count}
+        for name, query, arg in (("per_item", _per_item, items), ("grid", _grid, grid)):
+            start = time.perf_counter()
+            for head in heads:
+                query(arg, head)
+            row[f"{name}_us"] = (time.perf_counter() - start) / ticks * 1e6
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'items':>6} {'per-item us/tick':>17} {'ItemGrid us/tick':>17}")
+    for r in run():
+        print(f"{r['items']:>6} {r['per_item_us']:>17.3f} {r['grid_us']:>17.3f}")
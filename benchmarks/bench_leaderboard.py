@@ -0,0 +1,101 @@
+"""Leaderboard load test: score submissions per second.
+
+Starts ``leaderboard.py`` in a subprocess with a throwaway journal, then
+drives it from asyncio connections submitting scores one per request and
+in batches, and finally through ``LeaderboardClient`` (the game's path:
+queue, background batching, pooled connections). Every submission is
+acknowledged only after the server journaled it.
+
+    python -m benchmarks.bench_leaderboard
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from leaderboard import LeaderboardClient
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, data):
+    proc = subprocess.Popen([sys.executable, "leaderboard.py", "--port", str(port), "--data", data],
+                            stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("leaderboard server did not start")
+
+
+async def _connection(port, requests, batch, rng):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for _ in range(requests):
+        scores = [[rng.choice(("level", "survival")), rng.randrange(0, 2000, 10)] for _ in range(batch)]
+        writer.write(json.dumps({"op": "submit", "scores": scores}).encode() + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        assert "ranks" in reply, reply
+    writer.close()
+
+
+async def _load(port, connections, requests, batch, seed):
+    rng = random.Random(seed)
+    await asyncio.gather(*(_connection(port, requests, batch, rng) for _ in range(connections)))
+
+
+def raw_rate(port, connections, requests, batch, seed=0):
+    start = time.perf_counter()
+    asyncio.run(_load(port, connections, requests, batch, seed))
+    return connections * requests * batch / (time.perf_counter() - start)
+
+
+def client_rate(port, count, seed=0):
+    rng = random.Random(seed)
+    client = LeaderboardClient(port=port, batch_delay=0.005, batch_size=256)
+    start = time.perf_counter()
+    submit_time = 0.0
+    for _ in range(count):
+        t = time.perf_counter()
+        client.submit(rng.choice(("level", "survival")), rng.randrange(0, 2000, 10))
+        submit_time += time.perf_counter() - t
+    while client.pending() or not client.online:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return count / elapsed, submit_time / count * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=100, help="requests per connection")
+    args = parser.parse_args()
+
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as data:
+        server = start_server(port, data)
+        try:
+            print(f"{'load':>34} {'submissions/s':>14}")
+            for batch in (1, 10, 100):
+                rate = raw_rate(port, args.connections, args.requests, batch)
+                print(f"{f'{args.connections} conns, {batch} per request':>34} {rate:>14,.0f}")
+            rate, submit_us = client_rate(port, args.connections * args.requests)
+            print(f"{'LeaderboardClient':>34} {rate:>14,.0f}")
+            print(f"submit() call on the game thread: {submit_us:.1f} us")
+        finally:
+            server.terminate()
+            server.wait()
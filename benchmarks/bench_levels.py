@@ -0,0 +1,61 @@
+"""Level pack loading cost.
+
+Times parsing and compiling a pack from its text source (what happens the
+first time a pack is opened, or after it was edited) against opening the
+cached compiled file, then the per-level work: decoding a level from the
+compiled pack and turning it into the engine's pixel layout.
+
+    python -m benchmarks.bench_levels
+"""
+import argparse
+import tempfile
+import time
+
+import levelpack
+
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(name=levelpack.DEFAULT_PACK, repeat=200):
+    with open(levelpack.pack_path(name), encoding="utf-8") as f:
+        source = f.read()
+    with tempfile.TemporaryDirectory() as cache:
+        pack = levelpack.open_pack(name, cache)  # warm the cache
+        count = len(pack)
+
+        def compile_():
+            pack_name, levels = levelpack.parse(source)
+            levelpack.compile_pack(pack_name, levels, pack.digest)
+
+        def decode():
+            for n in range(1, count + 1):
+                levelpack._decode_level(pack.data, pack.offsets[n - 1])
+
+        def layout():
+            for n in range(1, count + 1):
+                pack.level(n).layout()
+
+        results = [("parse + compile", _time(compile_, repeat)),
+                   ("open cached", _time(lambda: levelpack.open_pack(name, cache), repeat)),
+                   ("decode level", _time(decode, repeat) / count),
+                   ("level layout", _time(layout, repeat) / count)]
+        del pack
+    return count, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pack", default=levelpack.DEFAULT_PACK)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    count, results = run(args.pack, args.repeat)
+    print(f"pack {args.pack!r}, {count} levels")
+    print(f"{'step':>16} {'us':>9}")
+    for step, us in results:
+        print(f"{step:>16} {us:>9.1f}")
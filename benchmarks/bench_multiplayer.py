@@ -0,0 +1,129 @@
+"""Multiplayer server bandwidth and tick latency on loopback.
+
+Runs a ``TickServer`` and 2, 8 and 32 simulated clients in one event loop,
+talking over real TCP sockets on 127.0.0.1. Each client keeps its
+``Mirror`` from the snapshots and steers with a greedy bot (nearest food,
+no bodies or bombs), sending an input only when its choice changes.
+Reports, per client, the bytes per second received and sent, the size of
+a keyframe and what sending one every tick would cost instead, the
+server's work per tick, how long after a tick started its snapshot was
+applied by the clients, and how many desyncs were detected.
+The board grows with the number of clients (about 150 cells per snake).
+
+    python -m benchmarks.bench_multiplayer
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import multiplayer
+from multiplayer import DIRECTIONS, Arena, Session, TickServer
+
+CLIENTS = (2, 8, 32)
+CELLS_PER_SNAKE = 150
+
+
+def bot(mirror, pid, rng):
+    """Direction towards the nearest food, avoiding bodies, bombs and walls"""
+    snake = mirror.bodies.get(pid)
+    if not snake:
+        return None
+    hx, hy = snake[0]
+    foods = [c for c, kind in mirror.items.items() if kind == "food"]
+    fx, fy = min(foods, key=lambda c: abs(c[0] - hx) + abs(c[1] - hy)) if foods else (hx, hy)
+    options = []
+    for d in DIRECTIONS:
+        cell = (hx + d[0], hy + d[1])
+        if (0 <= cell[0] < mirror.width and 0 <= cell[1] < mirror.height
+                and cell not in mirror.occupied and mirror.items.get(cell) != "bomb"):
+            options.append((abs(cell[0] - fx) + abs(cell[1] - fy) + rng.random(), d))
+    return min(options)[1] if options else None
+
+
+class _TimedServer(TickServer):
+    """Remembers when each tick started"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = {}
+
+    def tick(self):
+        self.started[self.arena.tick + 1] = time.perf_counter()
+        super().tick()
+
+
+async def _client(port, rng, latencies, stop):
+    session = await Session.open("127.0.0.1", port)
+    last = None
+    try:
+        while not stop.is_set():
+            kind = await session.receive()
+            if kind in (multiplayer.DELTA, multiplayer.KEYFRAME):
+                latencies.append((session.mirror.tick, time.perf_counter()))
+            if session.mirror.synced:
+                move = bot(session.mirror, session.pid, rng)
+                if move is not None and move != last:
+                    session.send(move)
+                    last = move
+    finally:
+        session.close()
+    return session
+
+
+async def _run(clients, seconds, rate, seed):
+    side = max(40, int((clients * CELLS_PER_SNAKE * 4 / 3) ** 0.5))
+    cols, rows = side, side * 3 // 4
+    server = _TimedServer(Arena(cols, rows, rng=random.Random(seed)), rate)
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    stop = asyncio.Event()
+    arrivals = [[] for _ in range(clients)]
+    tasks = [asyncio.ensure_future(_client(port, random.Random(seed + i), arrivals[i], stop))
+             for i in range(clients)]
+    await asyncio.sleep(1.0)  # everyone joined and synced
+    first_tick, bytes_before = server.arena.tick, server.bytes_sent
+    await asyncio.sleep(seconds)
+    ticks = server.arena.tick - first_tick
+    sent = server.bytes_sent - bytes_before
+    stop.set()
+    sessions = await asyncio.gather(*tasks)
+    server.ticker.cancel()
+    listener.close()
+
+    latency = sorted((at - server.started[tick]) * 1000 for got in arrivals
+                     for tick, at in got if tick > first_tick and tick in server.started)
+    work = sorted(t * 1000 for t in server.tick_times[-ticks:])
+    pick = lambda xs, p: xs[min(len(xs) - 1, int(p / 100 * len(xs)))] if xs else 0.0
+    elapsed = ticks / rate
+    keyframe = len(server.arena.keyframe())
+    return {
+        "clients": clients, "board": f"{cols}x{rows}", "ticks": ticks,
+        "down_Bps": sent / clients / elapsed,
+        "up_Bps": sum(s.bytes_sent for s in sessions) / clients / elapsed,
+        "keyframe_B": keyframe,
+        "full_Bps": (keyframe + multiplayer.FRAME.size) * rate,
+        "tick_p50_ms": pick(work, 50), "tick_p99_ms": pick(work, 99),
+        "lat_p50_ms": pick(latency, 50), "lat_p99_ms": pick(latency, 99),
+        "desyncs": sum(s.desyncs for s in sessions),
+        "skipped": server.skipped,
+    }
+
+
+def run(seconds=10.0, rate=multiplayer.TICK_RATE, seed=0, counts=CLIENTS):
+    return [asyncio.run(_run(n, seconds, rate, seed)) for n in counts]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0, help="measured time per client count")
+    parser.add_argument("--rate", type=int, default=multiplayer.TICK_RATE, help="ticks per second")
+    args = parser.parse_args()
+
+    print(f"{'clients':>7} {'board':>7} {'down B/s':>9} {'up B/s':>7} {'keyframe B':>10} "
+          f"{'all-keyframe B/s':>16} {'tick ms p50/p99':>15} {'latency ms p50/p99':>18} {'desyncs':>7}")
+    for r in run(args.seconds, args.rate):
+        print(f"{r['clients']:>7} {r['board']:>7} {r['down_Bps']:>9.0f} {r['up_Bps']:>7.0f} "
+              f"{r['keyframe_B']:>10} {r['full_Bps']:>16.0f} "
+              f"{r['tick_p50_ms']:>7.2f}/{r['tick_p99_ms']:<7.2f} "
+              f"{r['lat_p50_ms']:>9.2f}/{r['lat_p99_ms']:<8.2f} {r['desyncs']:>7}")
@@ -0,0 +1,100 @@
+"""Particle frame time: the old per-object particles vs the pooled system.
+
+Keeps a steady population of live particles (topping it up every frame)
+and reports milliseconds per update+draw frame for the old list of
+``Particle`` objects, the pooled system's plain loop and, with NumPy
+installed, its vectorized update. 60 fps needs a frame under 16.7 ms.
+
+    python -m benchmarks.bench_particles
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import engine
+from particles import Emitter, ParticleSystem, np
+
+BG_COLOR = (15, 15, 35)
+ACCENT_GREEN = (50, 255, 150)
+# Slow fade so a population of thousands stays on screen
+LONG_SPARKS = Emitter(ACCENT_GREEN, count=1, speed=(0.2, 1.5), fade=(0.5, 1.5))
+
+
+class LegacyParticle:
+    """The menu's old particle: one object and one draw.circle each"""
+
+    def __init__(self, rng):
+        self.x = engine.WIDTH // 2
+        self.y = engine.HEIGHT // 2
+        self.vx = rng.uniform(-1.5, 1.5)
+        self.vy = rng.uniform(-1.5, 1.5)
+        self.size = 2
+        self.alpha = 255
+        self.fade = rng.uniform(0.5, 1.5)
+
+    def update(self):
+        self.x += self.vx
+        self.y += self.vy
+        self.alpha -= self.fade
+
+    def draw(self, surface):
+        if self.alpha > 0:
+            color = (*ACCENT_GREEN, int(self.alpha))
+            pygame.draw.circle(surface, color, (int(self.x), int(self.y)), self.size)
+
+
+def _legacy_ms(surface, live, frames, rng):
+    particles = [LegacyParticle(rng) for _ in range(live)]
+    start = time.perf_counter()
+    for _ in range(frames):
+        surface.fill(BG_COLOR)
+        particles.extend(LegacyParticle(rng) for _ in range(live - len(particles)))
+        for p in particles.copy():
+            p.update()
+            if p.alpha <= 0:
+                particles.remove(p)
+            else:
+                p.draw(surface)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def _pooled_ms(surface, live, frames, vectorized, rng):
+    system = ParticleSystem(capacity=live, vectorized=vectorized, rng=rng)
+    cx, cy = engine.WIDTH // 2, engine.HEIGHT // 2
+    system.emit(LONG_SPARKS, cx, cy, live)
+    start = time.perf_counter()
+    for _ in range(frames):
+        surface.fill(BG_COLOR)
+        system.emit(LONG_SPARKS, cx, cy, live - len(system))
+        system.update()
+        system.draw(surface)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def run(live=10_000, frames=120, seed=0):
+    import random
+
+    pygame.init()
+    screen = pygame.display.set_mode((engine.WIDTH, engine.HEIGHT))
+    results = [("objects", _legacy_ms(screen, live, frames, random.Random(seed))),
+               ("pool loop", _pooled_ms(screen, live, frames, False, random.Random(seed)))]
+    if np is not None:
+        results.append(("pool numpy", _pooled_ms(screen, live, frames, True, random.Random(seed))))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--particles", type=int, default=10_000)
+    parser.add_argument("--frames", type=int, default=120)
+    args = parser.parse_args()
+
+    print(f"{args.particles} live particles")
+    print(f"{'system':>12} {'ms/frame':>9} {'max fps':>8}")
+    for name, ms in run(args.particles, args.frames):
+        print(f"{name:>12} {ms:>9.3f} {1000 / ms:>8.0f}")
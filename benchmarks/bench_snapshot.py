@@ -0,0 +1,96 @@
+"""Snapshot encode/decode cost per snake cell, and the rewind buffer per tick.
+
+Builds survival states with snakes of 10, 100 and 1000 cells on the normal
+board and 10,000 cells on a 200x200 world, each with a few items, then
+times ``snapshot.write`` (state -> bytes), decoding the cells and items
+back to the engine's tuples, and ``snapshot.read`` (a full restore, which
+also rebuilds the snake body and the free-cell index). Also reports the
+snapshot size, ``RewindBuffer.record`` per tick and the time to write a
+save file and load it back.
+
+    python -m benchmarks.bench_snapshot
+"""
+import argparse
+import random
+import struct
+import time
+
+import engine
+import snapshot
+from body import SnakeBody
+from replay import Replay
+
+CASES = ((40, 30, 10), (40, 30, 100), (40, 30, 1000), (200, 200, 10000))
+
+
+def _state(cols, rows, length, seed):
+    """A survival game with a ``length``-cell snake winding up from the bottom row"""
+    block = engine.BLOCK
+    state = engine.GameState("survival", width=cols * block, height=rows * block,
+                             rng=random.Random(seed))
+    cells = []
+    for i in range(length):
+        row, col = divmod(i, cols)
+        col = col if row % 2 else cols - 1 - col
+        cells.append((col * block, (rows - 1 - row) * block))
+    state.snake = SnakeBody(reversed(cells))
+    state.direction = engine.UP
+    state.items.clear()
+    engine.reindex_free(state)
+    for kind in ("food", "food", "bomb", "magnet"):
+        engine.spawn_item(state, kind)
+    return state
+
+
+def _time(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def run(repeat=2000, seed=0):
+    results = []
+    for cols, rows, length in CASES:
+        state = _state(cols, rows, length, seed)
+        board = snapshot.board(state.width, state.height, state.block)
+        buf = bytearray(snapshot.snapshot_size(state, board))
+        end = snapshot.write(state, board, buf, 0, 0, 0)
+        words = snapshot._rng_words(state.rng)[0]
+        n = max(1, repeat * 10 // length)
+
+        def decode():
+            _, _, _, _, _, _, _, _, _, count, items, _, _ = snapshot.TICK.unpack_from(buf, 0)
+            cell = board.cells.__getitem__
+            list(map(cell, struct.unpack_from(f"<{count + items}{board.code}", buf,
+                                              snapshot.TICK.size)))
+
+        ring = snapshot.RewindBuffer()
+        ring.reset(state)
+        restored = _state(cols, rows, 1, seed)
+        replay = Replay("survival", seed, ticks=1000)
+        save = snapshot.dump(state, replay)
+        results.append({
+            "board": f"{cols}x{rows}", "length": length, "bytes": end,
+            "encode_ns": _time(lambda: snapshot.write(state, board, buf, 0, 0, 0), n) * 1000 / length,
+            "decode_ns": _time(decode, n) * 1000 / length,
+            "restore_ns": _time(lambda: snapshot.read(restored, board, buf, 0, lambda b: words),
+                                max(1, n // 10)) * 1000 / length,
+            "record_us": _time(lambda: ring.record(state, 0), n),
+            "save_us": _time(lambda: snapshot.dump(state, replay), max(1, n // 10)),
+            "load_us": _time(lambda: snapshot.load(save), max(1, n // 10)),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'board':>7} {'length':>6} {'bytes':>6} {'encode ns/cell':>14} {'decode ns/cell':>14} "
+          f"{'restore ns/cell':>15} {'record us':>9} {'save us':>8} {'load us':>8}")
+    for r in run(args.repeat):
+        print(f"{r['board']:>7} {r['length']:>6} {r['bytes']:>6} {r['encode_ns']:>14.0f} "
+              f"{r['decode_ns']:>14.0f} {r['restore_ns']:>15.0f} {r['record_us']:>9.1f} "
+              f"{r['save_us']:>8.1f} {r['load_us']:>8.1f}")
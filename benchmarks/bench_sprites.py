@@ -0,0 +1,60 @@
+"""Snake frame time: per-segment primitives vs the pre-rendered sprite batch.
+
+Draws snakes of length 10, 100 and 1000 laid along a Hamiltonian cycle
+(so every head/tail/corner variant shows up) both ways, checks the two
+frames are pixel-identical and reports milliseconds per frame.
+
+    python -m benchmarks.bench_sprites
+"""
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import engine
+from benchmarks.bench_body import hamiltonian_cycle
+from snake_sprites import draw_snake, draw_snake_segment
+
+BG_COLOR = (15, 15, 35)
+
+
+def draw_snake_primitives(surface, snake):
+    """The old renderer: one draw_snake_segment() call per segment"""
+    last = len(snake) - 1
+    for i, s in enumerate(snake):
+        prev_pos = snake[i-1] if i > 0 else None
+        next_pos = snake[i+1] if i < last else None
+        draw_snake_segment(surface, s, is_head=(i == 0), is_tail=(i == last), prev_pos=prev_pos, next_pos=next_pos)
+
+
+def _frame_ms(draw, surface, snake, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        surface.fill(BG_COLOR)
+        draw(surface, snake)
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def run(frames=50):
+    pygame.init()
+    screen = pygame.display.set_mode((engine.WIDTH, engine.HEIGHT))
+    cycle = hamiltonian_cycle()
+    results = []
+    for length in (10, 100, 1000):
+        snake = cycle[length - 1::-1]
+        old = _frame_ms(draw_snake_primitives, screen, snake, frames)
+        reference = screen.copy()
+        new = _frame_ms(draw_snake, screen, snake, frames)
+        same = pygame.image.tobytes(reference, "RGB") == pygame.image.tobytes(screen, "RGB")
+        results.append({"length": length, "primitives_ms": old, "sprites_ms": new, "identical": same})
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'length':>8} {'primitives ms':>14} {'sprites ms':>11} {'speedup':>8} {'identical':>10}")
+    for r in run():
+        print(f"{r['length']:>8} {r['primitives_ms']:>14.3f} {r['sprites_ms']:>11.3f} "
+              f"{r['primitives_ms'] / r['sprites_ms']:>7.1f}x {str(r['identical']):>10}")
@@ -0,0 +1,88 @@
+"""World mode cost as the world grows.
+
+Plays greedy bot games on worlds from the normal 40x30 board up to
+1000x1000 cells and times ``engine.step`` (rules) and ``WorldRenderer``
+frames separately from the bot; restarts a game whenever the bot dies.
+Both should stay flat as the area grows. Setting up a world (the free-cell
+index and the rocks) is the one cost that scales with its area, and is
+reported on its own.
+
+    python -m benchmarks.bench_world
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import engine
+from replay import DIRECTIONS
+from worldview import WorldRenderer
+
+SIZES = ((40, 30), (200, 200), (500, 500), (1000, 1000))
+
+
+def _bot(state, rng):
+    """Greedy step towards the oldest food, avoiding anything deadly"""
+    hx, hy = state.head
+    fx, fy = state.items.nearest(state.head, 20 * state.block, "food") or state.food or state.head
+    options = []
+    for d in DIRECTIONS:
+        cell = (hx + d[0], hy + d[1])
+        if (0 <= cell[0] < state.width and 0 <= cell[1] < state.height
+                and cell not in state.snake and cell not in state.obstacles
+                and state.items.get(cell) != "bomb"):
+            options.append((abs(cell[0] - fx) + abs(cell[1] - fy) + rng.random() * 30, d))
+    return min(options)[1] if options else None
+
+
+def _art(block):
+    sprite = pygame.Surface((block, block))
+    sprite.fill((200, 50, 50))
+    return {name: (sprite, (255, 100, 100), 15) for name in
+            ("food", "bomb", "magnet", "scissor", "obstacle")}
+
+
+def run(ticks=3000, seed=0):
+    pygame.init()
+    screen = pygame.display.set_mode((engine.WIDTH, engine.HEIGHT))
+    art = _art(engine.BLOCK)
+    results = []
+    for cols, rows in SIZES:
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        state = engine.new_world(cols, rows, rng=random.Random(seed))
+        setup = time.perf_counter() - start
+        renderer = WorldRenderer(screen, art, (15, 15, 35), lambda surface, state: None,
+                                 (0, 0, 0, 0), engine.MAGNET_RADIUS, engine.BLOCK)
+        step_time = frame_time = 0.0
+        games = 1
+        for _ in range(ticks):
+            if not state.alive:
+                state = engine.new_world(cols, rows, rng=random.Random(seed + games))
+                games += 1
+            engine.turn(state, _bot(state, rng))
+            start = time.perf_counter()
+            engine.step(state)
+            step_time += time.perf_counter() - start
+            start = time.perf_counter()
+            renderer.render(state)
+            frame_time += time.perf_counter() - start
+        results.append({"world": f"{cols}x{rows}", "setup_ms": setup * 1000, "games": games,
+                        "step_us": step_time / ticks * 1e6, "frame_ms": frame_time / ticks * 1000})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=3000)
+    args = parser.parse_args()
+
+    print(f"{'world':>10} {'setup ms':>9} {'games':>6} {'step us':>8} {'frame ms':>9}")
+    for r in run(args.ticks):
+        print(f"{r['world']:>10} {r['setup_ms']:>9.1f} {r['games']:>6} "
+              f"{r['step_us']:>8.2f} {r['frame_ms']:>9.3f}")
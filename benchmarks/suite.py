@@ -0,0 +1,288 @@
+"""Headless benchmark suite with JSON results and a regression check.
+
+Runs under the dummy SDL video/audio drivers and samples:
+
+- ``tick_survival`` / ``tick_level``: us per engine tick, re-simulating
+  seeded bot games exactly as ``survival_game``/``level_game`` step them
+- ``spawn_fill_<pct>``: us per ``spawn()`` (and handing the cell back)
+  with the board that full
+- ``render_full_<length>``: ms per full-frame render (``GameRenderer``)
+- ``menu_frame``: ms per main menu frame, particles included
+- ``save_score``: ms per ``highscores.save_score`` on the game thread (the
+  journal write and fsync run in the background)
+- ``import_main``: ms to import ``main`` in a fresh interpreter
+
+Each benchmark records many samples and stores percentiles::
+
+    python -m benchmarks.suite --out baseline.json
+    python -m benchmarks.suite --compare baseline.json            # run, then compare
+    python -m benchmarks.suite --compare baseline.json --input new.json --percentile p95
+
+Compare mode flags every benchmark whose chosen percentile got slower than
+the baseline by more than ``--threshold`` percent and exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import engine
+from benchmarks.bench_body import hamiltonian_cycle
+from body import SnakeBody
+from replay import DIRECTIONS, MODES, Recorder, new_state, simulate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERCENTILES = (50, 90, 95, 99)
+
+# ---------------- STATS ----------------
+def percentile(ordered, p):
+    """Linear-interpolated ``p``-th percentile of an already sorted list"""
+    k = (len(ordered) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples, unit):
+    ordered = sorted(samples)
+    result = {"unit": unit, "n": len(ordered), "min": ordered[0],
+              "mean": sum(ordered) / len(ordered)}
+    for p in PERCENTILES:
+        result[f"p{p}"] = percentile(ordered, p)
+    return result
+
+# ---------------- SIMULATION ----------------
+def _bot_move(state, rng):
+    """Greedy step towards the food that avoids walls, obstacles and itself"""
+    hx, hy = state.head
+    fx, fy = state.food or (hx, hy)
+    options = []
+    for d in DIRECTIONS:
+        cell = (hx + d[0], hy + d[1])
+        if (0 <= cell[0] < state.width and 0 <= cell[1] < state.height
+                and cell not in state.snake and cell not in state.obstacles and cell != state.bomb):
+            options.append((abs(cell[0] - fx) + abs(cell[1] - fy) + rng.random() * 40, d))
+    return min(options)[1] if options else None
+
+
+def record_games(mode, games, seed):
+    """Play seeded bot games and return their replays"""
+    rng = random.Random(seed)
+    replays = []
+    for _ in range(games):
+        game_seed = rng.getrandbits(63)
+        game_rng = random.Random(game_seed)
+        level = 1
+        recorder = Recorder(mode, game_seed, level)
+        state = new_state(mode, level, 0, game_rng)
+        while True:
+            engine.turn(state, _bot_move(state, rng))
+            recorder.tick(state)
+            engine.step(state)
+            if state.result == engine.NEXT and level < len(engine.LEVELS):
+                level += 1
+                state = new_state(mode, level, state.score, game_rng)
+            elif state.result is not None:
+                break
+        replays.append(recorder.finish(state.score))
+    return replays
+
+
+def bench_ticks(mode, games=60, seed=1):
+    samples = []
+    for replay in record_games(mode, games, seed):
+        start = time.perf_counter()
+        simulate(replay)
+        samples.append((time.perf_counter() - start) / replay.ticks * 1e6)
+    return summarize(samples, "us")
+
+
+def bench_spawn(fill, blocks=50, calls=100, seed=2):
+    rng = random.Random(seed)
+    state = engine.new_survival(rng=rng)
+    cells = list(state.free)
+    rng.shuffle(cells)
+    for cell in cells[:int(len(cells) * fill)]:
+        state.free.discard(cell)
+    spawn, release = engine.spawn, state.free.add
+    samples = []
+    for _ in range(blocks):
+        # each spawned cell is handed back so the fill level stays put
+        start = time.perf_counter()
+        for _ in range(calls):
+            release(spawn(state))
+        samples.append((time.perf_counter() - start) / calls * 1e6)
+    return summarize(samples, "us")
+
+# ---------------- RENDERING ----------------
+def bench_render(length, frames=40):
+    import game
+    from renderer import GameRenderer
+
+    state = engine.new_survival(rng=random.Random(3))
+    cells = hamiltonian_cycle()[length - 1::-1]
+    state.snake = SnakeBody(cells)
+    renderer = GameRenderer(game.screen, game.ITEM_ART, game.BG_COLOR, game.draw_survival_hud,
+                            game.SURVIVAL_HUD, engine.MAGNET_RADIUS, engine.BLOCK, dirty=False)
+    samples = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        renderer.render(state)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples, "ms")
+
+
+class _Stop(Exception):
+    pass
+
+
+class _NoWait:
+    def tick(self, framerate=0):
+        return 0
+
+
+def bench_menu(frames=180, warmup=60):
+    """Run the real main_menu loop, timing frames between display updates"""
+    import menu
+
+    stamps = []
+    real_update, real_clock = pygame.display.update, menu.clock
+
+    def update(*args):
+        stamps.append(time.perf_counter())
+        if len(stamps) > warmup + frames:
+            raise _Stop
+        return real_update(*args)
+
+    pygame.display.update = update
+    menu.clock = _NoWait()
+    try:
+        menu.main_menu()
+    except _Stop:
+        pass
+    finally:
+        pygame.display.update, menu.clock = real_update, real_clock
+    stamps = stamps[warmup:]
+    return summarize([(b - a) * 1000 for a, b in zip(stamps, stamps[1:])], "ms")
+
+# ---------------- I/O AND STARTUP ----------------
+def bench_save_score(calls=100):
+    import highscores
+    from scorestore import ScoreStore
+
+    real_store = highscores.store
+    with tempfile.TemporaryDirectory() as directory:
+        highscores.store = ScoreStore(directory)
+        samples = []
+        try:
+            for i in range(calls):
+                start = time.perf_counter()
+                highscores.save_score(MODES[i % 2], i * 10)
+                samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            highscores.flush()
+            highscores.store = real_store
+    return summarize(samples, "ms")
+
+
+def bench_import(runs=5):
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True,
+                             text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+    return summarize(samples, "ms")
+
+# ---------------- SUITE ----------------
+BENCHMARKS = {
+    "tick_survival": lambda: bench_ticks("survival"),
+    "tick_level": lambda: bench_ticks("level"),
+    "spawn_fill_0": lambda: bench_spawn(0.0),
+    "spawn_fill_50": lambda: bench_spawn(0.5),
+    "spawn_fill_90": lambda: bench_spawn(0.9),
+    "spawn_fill_99": lambda: bench_spawn(0.99),
+    "render_full_10": lambda: bench_render(10),
+    "render_full_100": lambda: bench_render(100),
+    "render_full_1000": lambda: bench_render(1000),
+    "menu_frame": bench_menu,
+    "save_score": bench_save_score,
+    "import_main": bench_import,
+}
+
+
+def run(names=None):
+    pygame.init()
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = BENCHMARKS[name]()
+        print(f"{name:>18} {_row(results[name])}", file=sys.stderr)
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def _row(r):
+    return " ".join(f"{k}={r[k]:.3f}" for k in ("p50", "p95", "p99")) + f" {r['unit']} (n={r['n']})"
+
+
+def compare(baseline, current, pct="p50", threshold=10.0):
+    """[(name, base, new, change %, regressed)] for benchmarks in both runs"""
+    rows = []
+    for name, new in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        change = (new[pct] - base[pct]) / base[pct] * 100 if base[pct] else 0.0
+        rows.append((name, base[pct], new[pct], change, change > threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmark suite")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="run just these")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline results JSON")
+    parser.add_argument("--input", help="results JSON to compare instead of running the suite")
+    parser.add_argument("--percentile", default="p50", choices=[f"p{p}" for p in PERCENTILES])
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input) as f:
+            current = json.load(f)
+    else:
+        current = run(args.only)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=2)
+    if not args.compare:
+        if not args.out:
+            print(json.dumps(current, indent=2))
+        sys.exit(0)
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = compare(baseline, current, args.percentile, args.threshold)
+    print(f"{'benchmark':>18} {'base ' + args.percentile:>12} {'new ' + args.percentile:>12} {'change':>8}")
+    for name, base, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:>18} {base:>12.3f} {new:>12.3f} {change:>+7.1f}%{flag}")
+    sys.exit(1 if any(r[4] for r in rows) else 0)
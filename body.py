@@ -0,0 +1,88 @@
+"""Snake body with O(1) head/tail updates and membership checks.
+
+The body is a deque of cells (head first) plus a per-cell segment count, so
+moving, growing, cutting the tail and ``cell in body`` never scan the
+whole snake. Counts rather than a plain set because the magnet can pull the
+head onto a cell the body already covers.
+
+When given a ``FreeCells`` index the body keeps it in sync: a cell leaves
+the index when the first segment covers it and returns when the last one
+moves off.
+"""
+from collections import deque
+
+
+class SnakeBody:
+    """Ordered snake segments, head at index 0"""
+
+    __slots__ = ("segments", "counts", "free")
+
+    def __init__(self, cells=(), free=None):
+        self.segments = segments = deque(cells)
+        counts = dict.fromkeys(segments, 1)
+        if len(counts) < len(segments):  # some segments overlap
+            counts = dict.fromkeys(segments, 0)
+            for cell in segments:
+                counts[cell] += 1
+        self.counts = counts
+        self.free = free
+        if free is not None:
+            free.discard_all(counts)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __getitem__(self, index):
+        # O(1) at either end, which is all the rules need
+        return self.segments[index]
+
+    def __contains__(self, cell):
+        return cell in self.counts
+
+    def __repr__(self):
+        return f"SnakeBody({list(self.segments)!r})"
+
+    @property
+    def head(self):
+        return self.segments[0]
+
+    @property
+    def tail(self):
+        return self.segments[-1]
+
+    def push_head(self, cell):
+        self.segments.appendleft(cell)
+        self._cover(cell)
+
+    def push_tail(self, cell):
+        self.segments.append(cell)
+        self._cover(cell)
+
+    def _cover(self, cell):
+        count = self.counts.get(cell, 0)
+        self.counts[cell] = count + 1
+        if not count and self.free is not None:
+            self.free.discard(cell)
+
+    def pop_tail(self):
+        cell = self.segments.pop()
+        left = self.counts[cell] - 1
+        if left:
+            self.counts[cell] = left
+        else:
+            del self.counts[cell]
+            if self.free is not None:
+                self.free.add(cell)
+        return cell
+
+    def truncate(self, count):
+        """Drop ``count`` segments from the tail"""
+        for _ in range(min(count, len(self.segments))):
+            self.pop_tail()
+
+    def cells(self):
+        """Distinct cells covered by the body"""
+        return self.counts.keys()
@@ -0,0 +1,365 @@
+"""Headless rules engine for Snake.
+
+Everything here is plain Python: no pygame, no window, no sounds. The game
+loops in ``game.py`` feed keyboard input into ``step()`` and draw whatever
+state it leaves behind, and tools (bots, benchmarks, replays) can drive the
+exact same rules without a display.
+"""
+import random
+
+from body import SnakeBody
+from freecells import empty_board
+from itemgrid import ItemGrid
+
+# ---------------- CONFIG ----------------
+WIDTH, HEIGHT = 800, 600
+BLOCK = 20
+
+UP = (0, -BLOCK)
+DOWN = (0, BLOCK)
+LEFT = (-BLOCK, 0)
+RIGHT = (BLOCK, 0)
+
+START_POS = (100, 100)
+APPLE_POINTS = 10
+
+# Survival speed (ticks per second) and the length at which it doubles
+SLOW_SPEED, FAST_SPEED = 10, 20
+FAST_LENGTH = 15
+
+# Power-ups: 1-in-N chance per tick once the snake is long enough
+BOMB_CHANCE = 150
+MAGNET_CHANCE, MAGNET_LENGTH = 200, 15
+SCISSOR_CHANCE, SCISSOR_LENGTH = 250, 25
+SCISSOR_CUT = 10
+MAGNET_RADIUS = 120
+MAGNET_DURATION = 5000  # ms of game time
+
+# Survival items: most of each kind on the board at once. Food is kept
+# topped up; the others spawn on their 1-in-N roll while below the limit.
+ITEM_LIMITS = {"food": 1, "bomb": 1, "magnet": 1, "scissor": 1}
+
+# World mode: survival on a board far bigger than the window, with rocks.
+# Item limits scale with its area: at most one of each kind per N cells.
+WORLD_COLS, WORLD_ROWS = 500, 500
+WORLD_ROCKS = 50  # one rock per N cells
+WORLD_CLEARING = 5  # cells around the start kept free of rocks
+WORLD_DENSITY = {"food": 300, "bomb": 600, "magnet": 10000, "scissor": 10000}
+
+# level: (apples needed, speed, obstacle count)
+LEVELS = {
+    1: (5, 15, 0),
+    2: (6, 10, 12),
+    3: (6, 5, 15),
+    4: (6, 20, 15)
+}
+
+# ---------------- EVENTS ----------------
+# step() returns a list of these so front-ends can play sounds
+EAT = "EAT"
+POWER = "POWER"
+BOMB = "BOMB"
+OVER = "OVER"
+NEXT = "NEXT"
+
+# ---------------- STATE ----------------
+class GameState:
+    """Everything needed to continue a survival or level game"""
+
+    def __init__(self, mode="survival", level=1, total_score=0,
+                 width=WIDTH, height=HEIGHT, block=BLOCK, rng=None, limits=None, layout=None):
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.block = block
+        self.rng = rng if rng is not None else random.Random()
+
+        self.free = empty_board(width, height, block)
+        if layout is not None:  # a level from a pack (see levelpack.py)
+            start, self.direction = layout.start, layout.direction
+        else:
+            start, self.direction = START_POS, (block, 0)
+        self.snake = SnakeBody([start], self.free)
+        self.items = new_items(block)
+        self.limits = dict(ITEM_LIMITS)
+        self.magnet_active = False
+        self.magnet_time = 0
+        self.time = 0  # ms of game time, advanced by one tick per step
+
+        self.level = level
+        self.total_score = total_score
+        self.score = total_score
+        self.apples = 0
+        self.obstacles = set()
+        self.speeds = ()  # level speed by apples eaten; the last one sticks
+
+        self.alive = True
+        self.result = None  # OVER or NEXT once the game has finished
+        self.death = None   # "wall", "self", "obstacle", "bomb" or "full"
+
+        if mode == "level":
+            if layout is None:
+                self.need, speed, obs_count = LEVELS[level]
+                self.speeds = (speed,)
+            else:
+                self.need, self.speeds, obs_count = layout.need, layout.speeds, layout.rocks
+                for cell in layout.obstacles:
+                    self.free.discard(cell)
+                self.obstacles.update(layout.obstacles)
+            self.speed = self.speeds[0]
+            for _ in range(obs_count):
+                cell = spawn(self)
+                if cell is None:
+                    break
+                self.obstacles.add(cell)
+            spawn_item(self, "food")
+        else:
+            self.need = 0
+            self.speed = SLOW_SPEED
+            if mode == "world":
+                cells = (width // block) * (height // block)
+                self.limits.update({kind: max(1, cells // n) for kind, n in WORLD_DENSITY.items()})
+                _scatter_rocks(self, cells // WORLD_ROCKS)
+            self.limits.update(limits or {})
+            for _ in range(self.limits["food"]):
+                spawn_item(self, "food")
+
+    @property
+    def head(self):
+        return self.snake.head
+
+    # the oldest item of each kind, for code that only follows one
+    food = property(lambda self: self.items.first("food"),
+                    lambda self, cell: self._set_item("food", cell))
+    bomb = property(lambda self: self.items.first("bomb"),
+                    lambda self, cell: self._set_item("bomb", cell))
+    magnet = property(lambda self: self.items.first("magnet"),
+                      lambda self, cell: self._set_item("magnet", cell))
+    scissor = property(lambda self: self.items.first("scissor"),
+                       lambda self, cell: self._set_item("scissor", cell))
+
+    def _set_item(self, kind, cell):
+        """Replace every item of ``kind`` with one on ``cell`` (None: none)"""
+        for old in list(self.items.of_kind(kind)):
+            self.items.remove(old)
+            if (0 <= old[0] < self.width and 0 <= old[1] < self.height
+                    and old not in self.snake and old not in self.obstacles):
+                self.free.add(old)
+        if cell is not None:
+            self.free.discard(cell)
+            self.items.add(cell, kind)
+
+    @property
+    def level_score(self):
+        """Points earned in the current level only"""
+        return self.apples * APPLE_POINTS
+
+
+def new_items(block):
+    """Empty item grid, bucketed so a magnet query touches a few buckets"""
+    return ItemGrid(max(MAGNET_RADIUS // block, 1) * block, block)
+
+
+def new_survival(rng=None, **kwargs):
+    return GameState("survival", rng=rng, **kwargs)
+
+
+def new_level(level=1, total_score=0, rng=None, **kwargs):
+    return GameState("level", level, total_score, rng=rng, **kwargs)
+
+
+def new_world(cols=WORLD_COLS, rows=WORLD_ROWS, rng=None, block=BLOCK, **kwargs):
+    return GameState("world", width=cols * block, height=rows * block, block=block,
+                     rng=rng, **kwargs)
+
+
+def _scatter_rocks(state, count):
+    """Turn up to ``count`` random empty cells into obstacles, away from the start"""
+    sx, sy = START_POS
+    reach = WORLD_CLEARING * state.block
+    for _ in range(count):
+        cell = spawn(state)
+        if cell is None:
+            break
+        if abs(cell[0] - sx) <= reach and abs(cell[1] - sy) <= reach:
+            state.free.add(cell)
+        else:
+            state.obstacles.add(cell)
+
+# ---------------- RULES ----------------
+def spawn(state):
+    """Claim a random empty cell for an item, or None if the board is full"""
+    cell = state.free.sample(state.rng)
+    if cell is not None:
+        state.free.discard(cell)
+    return cell
+
+
+def reindex_free(state):
+    """Rebuild ``state.free`` from what covers the board, in an order that
+    depends only on the board. Spawns follow the index's order, so a restored
+    game (see snapshot.py) calls this, and so does a replay at the ticks it
+    was restored on."""
+    free = empty_board(state.width, state.height, state.block)
+    free.discard_all(sorted(state.obstacles))  # a set: its order depends on its history
+    free.discard_all(state.snake)
+    free.discard_all(state.items)
+    state.free = state.snake.free = free
+
+
+def spawn_item(state, kind):
+    """Put an item of ``kind`` on a random empty cell; returns the cell or None"""
+    cell = spawn(state)
+    if cell is not None:
+        state.items.add(cell, kind)
+    return cell
+
+
+def turn(state, direction):
+    """Change direction unless it would reverse straight into the neck"""
+    if direction is None:
+        return
+    dx, dy = state.direction
+    if direction != (-dx, -dy):
+        state.direction = direction
+
+
+def step(state, action=None):
+    """Advance the game by one tick and return the events that happened"""
+    if not state.alive:
+        return []
+    turn(state, action)
+    if state.mode == "level":
+        return _step_level(state)
+    return _step_survival(state)
+
+
+def _game_over(state, cause, events, event=OVER):
+    state.alive = False
+    state.result = OVER
+    state.death = cause
+    events.append(event)
+    return events
+
+
+def _step_survival(state):
+    events = []
+    snake = state.snake
+    rng = state.rng
+    state.speed = FAST_SPEED if len(snake) >= FAST_LENGTH else SLOW_SPEED
+    state.time += 1000 // state.speed
+
+    hx, hy = snake.head
+    head = (hx + state.direction[0], hy + state.direction[1])
+
+    # Wall collision
+    if not (0 <= head[0] < state.width and 0 <= head[1] < state.height):
+        return _game_over(state, "wall", events)
+
+    # Obstacle collision (world mode's rocks)
+    if head in state.obstacles:
+        return _game_over(state, "obstacle", events)
+
+    # Self collision
+    if head in snake:
+        return _game_over(state, "self", events)
+
+    snake.push_head(head)
+    items = state.items
+    limits = state.limits
+    hit = items.get(head)  # what the head landed on, taken below in rule order
+
+    # APPLE
+    if hit == "food":
+        items.remove(head)
+        events.append(EAT)
+        state.score += APPLE_POINTS
+        if spawn_item(state, "food") is None and not items.count("food"):
+            return _game_over(state, "full", events)
+    else:
+        snake.pop_tail()
+
+    # BOMB
+    if items.count("bomb") < limits["bomb"] and rng.randint(1, BOMB_CHANCE) == 1:
+        spawn_item(state, "bomb")
+
+    if hit == "bomb":
+        return _game_over(state, "bomb", events, BOMB)
+
+    # MAGNET
+    if (len(snake) >= MAGNET_LENGTH and items.count("magnet") < limits["magnet"]
+            and rng.randint(1, MAGNET_CHANCE) == 1):
+        spawn_item(state, "magnet")
+
+    if hit == "magnet":
+        items.remove(head)
+        events.append(POWER)
+        state.magnet_active = True
+        state.magnet_time = state.time
+
+    # SCISSOR
+    if (len(snake) >= SCISSOR_LENGTH and items.count("scissor") < limits["scissor"]
+            and rng.randint(1, SCISSOR_CHANCE) == 1):
+        spawn_item(state, "scissor")
+
+    if hit == "scissor":
+        items.remove(head)
+        events.append(POWER)
+        if len(snake) > SCISSOR_CUT:
+            snake.truncate(SCISSOR_CUT)
+
+    # MAGNET EFFECT: pull in the nearest food inside the ring
+    if state.magnet_active:
+        food = items.nearest(head, MAGNET_RADIUS, "food")
+        if food is not None:
+            items.remove(food)
+            snake.push_head(food)
+            events.append(EAT)
+            state.score += APPLE_POINTS
+            if spawn_item(state, "food") is None and not items.count("food"):
+                return _game_over(state, "full", events)
+        if state.time - state.magnet_time > MAGNET_DURATION:
+            state.magnet_active = False
+
+    return events
+
+
+def _step_level(state):
+    events = []
+    snake = state.snake
+    state.time += 1000 // state.speed
+
+    hx, hy = snake.head
+    head = (hx + state.direction[0], hy + state.direction[1])
+
+    # Wall collision
+    if not (0 <= head[0] < state.width and 0 <= head[1] < state.height):
+        return _game_over(state, "wall", events)
+
+    # Obstacle collision
+    if head in state.obstacles:
+        return _game_over(state, "obstacle", events)
+
+    # Self collision
+    if head in snake:
+        return _game_over(state, "self", events)
+
+    snake.push_head(head)
+
+    if state.items.remove(head) == "food":
+        events.append(EAT)
+        state.apples += 1
+        state.score += APPLE_POINTS
+        state.speed = state.speeds[min(state.apples, len(state.speeds) - 1)]
+        spawn_item(state, "food")
+    else:
+        snake.pop_tail()
+
+    if state.apples >= state.need:
+        state.alive = False
+        state.result = NEXT
+        events.append(NEXT)
+    elif not state.items.count("food"):
+        return _game_over(state, "full", events)
+
+    return events
@@ -0,0 +1,79 @@
+"""Index of empty board cells with O(1) uniform sampling.
+
+Cells live in a flat list plus a cell -> position map. Removing a cell swaps
+the last entry into its slot, so add, discard and sample are all O(1) no
+matter how full the board is, and an empty index means the board is full.
+"""
+from functools import lru_cache
+
+
+class FreeCells:
+    """Set of empty cells that can be sampled uniformly in O(1)"""
+
+    __slots__ = ("cells", "pos")
+
+    def __init__(self, cells=()):
+        self.cells = list(dict.fromkeys(cells))
+        self.pos = {cell: i for i, cell in enumerate(self.cells)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.pos
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def add(self, cell):
+        if cell not in self.pos:
+            self.pos[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        i = self.pos.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.pos[last] = i
+
+    def discard_all(self, cells):
+        """``discard`` each of ``cells``, in order"""
+        pos, free = self.pos, self.cells
+        for cell in cells:
+            i = pos.pop(cell, None)
+            if i is None:
+                continue
+            last = free.pop()
+            if i < len(free):
+                free[i] = last
+                pos[last] = i
+
+    def copy(self):
+        clone = FreeCells.__new__(FreeCells)
+        clone.cells = self.cells.copy()
+        clone.pos = self.pos.copy()
+        return clone
+
+    def sample(self, rng):
+        """Random empty cell, or None when the board is full"""
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+
+def board_cells(width, height, block):
+    """Every cell of a width x height pixel board, as (x, y) pixel tuples"""
+    return [(x, y) for y in range(0, height, block) for x in range(0, width, block)]
+
+
+@lru_cache(maxsize=8)
+def _empty_board(width, height, block):
+    return FreeCells(board_cells(width, height, block))
+
+
+def empty_board(width, height, block):
+    """Fresh index holding every cell of the board"""
+    return _empty_board(width, height, block).copy()
@@ -1,18 +1,33 @@
-import pygame, random, sys
+import pygame, os, random, sys, time
+import engine
+import levelpack
+import multiplayer
+from assetpack import open_assets
+from autopilot import Autopilot
+from engine import WIDTH, HEIGHT, BLOCK
 from highscores import save_score
+from perfstats import FrameStats, PerfOverlay
+from renderer import GameRenderer
+from snake_sprites import draw_snake
+from worldview import WorldRenderer
+from replay import Recorder, new_seed
+from scorestore import DATA_DIR
+from snapshot import RewindBuffer, SaveWriter
+from textcache import draw_text_with_shadow, get_font
+from timestep import FixedStep
+from widgets import Button, ButtonStyle, Label, Panel
 
 pygame.init()
 pygame.mixer.init()
 
 # ---------------- CONFIG ----------------
-WIDTH, HEIGHT = 800, 600
-BLOCK = 20
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Snake Game - Modern Edition")
 clock = pygame.time.Clock()
-font = pygame.font.SysFont("arial", 26)
-title_font = pygame.font.SysFont("arial", 48, bold=True)
-menu_font = pygame.font.SysFont("arial", 32)
+FPS = 60  # display rate; the snake still moves at state.speed ticks/sec
+font = get_font("arial", 26)
+title_font = get_font("arial", 48, bold=True)
+menu_font = get_font("arial", 32)
 
 # ---------------- COLORS ----------------
 BG_COLOR = (15, 15, 35)
@@ -25,254 +40,147 @@ HIGHLIGHT_COLOR = (80, 200, 255)
 GAME_OVER_RED = (255, 50, 50)
 
 # ---------------- LOAD ASSETS ----------------
-IMG = lambda x: pygame.transform.scale(
-    pygame.image.load(f"assets/images/{x}"), (BLOCK, BLOCK))
-
-apple_img   = IMG("apple.png")
-bomb_img    = IMG("bomb.png")
-magnet_img  = IMG("magnet.png")
-scissor_img = IMG("scissor.png")
-obstacle_img= IMG("obstacle.png")
-
-eat_snd   = pygame.mixer.Sound("assets/sounds/eat.wav")
-bomb_snd  = pygame.mixer.Sound("assets/sounds/bomb.wav")
-power_snd = pygame.mixer.Sound("assets/sounds/power.wav")
-over_snd  = pygame.mixer.Sound("assets/sounds/gameover.wav")
-
-# ---------------- COMMON ----------------
-def spawn():
-    return (random.randrange(0, WIDTH, BLOCK),
-            random.randrange(0, HEIGHT, BLOCK))
-
-def draw_text_with_shadow(surface, text, font, color, x, y, shadow_offset=2):
-    """Draw text with shadow effect"""
-    shadow = font.render(text, True, (0, 0, 0))
-    surface.blit(shadow, (x + shadow_offset, y + shadow_offset))
-    text_surf = font.render(text, True, color)
-    surface.blit(text_surf, (x, y))
-
-def draw_panel(surface, rect, alpha=200):
-    """Draw a semi-transparent panel"""
-    panel = pygame.Surface((rect[2], rect[3]))
-    panel.set_alpha(alpha)
-    panel.fill(PANEL_COLOR)
-    surface.blit(panel, (rect[0], rect[1]))
-    pygame.draw.rect(surface, HIGHLIGHT_COLOR, rect, 2, border_radius=10)
-
-def draw_snake_segment(surface, pos, is_head=False, is_tail=False, prev_pos=None, next_pos=None):
-    """Draw realistic snake segment with scales and texture"""
-    x, y = pos
-    
-    if is_head:
-        # HEAD - More detailed
-        # Base circle for head
-        pygame.draw.circle(surface, (40, 180, 100), (x + BLOCK//2, y + BLOCK//2), BLOCK//2)
-        pygame.draw.circle(surface, (50, 220, 120), (x + BLOCK//2, y + BLOCK//2), BLOCK//2 - 2)
-        
-        # Eyes
-        if prev_pos:
-            # Determine direction for eye placement
-            dx = x - prev_pos[0]
-            dy = y - prev_pos[1]
-            
-            if dx > 0:  # Moving right
-                eye1_pos = (x + 14, y + 6)
-                eye2_pos = (x + 14, y + 14)
-            elif dx < 0:  # Moving left
-                eye1_pos = (x + 6, y + 6)
-                eye2_pos = (x + 6, y + 14)
-            elif dy > 0:  # Moving down
-                eye1_pos = (x + 6, y + 14)
-                eye2_pos = (x + 14, y + 14)
-            else:  # Moving up
-                eye1_pos = (x + 6, y + 6)
-                eye2_pos = (x + 14, y + 6)
-        else:
-            eye1_pos = (x + 14, y + 6)
-            eye2_pos = (x + 14, y + 14)
-        
-        # Draw eyes
-        pygame.draw.circle(surface, (255, 255, 255), eye1_pos, 3)
-        pygame.draw.circle(surface, (0, 0, 0), eye1_pos, 2)
-        pygame.draw.circle(surface, (255, 255, 255), eye2_pos, 3)
-        pygame.draw.circle(surface, (0, 0, 0), eye2_pos, 2)
-        
-        # Tongue (small red forked line)
-        if prev_pos:
-            if dx > 0:  # Right
-                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK, y + BLOCK//2), (x + BLOCK + 4, y + BLOCK//2 - 2), 1)
-                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK, y + BLOCK//2), (x + BLOCK + 4, y + BLOCK//2 + 2), 1)
-            elif dx < 0:  # Left
-                pygame.draw.line(surface, (255, 50, 50), (x, y + BLOCK//2), (x - 4, y + BLOCK//2 - 2), 1)
-                pygame.draw.line(surface, (255, 50, 50), (x, y + BLOCK//2), (x - 4, y + BLOCK//2 + 2), 1)
-            elif dy > 0:  # Down
-                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK//2, y + BLOCK), (x + BLOCK//2 - 2, y + BLOCK + 4), 1)
-                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK//2, y + BLOCK), (x + BLOCK//2 + 2, y + BLOCK + 4), 1)
-            else:  # Up
-                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK//2, y), (x + BLOCK//2 - 2, y - 4), 1)
-                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK//2, y), (x + BLOCK//2 + 2, y - 4), 1)
-    
-    elif is_tail:
-        # TAIL - Tapered end
-        if prev_pos:
-            # Determine tail direction
-            dx = prev_pos[0] - x
-            dy = prev_pos[1] - y
-            
-            # Base color for tail
-            tail_color = (35, 170, 90)
-            tail_tip_color = (25, 140, 70)
-            
-            if dx > 0:  # Tail pointing left
-                # Draw tapered polygon
-                points = [
-                    (x + BLOCK, y + 2),
-                    (x + BLOCK, y + BLOCK - 2),
-                    (x + 2, y + BLOCK//2)
-                ]
-                pygame.draw.polygon(surface, tail_color, points)
-                pygame.draw.polygon(surface, tail_tip_color, points, 2)
-                
-            elif dx < 0:  # Tail pointing right
-                points = [
-                    (x, y + 2),
-                    (x, y + BLOCK - 2),
-                    (x + BLOCK - 2, y + BLOCK//2)
-                ]
-                pygame.draw.polygon(surface, tail_color, points)
-                pygame.draw.polygon(surface, tail_tip_color, points, 2)
-                
-            elif dy > 0:  # Tail pointing up
-                points = [
-                    (x + 2, y + BLOCK),
-                    (x + BLOCK - 2, y + BLOCK),
-                    (x + BLOCK//2, y + 2)
-                ]
-                pygame.draw.polygon(surface, tail_color, points)
-                pygame.draw.polygon(surface, tail_tip_color, points, 2)
-                
-            else:  # Tail pointing down
-                points = [
-                    (x + 2, y),
-                    (x + BLOCK - 2, y),
-                    (x + BLOCK//2, y + BLOCK - 2)
-                ]
-                pygame.draw.polygon(surface, tail_color, points)
-                pygame.draw.polygon(surface, tail_tip_color, points, 2)
-            
-            # Add tip highlight
-            if dx > 0:
-                pygame.draw.circle(surface, (30, 150, 80), (x + 2, y + BLOCK//2), 2)
-            elif dx < 0:
-                pygame.draw.circle(surface, (30, 150, 80), (x + BLOCK - 2, y + BLOCK//2), 2)
-            elif dy > 0:
-                pygame.draw.circle(surface, (30, 150, 80), (x + BLOCK//2, y + 2), 2)
-            else:
-                pygame.draw.circle(surface, (30, 150, 80), (x + BLOCK//2, y + BLOCK - 2), 2)
-        else:
-            # Fallback if no prev_pos
-            pygame.draw.circle(surface, (35, 170, 90), (x + BLOCK//2, y + BLOCK//2), BLOCK//3)
-    
-    else:
-        # BODY - Scale pattern
-        # Base body color with gradient
-        rect = pygame.Rect(x + 1, y + 1, BLOCK - 2, BLOCK - 2)
-        
-        # Dark border for body segment
-        pygame.draw.rect(surface, (30, 150, 80), rect, border_radius=4)
-        
-        # Main body color
-        inner_rect = rect.inflate(-2, -2)
-        pygame.draw.rect(surface, (45, 200, 110), inner_rect, border_radius=3)
-        
-        # Scale pattern (diamond shapes)
-        center_x = x + BLOCK//2
-        center_y = y + BLOCK//2
-        
-        # Draw scale texture
-        scale_color = (35, 170, 90)
-        pygame.draw.circle(surface, scale_color, (center_x, center_y), 3)
-        
-        # Add some dots for texture
-        pygame.draw.circle(surface, (55, 220, 120), (x + 5, y + 5), 1)
-        pygame.draw.circle(surface, (55, 220, 120), (x + 15, y + 5), 1)
-        pygame.draw.circle(surface, (55, 220, 120), (x + 5, y + 15), 1)
-        pygame.draw.circle(surface, (55, 220, 120), (x + 15, y + 15), 1)
-        
-        # Belly stripe (lighter colored stripe in middle)
-        if prev_pos and next_pos:
-            dx_prev = x - prev_pos[0]
-            dy_prev = y - prev_pos[1]
-            dx_next = next_pos[0] - x
-            dy_next = next_pos[1] - y
-            
-            # Vertical movement
-            if dx_prev == 0 or dx_next == 0:
-                pygame.draw.rect(surface, (60, 240, 130), (x + 7, y + 2, 6, BLOCK - 4), border_radius=2)
-            # Horizontal movement
-            else:
-                pygame.draw.rect(surface, (60, 240, 130), (x + 2, y + 7, BLOCK - 4, 6), border_radius=2)
-
-def draw_button(surface, text, rect, hover=False):
-    """Draw a button with hover effect"""
-    color = HIGHLIGHT_COLOR if hover else PANEL_COLOR
-    border_color = (150, 220, 255) if hover else HIGHLIGHT_COLOR
-    
-    # Button background
-    btn_surface = pygame.Surface((rect[2], rect[3]))
-    btn_surface.set_alpha(220)
-    btn_surface.fill(color)
-    surface.blit(btn_surface, (rect[0], rect[1]))
-    
-    # Button border
-    pygame.draw.rect(surface, border_color, rect, 3, border_radius=10)
-    
-    # Button text
-    text_surf = font.render(text, True, TEXT_COLOR)
-    text_rect = text_surf.get_rect(center=(rect[0] + rect[2]//2, rect[1] + rect[3]//2))
-    surface.blit(text_surf, text_rect)
-
-def game_over_menu(score=0, mode="survival"):
+# assets/assets.pack is memory-mapped; images are converted to the display
+# format once and sounds decoded (or synthesized, with SNAKE_SYNTH_SOUNDS=1)
+# the first time they play
+assets = open_assets()
+
+apple_img   = assets.image("apple.png", BLOCK)
+bomb_img    = assets.image("bomb.png", BLOCK)
+magnet_img  = assets.image("magnet.png", BLOCK)
+scissor_img = assets.image("scissor.png", BLOCK)
+obstacle_img= assets.image("obstacle.png", BLOCK)
+
+EVENT_SOUNDS = {
+    engine.EAT: "eat.wav",
+    engine.BOMB: "bomb.wav",
+    engine.POWER: "power.wav",
+    engine.OVER: "gameover.wav",
+}
+
+# ---------------- RENDERING ----------------
+# Redraw and upload only the regions that changed each tick;
+# set to False to repaint the whole frame every tick
+DIRTY_RECTS = True
+
+# name -> (image, glow color, glow radius)
+ITEM_ART = {
+    "food": (apple_img, None, 0),
+    "bomb": (bomb_img, (255, 50, 50), 15),
+    "magnet": (magnet_img, (100, 200, 255), 15),
+    "scissor": (scissor_img, (255, 200, 100), 15),
+    "obstacle": (obstacle_img, (255, 100, 100), 18),
+}
+
+def make_renderer(hud, hud_rect):
+    return GameRenderer(screen, ITEM_ART, BG_COLOR, hud, hud_rect,
+                        engine.MAGNET_RADIUS, BLOCK, DIRTY_RECTS, perf)
+
+def make_world_renderer(hud, hud_rect):
+    return WorldRenderer(screen, ITEM_ART, BG_COLOR, hud, hud_rect,
+                         engine.MAGNET_RADIUS, BLOCK, perf)
+
+# ---------------- PERFORMANCE ----------------
+# F3 toggles a frame-time overlay. SNAKE_PERF_DUMP=csv or json records every
+# game and writes its frame timings to <data dir>/perf/ on game over.
+PERF_DUMP = os.environ.get("SNAKE_PERF_DUMP", "").lower()
+perf = FrameStats(capacity=3600, enabled=bool(PERF_DUMP))  # last minute at 60 fps
+perf_overlay = PerfOverlay(perf, always_record=bool(PERF_DUMP))
+
+def dump_perf(mode):
+    if PERF_DUMP and perf.count:
+        directory = os.path.join(DATA_DIR, "perf")
+        os.makedirs(directory, exist_ok=True)
+        name = f"{mode}-{time.strftime('%Y%m%d-%H%M%S')}.{PERF_DUMP}"
+        perf.dump(os.path.join(directory, name), PERF_DUMP)
+
+# ---------------- AUTOPILOT ----------------
+# F2 hands the snake to the autopilot (SNAKE_AUTOPILOT=1 starts with it on).
+# Games it steered still leave replays but don't enter the high scores.
+autopilot = Autopilot(enabled=bool(os.environ.get("SNAKE_AUTOPILOT")))
+
+# ---------------- REWIND / SUSPEND ----------------
+# Every tick of the last few seconds is kept (snapshot.py), so the game over
+# screen can rewind REWIND_SECONDS of game time and play on. F5 suspends the
+# game to <data dir>/saves/ (written in the background) and goes back to the
+# menu; starting that mode again resumes it.
+REWIND_SECONDS = 3
+rewind = RewindBuffer()
+saves = SaveWriter()
+
+def rewind_death(state, recorder, renderer):
+    """Put the game back REWIND_SECONDS before the death and play on"""
+    recorder.restore(rewind.rewind(state, REWIND_SECONDS * 1000))
+    renderer.invalidate()
+    clock.tick()
+
+def present(renderer, state, alpha):
+    """Draw the frame and the perf overlay, then upload the changed rects"""
+    rects = renderer.render(state, alpha)
+    perf.lap("render")
+    if perf_overlay.visible or perf_overlay.dirty:
+        rects.append(renderer.repaint(state, perf_overlay.rect))
+        perf_overlay.dirty = False
+        if perf_overlay.visible:
+            perf_overlay.draw(screen)
+    pygame.display.update(rects)
+    perf.lap("display")
+
+# ---------------- INPUT ----------------
+# Arrow keys + WASD support
+KEY_DIRECTIONS = {
+    pygame.K_UP: engine.UP, pygame.K_w: engine.UP,
+    pygame.K_DOWN: engine.DOWN, pygame.K_s: engine.DOWN,
+    pygame.K_LEFT: engine.LEFT, pygame.K_a: engine.LEFT,
+    pygame.K_RIGHT: engine.RIGHT, pygame.K_d: engine.RIGHT,
+}
+
+# ---------------- WIDGETS ----------------
+GAME_BUTTON = ButtonStyle(font, PANEL_COLOR, HIGHLIGHT_COLOR, HIGHLIGHT_COLOR, (150, 220, 255),
+                          alpha=220)
+
+def game_over_menu(score=0, mode="survival", can_rewind=False):
     """Modern game over screen with buttons"""
-    restart_btn = pygame.Rect(250, 310, 150, 50)
-    menu_btn = pygame.Rect(420, 310, 150, 50)
+    if can_rewind:
+        buttons = [Button((212, 310, 115, 50), "REWIND", GAME_BUTTON, "REWIND"),
+                   Button((342, 310, 115, 50), "RESTART", GAME_BUTTON, "RESTART"),
+                   Button((472, 310, 115, 50), "MENU", GAME_BUTTON, "MENU")]
+    else:
+        buttons = [Button((250, 310, 150, 50), "RESTART", GAME_BUTTON, "RESTART"),
+                   Button((420, 310, 150, 50), "MENU", GAME_BUTTON, "MENU")]
+    panel = Panel((200, 150, 400, 250))
+    title = Label("GAME OVER", title_font, GAME_OVER_RED, (260, 180), shadow_offset=2)
+    score_label = Label(f"Score: {score}", menu_font, TEXT_COLOR, (320, 250), shadow_offset=2)
     
     while True:
         mouse_pos = pygame.mouse.get_pos()
-        restart_hover = restart_btn.collidepoint(mouse_pos)
-        menu_hover = menu_btn.collidepoint(mouse_pos)
         
         # Draw dark overlay
         screen.fill(BG_COLOR)
-        
-        # Draw game over panel
-        panel_rect = (200, 150, 400, 250)
-        draw_panel(screen, panel_rect)
-        
-        # Title
-        draw_text_with_shadow(screen, "GAME OVER", title_font, GAME_OVER_RED, 260, 180)
-        
-        # Score
-        draw_text_with_shadow(screen, f"Score: {score}", menu_font, TEXT_COLOR, 320, 250)
-        
-        # Buttons
-        draw_button(screen, "RESTART", restart_btn, restart_hover)
-        draw_button(screen, "MENU", menu_btn, menu_hover)
+        panel.draw(screen)
+        title.draw(screen)
+        score_label.draw(screen)
+        for btn in buttons:
+            btn.update(mouse_pos)
+            btn.draw(screen)
         
         pygame.display.update()
+        clock.tick(60)
 
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
             if e.type == pygame.MOUSEBUTTONDOWN:
-                if restart_hover: return "RESTART"
-                if menu_hover: return "MENU"
+                for btn in buttons:
+                    if btn.hovered:
+                        return btn.action
 
 def main_menu():
     """Modern main menu"""
     selected = 0
-    options = ["Survival Mode", "Level Mode", "Quit"]
+    options = ["Survival Mode", "Level Mode", "World Mode", "Multiplayer", "Quit"]
+    select_box = Panel((250, 0, 300, 50), alpha=100)
     
     while True:
         screen.fill(BG_COLOR)
@@ -287,8 +195,8 @@ def main_menu():
             
             if i == selected:
                 # Draw selection box
-                select_rect = (250, y_pos - 10, 300, 50)
-                draw_panel(screen, select_rect, alpha=100)
+                select_box.rect.topleft = (250, y_pos - 10)
+                select_box.draw(screen)
             
             draw_text_with_shadow(screen, option, menu_font, color, 280, y_pos)
         
@@ -309,6 +217,10 @@ def main_menu():
                     elif selected == 1:
                         start_level_mode()
                     elif selected == 2:
+                        start_world_mode()
+                    elif selected == 3:
+                        start_multiplayer_mode()
+                    elif selected == 4:
                         pygame.quit()
                         sys.exit()
 
@@ -316,256 +228,387 @@ def main_menu():
 # ================= SURVIVAL MODE =====================
 # =====================================================
 def start_survival_mode():
+    resumed = saves.take("survival")
     while True:
-        result = survival_game()
+        result = survival_game(resumed)
+        resumed = None
         if result == "MENU": 
             return
 
-def survival_game():
-    snake = [(100, 100)]
-    direction = (BLOCK, 0)
-    food = spawn()
-    bomb = None
-    magnet = None
-    scissor = None
-    magnet_active = False
-    magnet_time = 0
-    score = 0
+def handle_input(state):
+    """Feed keyboard events into the engine; returns "SUSPEND" on F5"""
+    for e in pygame.event.get():
+        if e.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        if e.type == pygame.KEYDOWN:
+            if e.key == pygame.K_F3:
+                perf_overlay.toggle()
+            elif e.key == pygame.K_F2:
+                autopilot.toggle()
+            elif e.key == pygame.K_F5:
+                return "SUSPEND"
+            engine.turn(state, KEY_DIRECTIONS.get(e.key))
+
+def play_sounds(events):
+    for ev in events:
+        name = EVENT_SOUNDS.get(ev)
+        if name:
+            assets.sound(name).play()
+
+# HUD Panel
+SURVIVAL_HUD = (10, 10, 200, 60)
+survival_panel = Panel(SURVIVAL_HUD, alpha=180)
+
+def draw_survival_hud(surface, state):
+    survival_panel.draw(surface)
+    draw_text_with_shadow(surface, f"Score: {state.score}", font, TEXT_COLOR, 20, 20)
+    draw_text_with_shadow(surface, f"Length: {len(state.snake)}", font, TEXT_COLOR, 20, 45)
+
+def survival_game(resumed=None):
+    if resumed is None:
+        seed = new_seed()
+        state = engine.new_survival(rng=random.Random(seed))
+        recorder = Recorder("survival", seed)
+    else:
+        state, replay = resumed
+        recorder = Recorder.resume(replay)
+    autopilot.new_game()
+    rewind.reset(state, recorder.replay.ticks)
+    renderer = make_renderer(draw_survival_hud, SURVIVAL_HUD)
+    timer = FixedStep(state.speed)
+    clock.tick()
+    perf.reset()
 
     while True:
-        speed = 10
-        if len(snake) >= 15: speed = 20
+        dt = clock.tick(FPS)
+        perf.frame()
+        if handle_input(state) == "SUSPEND":
+            saves.save(state, recorder.replay)
+            return "MENU"
+        perf.lap("events")
+        timer.rate = state.speed
+        for _ in range(timer.advance(dt)):
+            if autopilot.enabled:
+                engine.turn(state, autopilot.act(state))
+            recorder.tick(state)
+            events = engine.step(state)
+            play_sounds(events)
+
+            if state.result == engine.OVER:
+                choice = game_over_menu(state.score, "survival", len(rewind) > 0)
+                if choice == "REWIND":
+                    rewind_death(state, recorder, renderer)
+                    break
+                if not autopilot.played:
+                    save_score("survival", state.score)
+                recorder.finish(state.score).save()
+                dump_perf("survival")
+                return choice
+            rewind.record(state, recorder.replay.ticks)
+
+        perf.lap("logic")
+        present(renderer, state, timer.alpha)
 
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if e.type == pygame.KEYDOWN:
-                # Arrow keys + WASD support
-                if (e.key == pygame.K_UP or e.key == pygame.K_w) and direction != (0, BLOCK): 
-                    direction = (0, -BLOCK)
-                if (e.key == pygame.K_DOWN or e.key == pygame.K_s) and direction != (0, -BLOCK): 
-                    direction = (0, BLOCK)
-                if (e.key == pygame.K_LEFT or e.key == pygame.K_a) and direction != (BLOCK, 0): 
-                    direction = (-BLOCK, 0)
-                if (e.key == pygame.K_RIGHT or e.key == pygame.K_d) and direction != (-BLOCK, 0): 
-                    direction = (BLOCK, 0)
-
-        head = (snake[0][0] + direction[0], snake[0][1] + direction[1])
-
-        # Wall collision
-        if not (0 <= head[0] < WIDTH and 0 <= head[1] < HEIGHT):
-            over_snd.play()
-            save_score("survival", score)
-            return game_over_menu(score, "survival")
-        
-        # Self collision
-        if head in snake:
-            over_snd.play()
-            save_score("survival", score)
-            return game_over_menu(score, "survival")
-
-        snake.insert(0, head)
-
-        # APPLE
-        if head == food:
-            eat_snd.play()
-            score += 10
-            food = spawn()
-        else:
-            snake.pop()
-
-        # BOMB - Proper collision detection
-        if not bomb and random.randint(1, 150) == 1:
-            bomb = spawn()
-            while bomb in snake or bomb == food:
-                bomb = spawn()
-                
-        if bomb and head == bomb:
-            bomb_snd.play()
-            save_score("survival", score)
-            return game_over_menu(score, "survival")
-
-        # MAGNET
-        if len(snake) >= 15 and not magnet and random.randint(1, 200) == 1:
-            magnet = spawn()
-            while magnet in snake or magnet == food or magnet == bomb:
-                magnet = spawn()
-                
-        if magnet and head == magnet:
-            power_snd.play()
-            magnet_active = True
-            magnet_time = pygame.time.get_ticks()
-            magnet = None
-
-        # SCISSOR
-        if len(snake) >= 25 and not scissor and random.randint(1, 250) == 1:
-            scissor = spawn()
-            while scissor in snake or scissor == food or scissor == bomb:
-                scissor = spawn()
-                
-        if scissor and head == scissor:
-            power_snd.play()
-            snake = snake[:-10] if len(snake) > 10 else snake
-            scissor = None
-
-        # MAGNET EFFECT
-        if magnet_active:
-            hx, hy = head
-            fx, fy = food
-            pygame.draw.circle(screen, (0, 255, 255), (hx + 10, hy + 10), 120, 2)
-            if abs(hx - fx) < 120 and abs(hy - fy) < 120:
-                snake.insert(0, food)
-                eat_snd.play()
-                score += 10
-                food = spawn()
-            if pygame.time.get_ticks() - magnet_time > 5000:
-                magnet_active = False
-
-        # DRAW
-        screen.fill(BG_COLOR)
-        
-        # Draw snake with realistic segments including tail
-        for i, s in enumerate(snake):
-            prev_pos = snake[i-1] if i > 0 else None
-            next_pos = snake[i+1] if i < len(snake)-1 else None
-            is_head = (i == 0)
-            is_tail = (i == len(snake) - 1)
-            draw_snake_segment(screen, s, is_head=is_head, is_tail=is_tail, prev_pos=prev_pos, next_pos=next_pos)
-        
-        # Draw items with glow effect
-        screen.blit(apple_img, food)
-        if bomb: 
-            pygame.draw.circle(screen, (255, 50, 50), (bomb[0] + 10, bomb[1] + 10), 15, 2)
-            screen.blit(bomb_img, bomb)
-        if magnet: 
-            pygame.draw.circle(screen, (100, 200, 255), (magnet[0] + 10, magnet[1] + 10), 15, 2)
-            screen.blit(magnet_img, magnet)
-        if scissor: 
-            pygame.draw.circle(screen, (255, 200, 100), (scissor[0] + 10, scissor[1] + 10), 15, 2)
-            screen.blit(scissor_img, scissor)
-
-        # HUD Panel
-        hud_rect = (10, 10, 200, 60)
-        draw_panel(screen, hud_rect, alpha=180)
-        draw_text_with_shadow(screen, f"Score: {score}", font, TEXT_COLOR, 20, 20)
-        draw_text_with_shadow(screen, f"Length: {len(snake)}", font, TEXT_COLOR, 20, 45)
-        
-        pygame.display.update()
-        clock.tick(speed)
+# =====================================================
+# ================= WORLD MODE ========================
+# =====================================================
+def start_world_mode():
+    resumed = saves.take("world")
+    while True:
+        result = world_game(resumed)
+        resumed = None
+        if result == "MENU":
+            return
+
+# HUD Panel
+WORLD_HUD = (10, 10, 200, 90)
+world_panel = Panel(WORLD_HUD, alpha=180)
+
+def draw_world_hud(surface, state):
+    world_panel.draw(surface)
+    draw_text_with_shadow(surface, f"Score: {state.score}", font, TEXT_COLOR, 20, 20)
+    draw_text_with_shadow(surface, f"Length: {len(state.snake)}", font, TEXT_COLOR, 20, 45)
+    x, y = state.head
+    draw_text_with_shadow(surface, f"{x // BLOCK}, {y // BLOCK}", font, HIGHLIGHT_COLOR, 20, 70)
+
+def world_game(resumed=None):
+    if resumed is None:
+        seed = new_seed()
+        state = engine.new_world(rng=random.Random(seed))
+        recorder = Recorder("world", seed)
+    else:
+        state, replay = resumed
+        recorder = Recorder.resume(replay)
+    # no autopilot here: its grid and searches cover the whole board, far
+    # too much for one tick on a world this size
+    rewind.reset(state, recorder.replay.ticks)
+    renderer = make_world_renderer(draw_world_hud, WORLD_HUD)
+    timer = FixedStep(state.speed)
+    clock.tick()
+    perf.reset()
+
+    while True:
+        dt = clock.tick(FPS)
+        perf.frame()
+        if handle_input(state) == "SUSPEND":
+            saves.save(state, recorder.replay)
+            return "MENU"
+        perf.lap("events")
+        timer.rate = state.speed
+        for _ in range(timer.advance(dt)):
+            recorder.tick(state)
+            events = engine.step(state)
+            play_sounds(events)
+
+            if state.result == engine.OVER:
+                choice = game_over_menu(state.score, "world", len(rewind) > 0)
+                if choice == "REWIND":
+                    rewind_death(state, recorder, renderer)
+                    break
+                save_score("world", state.score)
+                recorder.finish(state.score).save()
+                dump_perf("world")
+                return choice
+            rewind.record(state, recorder.replay.ticks)
+
+        perf.lap("logic")
+        present(renderer, state, timer.alpha)
 
 # =====================================================
-# ================= LEVEL MODE ========================
+# ================= MULTIPLAYER MODE ==================
 # =====================================================
-def start_level_mode():
+# Survival against other players on a multiplayer.py server, which runs the
+# rules; this loop only sends key presses and draws the server's snapshots.
+# SNAKE_SERVER=<host>:<port> picks the server (default: this machine).
+SERVER_ADDRESS = os.environ.get("SNAKE_SERVER", f"127.0.0.1:{multiplayer.DEFAULT_PORT}")
+RIVAL_COLORS = [(255, 120, 80), (255, 210, 80), (200, 120, 255), (80, 180, 255),
+                (255, 100, 180), (160, 255, 80), (255, 255, 255), (120, 220, 220)]
+
+def start_multiplayer_mode():
+    host, _, port = SERVER_ADDRESS.rpartition(":")
+    try:
+        client = multiplayer.MultiplayerClient(host or "127.0.0.1", int(port or multiplayer.DEFAULT_PORT))
+    except OSError:
+        notice(f"No snake server at {SERVER_ADDRESS}")
+        return
+    try:
+        if multiplayer_game(client) == "DISCONNECTED":
+            notice("Lost the connection to the server")
+    finally:
+        client.close()
+
+def notice(text):
+    """Message box with a MENU button"""
+    panel = Panel((150, 200, 500, 200))
+    label = Label(text, font, TEXT_COLOR, (400, 260), shadow_offset=2, center=True)
+    menu_btn = Button((325, 320, 150, 50), "MENU", GAME_BUTTON, "MENU")
     while True:
-        level = 1
-        total_score = 0
-        
-        while level <= 4:
-            result, level_score = level_game(level, total_score)
-            
-            if result == "MENU":
+        screen.fill(BG_COLOR)
+        panel.draw(screen)
+        label.draw(screen)
+        menu_btn.update(pygame.mouse.get_pos())
+        menu_btn.draw(screen)
+        pygame.display.update()
+        clock.tick(60)
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if (e.type == pygame.MOUSEBUTTONDOWN and menu_btn.hovered) or e.type == pygame.KEYDOWN:
                 return
-            elif result == "RESTART":
-                break
-            elif result == "NEXT":
-                total_score += level_score
-                level += 1
-
-def level_game(level, total_score):
-    LEVELS = {
-        1: (5, 15, 0),
-        2: (6, 10, 12),
-        3: (6, 5, 15),
-        4: (6, 20, 15)
-    }
-
-    need, speed, obs_count = LEVELS[level]
-    snake = [(100, 100)]
-    direction = (BLOCK, 0)
-    food = spawn()
-    obstacles = [spawn() for _ in range(obs_count)]
-    apples = 0
+
+# HUD Panel
+MULTIPLAYER_HUD = (10, 10, 200, 60)
+multiplayer_panel = Panel(MULTIPLAYER_HUD, alpha=180)
+scoreboard_panel = Panel((590, 10, 200, 150), alpha=180)
+
+def draw_multiplayer_hud(surface, mirror, pid):
+    multiplayer_panel.draw(surface)
+    draw_text_with_shadow(surface, f"Score: {mirror.scores.get(pid, 0)}", font, TEXT_COLOR, 20, 20)
+    snake = mirror.bodies.get(pid)
+    status = f"Length: {len(snake)}" if snake else "Respawning..."
+    draw_text_with_shadow(surface, status, font, TEXT_COLOR, 20, 45)
+    scoreboard_panel.draw(surface)
+    best = sorted(mirror.scores.items(), key=lambda item: -item[1])[:5]
+    for row, (player, score) in enumerate(best):
+        color = HIGHLIGHT_COLOR if player == pid else TEXT_COLOR
+        draw_text_with_shadow(surface, f"P{player}  {score}", font, color, 600, 18 + row * 27)
+
+def draw_arena(surface, mirror, pid):
+    surface.fill(BG_COLOR)
+    surface.blits([(ITEM_ART[kind][0], cell) for cell, kind in mirror.items.items()], doreturn=False)
+    for player, snake in mirror.bodies.items():
+        if player == pid:
+            continue
+        color = RIVAL_COLORS[player % len(RIVAL_COLORS)]
+        for i, (x, y) in enumerate(snake):
+            shade = color if i else tuple(min(255, c + 60) for c in color)
+            pygame.draw.rect(surface, shade, (x + 1, y + 1, BLOCK - 2, BLOCK - 2), border_radius=5)
+    if pid in mirror.bodies:
+        draw_snake(surface, mirror.bodies[pid])
+
+def multiplayer_game(client):
+    mirror, pid = client.mirror, client.pid
+    score, alive = 0, False
 
     while True:
+        clock.tick(FPS)
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
             if e.type == pygame.KEYDOWN:
-                # Arrow keys + WASD support
-                if (e.key == pygame.K_UP or e.key == pygame.K_w) and direction != (0, BLOCK): 
-                    direction = (0, -BLOCK)
-                if (e.key == pygame.K_DOWN or e.key == pygame.K_s) and direction != (0, -BLOCK): 
-                    direction = (0, BLOCK)
-                if (e.key == pygame.K_LEFT or e.key == pygame.K_a) and direction != (BLOCK, 0): 
-                    direction = (-BLOCK, 0)
-                if (e.key == pygame.K_RIGHT or e.key == pygame.K_d) and direction != (-BLOCK, 0): 
-                    direction = (BLOCK, 0)
-
-        head = (snake[0][0] + direction[0], snake[0][1] + direction[1])
-        
-        # Wall collision
-        if not (0 <= head[0] < WIDTH and 0 <= head[1] < HEIGHT):
-            over_snd.play()
-            save_score("level", total_score + apples * 10)
-            return game_over_menu(total_score + apples * 10, "level"), apples * 10
-        
-        # Obstacle collision
-        if head in obstacles:
-            over_snd.play()
-            save_score("level", total_score + apples * 10)
-            return game_over_menu(total_score + apples * 10, "level"), apples * 10
-        
-        # Self collision
-        if head in snake:
-            over_snd.play()
-            save_score("level", total_score + apples * 10)
-            return game_over_menu(total_score + apples * 10, "level"), apples * 10
-
-        snake.insert(0, head)
-
-        if head == food:
-            eat_snd.play()
-            apples += 1
-            food = spawn()
-            while food in obstacles or food in snake:
-                food = spawn()
-        else:
-            snake.pop()
-
-        if apples >= need:
-            return "NEXT", apples * 10
-
-        # DRAW
-        screen.fill(BG_COLOR)
-        
-        # Draw snake with realistic segments including tail
-        for i, s in enumerate(snake):
-            prev_pos = snake[i-1] if i > 0 else None
-            next_pos = snake[i+1] if i < len(snake)-1 else None
-            is_head = (i == 0)
-            is_tail = (i == len(snake) - 1)
-            draw_snake_segment(screen, s, is_head=is_head, is_tail=is_tail, prev_pos=prev_pos, next_pos=next_pos)
-        
-        # Draw obstacles with warning glow
-        for o in obstacles:
-            pygame.draw.circle(screen, (255, 100, 100), (o[0] + 10, o[1] + 10), 18, 2)
-            screen.blit(obstacle_img, o)
-        
-        # Draw food
-        screen.blit(apple_img, food)
-
-        # HUD Panel
-        hud_rect = (10, 10, 280, 110)
-        draw_panel(screen, hud_rect, alpha=180)
-        draw_text_with_shadow(screen, f"Level {level}", font, HIGHLIGHT_COLOR, 20, 20)
-        draw_text_with_shadow(screen, f"Apples: {apples}/{need}", font, TEXT_COLOR, 20, 50)
-        draw_text_with_shadow(screen, f"Total Score: {total_score + apples * 10}", font, TEXT_COLOR, 20, 80)
-        
-        pygame.display.update()
-        clock.tick(speed)
+                if e.key == pygame.K_ESCAPE:
+                    return "MENU"
+                direction = KEY_DIRECTIONS.get(e.key)
+                if direction is not None:
+                    client.send(direction)
+
+        client.poll()
+        if not client.connected:
+            return "DISCONNECTED"
+        if mirror.synced:
+            # the server only sends state, so sounds come from what changed
+            now = mirror.scores.get(pid, 0)
+            if now > score:
+                assets.sound("eat.wav").play()
+            if alive and pid not in mirror.bodies:
+                assets.sound("gameover.wav").play()
+            score, alive = now, pid in mirror.bodies
+
+        draw_arena(screen, mirror, pid)
+        draw_multiplayer_hud(screen, mirror, pid)
+        pygame.display.flip()
+
+# =====================================================
+# ================= LEVEL MODE ========================
+# =====================================================
+# Levels come from a level pack (levels/<name>.txt, compiled and cached by
+# levelpack.py); SNAKE_LEVEL_PACK picks another pack or a path to one.
+LEVEL_PACK = os.environ.get("SNAKE_LEVEL_PACK", levelpack.DEFAULT_PACK)
+
+def open_level_pack():
+    """LEVEL_PACK, or None after telling the player it can't be loaded"""
+    try:
+        return levelpack.open_pack(LEVEL_PACK)
+    except (OSError, levelpack.LevelPackError) as e:
+        print(f"level pack: {e}", file=sys.stderr)
+        notice(f"Can't load level pack {os.path.basename(LEVEL_PACK)!r}")
+        return None
+
+def start_level_mode():
+    pack = open_level_pack()
+    if pack is None:
+        return
+    resumed = saves.take("level")
+    if resumed is not None and resumed[1].pack != pack.id:
+        resumed = None  # suspended in another pack, or the pack has changed since
+    renderer = make_renderer(draw_level_hud, LEVEL_HUD)
+    # Decode the next level and bake its background while this one is played
+    preload = levelpack.Preloader(pack, lambda lvl: renderer.bake_static(lvl.layout(BLOCK).obstacles))
+    try:
+        while True:
+            if resumed is None:
+                state = None
+                level = 1
+                total_score = 0
+                # One seeded RNG and replay for the whole run across levels
+                seed = new_seed()
+                rng = random.Random(seed)
+                recorder = Recorder("level", seed, level, pack.id)
+            else:
+                state, replay = resumed
+                level, total_score, rng = state.level, state.total_score, state.rng
+                recorder = Recorder.resume(replay)
+                resumed = None
+            autopilot.new_game()
+
+            while level <= len(pack):
+                result, level_score = level_game(level, total_score, rng, recorder,
+                                                 pack, preload, renderer, state)
+                state = None
+
+                if result == "MENU":
+                    return
+                elif result == "RESTART":
+                    break
+                elif result == "NEXT":
+                    total_score += level_score
+                    level += 1
+    finally:
+        preload.close()
+
+# HUD Panel
+LEVEL_HUD = (10, 10, 280, 110)
+level_panel = Panel(LEVEL_HUD, alpha=180)
+
+def draw_level_hud(surface, state):
+    level_panel.draw(surface)
+    draw_text_with_shadow(surface, f"Level {state.level}", font, HIGHLIGHT_COLOR, 20, 20)
+    draw_text_with_shadow(surface, f"Apples: {state.apples}/{state.need}", font, TEXT_COLOR, 20, 50)
+    draw_text_with_shadow(surface, f"Total Score: {state.score}", font, TEXT_COLOR, 20, 80)
+
+def level_game(level, total_score, rng=None, recorder=None, pack=None, preload=None, renderer=None,
+               state=None):
+    if pack is None:
+        pack = open_level_pack()
+        if pack is None:
+            return "MENU", 0
+    if recorder is None:
+        seed = new_seed()
+        rng = random.Random(seed)
+        recorder = Recorder("level", seed, level, pack.id)
+        autopilot.new_game()
+    if preload is not None:
+        lvl, static = preload.get(level)
+        preload.prefetch(level + 1)
+    else:
+        lvl, static = pack.level(level), None
+    layout = lvl.layout(BLOCK)
+    if state is None:
+        state = engine.new_level(level, total_score, rng=rng, layout=layout)
+    rewind.reset(state, recorder.replay.ticks)
+    if renderer is None:
+        renderer = make_renderer(draw_level_hud, LEVEL_HUD)
+    renderer.invalidate()
+    if static is not None:
+        renderer.adopt_static(static, layout.obstacles, state)
+    timer = FixedStep(state.speed)
+    clock.tick()
+    perf.reset()
+
+    while True:
+        dt = clock.tick(FPS)
+        perf.frame()
+        if handle_input(state) == "SUSPEND":
+            saves.save(state, recorder.replay)
+            return "MENU", 0
+        perf.lap("events")
+        timer.rate = state.speed
+        for _ in range(timer.advance(dt)):
+            if autopilot.enabled:
+                engine.turn(state, autopilot.act(state))
+            recorder.tick(state)
+            events = engine.step(state)
+            play_sounds(events)
+
+            if state.result == engine.OVER:
+                choice = game_over_menu(state.score, "level", len(rewind) > 0)
+                if choice == "REWIND":
+                    rewind_death(state, recorder, renderer)
+                    break
+                if not autopilot.played:
+                    save_score("level", state.score)
+                recorder.finish(state.score).save()
+                dump_perf("level")
+                return choice, state.level_score
+            if state.result == engine.NEXT:
+                return "NEXT", state.level_score
+            rewind.record(state, recorder.replay.ticks)
+
+        perf.lap("logic")
+        present(renderer, state, timer.alpha)
 
 # =====================================================
 # ================= MAIN GAME LOOP ====================
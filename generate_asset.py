@@ -1,35 +1,53 @@
-import pygame
+"""Build the game's images and sounds into ``assets/``.
+
+Every asset has a content hash of what produces it: the drawing function's
+source for images, the synthesis spec (``synth.py``) for sounds. The hashes
+of the last build are kept in ``assets/manifest.json`` and an asset is only
+rebuilt when its hash changed or its file is missing. Stale assets build in
+parallel worker processes; sounds are synthesized a buffer at a time and
+written with a single ``writeframes`` call. Last, everything is packed into
+``assets/assets.pack`` (see ``assetpack.py``), which the game loads.
+
+    python generate_asset.py            # rebuild what changed
+    python generate_asset.py --force    # rebuild everything
+"""
+import argparse
+import hashlib
+import inspect
+import json
 import os
+import sys
+import time
 import wave
-import struct
-import math
+from concurrent.futures import ProcessPoolExecutor
+
+import pygame
 
-pygame.init()
+import assetpack
+import synth
+from scorestore import atomic_write
 
 # ---------------- SETUP ----------------
 BLOCK = 32
-SAMPLE_RATE = 44100
-
-os.makedirs("assets/images", exist_ok=True)
-os.makedirs("assets/sounds", exist_ok=True)
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+MANIFEST = os.path.join(ASSET_DIR, "manifest.json")
 
 # ---------------- SOUND MAKER ----------------
-def make_sound(filename, freq=440, duration=0.25):
-    wav = wave.open(f"assets/sounds/{filename}", "w")
-    wav.setparams((1, 2, SAMPLE_RATE, 0, "NONE", "not compressed"))
-
-    for i in range(int(SAMPLE_RATE * duration)):
-        value = int(32767 * math.sin(2 * math.pi * freq * i / SAMPLE_RATE))
-        wav.writeframesraw(struct.pack("<h", value))
-
-    wav.close()
+def make_sound(filename):
+    spec = synth.spec_for(filename)
+    data = synth.samples(spec)
+    if sys.byteorder == "big":  # WAV samples are little-endian
+        data.byteswap()
+    with wave.open(os.path.join(ASSET_DIR, "sounds", filename), "wb") as wav:
+        wav.setparams((1, 2, synth.SAMPLE_RATE, 0, "NONE", "not compressed"))
+        wav.writeframes(data.tobytes())
 
 # ---------------- APPLE ----------------
 def make_apple():
     s = pygame.Surface((BLOCK, BLOCK), pygame.SRCALPHA)
     pygame.draw.circle(s, (220, 0, 0), (16, 16), 12)
     pygame.draw.rect(s, (0, 180, 0), (15, 2, 2, 6))
-    pygame.image.save(s, "assets/images/apple.png")
+    return s
 
 # ---------------- BOMB ----------------
 def make_bomb():
@@ -37,7 +55,7 @@ def make_bomb():
     pygame.draw.circle(s, (40, 40, 40), (16, 18), 12)
     pygame.draw.line(s, (255, 200, 0), (16, 4), (22, 10), 3)
     pygame.draw.circle(s, (255, 0, 0), (24, 8), 3)
-    pygame.image.save(s, "assets/images/bomb.png")
+    return s
 
 # ---------------- MAGNET ----------------
 def make_magnet():
@@ -46,7 +64,7 @@ def make_magnet():
     pygame.draw.rect(s, (200, 0, 0), (20, 6, 6, 18))
     pygame.draw.rect(s, (180, 180, 180), (6, 22, 6, 4))
     pygame.draw.rect(s, (180, 180, 180), (20, 22, 6, 4))
-    pygame.image.save(s, "assets/images/magnet.png")
+    return s
 
 # ---------------- SCISSOR ----------------
 def make_scissor():
@@ -55,25 +73,95 @@ def make_scissor():
     pygame.draw.circle(s, (200, 200, 200), (22, 22), 5, 2)
     pygame.draw.line(s, (200, 200, 200), (10, 18), (22, 6), 2)
     pygame.draw.line(s, (200, 200, 200), (22, 18), (10, 6), 2)
-    pygame.image.save(s, "assets/images/scissor.png")
+    return s
 
 # ---------------- OBSTACLE ----------------
 def make_obstacle():
     s = pygame.Surface((BLOCK, BLOCK))
     s.fill((120, 120, 120))
     pygame.draw.rect(s, (80, 80, 80), (0, 0, BLOCK, BLOCK), 2)
-    pygame.image.save(s, "assets/images/obstacle.png")
+    return s
+
+
+IMAGES = {
+    "apple.png": make_apple,
+    "bomb.png": make_bomb,
+    "magnet.png": make_magnet,
+    "scissor.png": make_scissor,
+    "obstacle.png": make_obstacle,
+}
+
+# ---------------- BUILD ----------------
+def targets():
+    """{relative path: content hash} of every asset"""
+    hashes = {}
+    for name, make in IMAGES.items():
+        source = f"{BLOCK}\n{inspect.getsource(make)}"
+        hashes[f"images/{name}"] = hashlib.sha256(source.encode()).hexdigest()[:16]
+    for name in synth.SOUNDS:
+        source = json.dumps([synth.VERSION, synth.SAMPLE_RATE, synth.spec_for(name)], sort_keys=True)
+        hashes[f"sounds/{name}"] = hashlib.sha256(source.encode()).hexdigest()[:16]
+    # the pack changes whenever anything in it does
+    source = json.dumps([assetpack.VERSION, hashes], sort_keys=True)
+    hashes["assets.pack"] = hashlib.sha256(source.encode()).hexdigest()[:16]
+    return hashes
+
+
+def build(path):
+    """Write one asset; returns its path"""
+    if path == "assets.pack":
+        assetpack.build(ASSET_DIR, os.path.join(ASSET_DIR, path))
+        return path
+    kind, name = path.split("/")
+    if kind == "images":
+        pygame.image.save(IMAGES[name](), os.path.join(ASSET_DIR, path))
+    else:
+        make_sound(name)
+    return path
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_all(force=False, jobs=None):
+    """Rebuild missing or changed assets; returns the paths built"""
+    os.makedirs(os.path.join(ASSET_DIR, "images"), exist_ok=True)
+    os.makedirs(os.path.join(ASSET_DIR, "sounds"), exist_ok=True)
+    hashes = targets()
+    built = load_manifest()
+    stale = [path for path, digest in hashes.items()
+             if force or built.get(path) != digest
+             or not os.path.exists(os.path.join(ASSET_DIR, path))]
+    pack = "assets.pack" in stale
+    if pack:
+        stale.remove("assets.pack")  # packed once everything else is built
+    if len(stale) > 1 and jobs != 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            done = list(pool.map(build, stale))
+    else:
+        done = [build(path) for path in stale]
+    if pack:
+        done.append(build("assets.pack"))
+    if done or built != hashes:
+        atomic_write(MANIFEST, json.dumps(hashes, indent=2, sort_keys=True).encode())
+    return done
 
-# ---------------- CREATE ALL ----------------
-make_apple()
-make_bomb()
-make_magnet()
-make_scissor()
-make_obstacle()
 
-make_sound("eat.wav", 600)
-make_sound("bomb.wav", 120)
-make_sound("power.wav", 900)
-make_sound("gameover.wav", 200)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the game's images and sounds")
+    parser.add_argument("--force", action="store_true", help="rebuild every asset")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: all cores)")
+    args = parser.parse_args()
 
-print("🔥 REAL ICON ASSETS GENERATED SUCCESSFULLY 🔥")
+    start = time.perf_counter()
+    done = build_all(args.force, args.jobs)
+    elapsed = time.perf_counter() - start
+    if done:
+        print(f"built {len(done)} assets in {elapsed:.2f}s: {', '.join(done)}")
+    else:
+        print(f"assets up to date ({elapsed:.2f}s)")
@@ -1,7 +1,11 @@
 import pygame
-import json
-import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from leaderboard import client_from_env
+from scorestore import ScoreStore
+from textcache import get_font
+from widgets import Backdrop, Button, ButtonStyle, Label, Panel, ScoreTable
 
 pygame.init()
 
@@ -11,10 +15,10 @@ pygame.display.set_caption("High Scores")
 clock = pygame.time.Clock()
 
 # ---------------- FONTS ----------------
-title_font = pygame.font.SysFont("arial", 48, bold=True)
-subtitle_font = pygame.font.SysFont("arial", 32, bold=True)
-score_font = pygame.font.SysFont("arial", 26)
-button_font = pygame.font.SysFont("arial", 28, bold=True)
+title_font = get_font("arial", 48, bold=True)
+subtitle_font = get_font("arial", 32, bold=True)
+score_font = get_font("arial", 26)
+button_font = get_font("arial", 28, bold=True)
 
 # ---------------- COLORS ----------------
 BG_COLOR = (15, 15, 35)
@@ -28,56 +32,12 @@ GOLD = (255, 215, 0)
 SILVER = (192, 192, 192)
 BRONZE = (205, 127, 50)
 
-FILE = "scores.json"
+# ---------------- WIDGETS ----------------
+SCORES_BUTTON = ButtonStyle(button_font, BUTTON_COLOR, BUTTON_HOVER, (100, 100, 150), HIGHLIGHT_COLOR,
+                            hover_text=HIGHLIGHT_COLOR, hover_border_width=4, radius=10,
+                            shadow_offset=3, glow=True)
 
 # ---------------- HELPER FUNCTIONS ----------------
-def draw_text_with_shadow(surface, text, font, color, x, y, shadow_offset=2):
-    """Draw text with shadow effect"""
-    shadow = font.render(text, True, (0, 0, 0))
-    surface.blit(shadow, (x + shadow_offset, y + shadow_offset))
-    text_surf = font.render(text, True, color)
-    surface.blit(text_surf, (x, y))
-
-def draw_panel(surface, rect, alpha=200):
-    """Draw a semi-transparent panel"""
-    panel = pygame.Surface((rect[2], rect[3]))
-    panel.set_alpha(alpha)
-    panel.fill(PANEL_COLOR)
-    surface.blit(panel, (rect[0], rect[1]))
-    pygame.draw.rect(surface, HIGHLIGHT_COLOR, rect, 2, border_radius=10)
-
-def draw_button(surface, text, rect, hover=False):
-    """Draw a modern button with hover effect"""
-    color = BUTTON_HOVER if hover else BUTTON_COLOR
-    border_color = HIGHLIGHT_COLOR if hover else (100, 100, 150)
-    
-    # Button shadow
-    shadow_rect = pygame.Rect(rect[0] + 3, rect[1] + 3, rect[2], rect[3])
-    shadow_surface = pygame.Surface((rect[2], rect[3]))
-    shadow_surface.set_alpha(100)
-    shadow_surface.fill((0, 0, 0))
-    surface.blit(shadow_surface, (shadow_rect[0], shadow_rect[1]))
-    
-    # Button background
-    btn_surface = pygame.Surface((rect[2], rect[3]))
-    btn_surface.set_alpha(240)
-    btn_surface.fill(color)
-    surface.blit(btn_surface, (rect[0], rect[1]))
-    
-    # Button border with glow effect
-    if hover:
-        pygame.draw.rect(surface, border_color, rect, 4, border_radius=10)
-        glow_rect = pygame.Rect(rect[0] - 2, rect[1] - 2, rect[2] + 4, rect[3] + 4)
-        pygame.draw.rect(surface, (*HIGHLIGHT_COLOR[:3], 100), glow_rect, 2, border_radius=12)
-    else:
-        pygame.draw.rect(surface, border_color, rect, 3, border_radius=10)
-    
-    # Button text
-    text_color = HIGHLIGHT_COLOR if hover else TEXT_COLOR
-    text_surf = button_font.render(text, True, text_color)
-    text_rect = text_surf.get_rect(center=(rect[0] + rect[2]//2, rect[1] + rect[3]//2))
-    surface.blit(text_surf, text_rect)
-
 def get_rank_color(rank):
     """Get color based on rank"""
     if rank == 0:
@@ -90,110 +50,81 @@ def get_rank_color(rank):
         return (150, 150, 200)
 
 # ---------------- SCORE MANAGEMENT ----------------
+store = ScoreStore()
+# Shared leaderboard when SNAKE_LEADERBOARD=host:port is set; scores are
+# always kept locally too
+leaderboard = client_from_env()
+# Journal writes (lock, append, fsync) run on a background thread so the
+# game never waits on the disk; reading the local scores waits for them
+writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scores")
+pending = None  # Future of the latest write
+
+def flush():
+    """Wait until every saved score is in the journal"""
+    if pending is not None:
+        pending.exception()  # a failed write just loses that score
+
 def load_scores():
-    if not os.path.exists(FILE):
-        return {"level": [], "survival": []}
-    with open(FILE, "r") as f:
-        return json.load(f)
+    if leaderboard is not None:
+        tables = leaderboard.scores()
+        if tables is not None:
+            return tables
+    flush()
+    return store.scores()
 
 def save_score(mode, score):
-    data = load_scores()
-    data[mode].append(score)
-    data[mode] = sorted(data[mode], reverse=True)[:5]
-
-    with open(FILE, "w") as f:
-        json.dump(data, f)
+    global pending
+    pending = writer.submit(store.add, mode, score)
+    if leaderboard is not None:
+        leaderboard.submit(mode, score)
 
 # ---------------- HIGH SCORES SCREEN ----------------
 def show_highscores():
     scores = load_scores()
     
     # Button setup
-    level_btn = pygame.Rect(80, 520, 200, 50)
-    survival_btn = pygame.Rect(300, 520, 200, 50)
-    menu_btn = pygame.Rect(520, 520, 200, 50)
+    level_btn = Button((40, 520, 165, 50), "LEVEL", SCORES_BUTTON, "level")
+    survival_btn = Button((220, 520, 175, 50), "SURVIVAL", SCORES_BUTTON, "survival")
+    world_btn = Button((410, 520, 165, 50), "WORLD", SCORES_BUTTON, "world")
+    menu_btn = Button((595, 520, 165, 50), "MENU", SCORES_BUTTON)
+    mode_buttons = (level_btn, survival_btn, world_btn)
+    
+    # Background with gradient effect and decorative panels
+    backdrop = Backdrop((WIDTH, HEIGHT), BG_COLOR, PANEL_COLOR, alphas=(20, 15, 10))
+    title = Label("HIGH SCORES", title_font, ACCENT_GREEN, (240, 30), shadow_offset=2)
+    mode_label = Label("", subtitle_font, HIGHLIGHT_COLOR, (270, 90), shadow_offset=2)
+    panel = Panel((100, 140, 600, 350), alpha=220)
+    table = ScoreTable((100, 140, 600, 350), score_font, get_rank_color)
     
     current_mode = "level"  # Start with level mode
     
+    frame = 0
     running = True
     while running:
-        mouse_pos = pygame.mouse.get_pos()
+        # Pick up scores from other games (or the leaderboard) once a second
+        frame += 1
+        if frame % 60 == 0:
+            scores = load_scores()
         
-        # Background with gradient effect
-        screen.fill(BG_COLOR)
-        
-        # Background decorative panels
-        for i in range(3):
-            alpha = 20 - i * 5
-            rect_surface = pygame.Surface((WIDTH - i * 100, HEIGHT - i * 100))
-            rect_surface.set_alpha(alpha)
-            rect_surface.fill(PANEL_COLOR)
-            screen.blit(rect_surface, (i * 50, i * 50))
-        
-        # Title
-        draw_text_with_shadow(screen, "HIGH SCORES", title_font, ACCENT_GREEN, 240, 30)
+        mouse_pos = pygame.mouse.get_pos()
+        backdrop.draw(screen)
+        title.draw(screen)
         
         # Mode indicator
-        mode_text = "LEVEL MODE" if current_mode == "level" else "SURVIVAL MODE"
-        mode_color = HIGHLIGHT_COLOR
-        draw_text_with_shadow(screen, mode_text, subtitle_font, mode_color, 270, 90)
+        mode_label.set_text(f"{current_mode.upper()} MODE")
+        mode_label.draw(screen)
         
         # Scores panel
-        panel_rect = (100, 140, 600, 350)
-        draw_panel(screen, panel_rect, alpha=220)
-        
-        # Display scores
-        y_offset = 160
-        current_scores = scores[current_mode]
-        
-        if not current_scores:
-            no_score_text = score_font.render("No scores yet!", True, (150, 150, 150))
-            screen.blit(no_score_text, no_score_text.get_rect(center=(WIDTH // 2, 300)))
-        else:
-            for i, score in enumerate(current_scores):
-                rank_color = get_rank_color(i)
-                
-                # Rank number with medal icon
-                if i < 3:
-                    medal = ["🥇", "🥈", "🥉"][i]
-                    rank_text = f"{medal} #{i+1}"
-                else:
-                    rank_text = f"#{i+1}"
-                
-                # Draw rank
-                rank_surf = score_font.render(rank_text, True, rank_color)
-                screen.blit(rank_surf, (150, y_offset))
-                
-                # Draw score with highlight
-                score_text = f"{score:,}"
-                score_surf = score_font.render(score_text, True, TEXT_COLOR)
-                screen.blit(score_surf, (450, y_offset))
-                
-                # Separator line
-                if i < len(current_scores) - 1:
-                    pygame.draw.line(screen, (60, 60, 80), 
-                                   (130, y_offset + 35), 
-                                   (670, y_offset + 35), 2)
-                
-                y_offset += 60
-        
-        # Draw mode selection buttons
-        level_hover = level_btn.collidepoint(mouse_pos)
-        survival_hover = survival_btn.collidepoint(mouse_pos)
-        menu_hover = menu_btn.collidepoint(mouse_pos)
-        
-        # Highlight current mode
-        if current_mode == "level":
-            draw_button(screen, "LEVEL", level_btn, True)
-        else:
-            draw_button(screen, "LEVEL", level_btn, level_hover)
-            
-        if current_mode == "survival":
-            draw_button(screen, "SURVIVAL", survival_btn, True)
-        else:
-            draw_button(screen, "SURVIVAL", survival_btn, survival_hover)
+        panel.draw(screen)
+        table.set_scores(scores.get(current_mode, []))
+        table.draw(screen)
         
-        draw_button(screen, "MENU", menu_btn, menu_hover)
+        # Draw mode selection buttons, highlighting the current mode
+        for btn in mode_buttons:
+            btn.update(mouse_pos, selected=(btn.action == current_mode))
+            btn.draw(screen)
+        menu_btn.update(mouse_pos)
+        menu_btn.draw(screen)
         
         pygame.display.update()
         clock.tick(60)
@@ -205,11 +136,10 @@ def show_highscores():
                 sys.exit()
             
             if event.type == pygame.MOUSEBUTTONDOWN:
-                if level_btn.collidepoint(mouse_pos):
-                    current_mode = "level"
-                elif survival_btn.collidepoint(mouse_pos):
-                    current_mode = "survival"
-                elif menu_btn.collidepoint(mouse_pos):
+                for btn in mode_buttons:
+                    if btn.rect.collidepoint(mouse_pos):
+                        current_mode = btn.action
+                if menu_btn.rect.collidepoint(mouse_pos):
                     running = False
                     return
 
@@ -0,0 +1,155 @@
+"""Spatial hash of the items lying on the board.
+
+Items (food, bombs, magnets, scissors) are kept in a uniform grid of square
+buckets ``bucket`` pixels wide (cells are ``block`` pixels), next to a flat cell -> kind map and a
+per-kind, insertion-ordered index. Spawning and consuming an item touch one
+entry in each, so they are O(1), and so is asking what lies under the head.
+A radius query only visits the buckets overlapping the circle's bounding
+box, so its cost depends on how crowded that neighbourhood is, not on how
+many items the whole board holds. ``nearest`` is bounded even in a crowd:
+when those buckets hold more items than the circle has cells, it walks the
+circle's cells outwards instead and stops at the first hit.
+
+Cells are (x, y) pixel tuples like everywhere else; distances between cell
+corners equal distances between cell centres, so radius queries measure
+centre to centre, the way the magnet ring is drawn.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=8)
+def _disc(radius, block):
+    """(dx, dy) of the cells strictly within ``radius``, nearest first"""
+    r = (radius - 1) // block * block
+    offsets = [(dx * dx + dy * dy, dx, dy) for dy in range(-r, r + 1, block)
+               for dx in range(-r, r + 1, block) if dx * dx + dy * dy < radius * radius]
+    offsets.sort()
+    return tuple((dx, dy) for _, dx, dy in offsets)
+
+
+class ItemGrid:
+    """Items by cell, by kind and by bucket"""
+
+    __slots__ = ("bucket", "block", "cells", "kinds", "buckets", "version")
+
+    def __init__(self, bucket, block):
+        self.bucket = bucket
+        self.block = block
+        self.cells = {}  # cell -> kind
+        self.kinds = {}  # kind -> {cell: None}, oldest first
+        self.buckets = {}  # (bx, by) -> {cell: kind}
+        self.version = 0  # bumped on every change, so viewers can skip unchanged ticks
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.cells
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def get(self, cell):
+        """Kind of the item on ``cell``, or None"""
+        return self.cells.get(cell)
+
+    def count(self, kind):
+        return len(self.kinds.get(kind, ()))
+
+    def first(self, kind):
+        """Oldest item of ``kind`` still on the board, or None"""
+        cells = self.kinds.get(kind)
+        return next(iter(cells)) if cells else None
+
+    def of_kind(self, kind):
+        return iter(self.kinds.get(kind, ()))
+
+    def add(self, cell, kind):
+        if cell in self.cells:
+            self.remove(cell)
+        self.cells[cell] = kind
+        self.kinds.setdefault(kind, {})[cell] = None
+        key = (cell[0] // self.bucket, cell[1] // self.bucket)
+        self.buckets.setdefault(key, {})[cell] = kind
+        self.version += 1
+
+    def remove(self, cell):
+        """Take the item off ``cell``; returns its kind, or None if there was none"""
+        kind = self.cells.pop(cell, None)
+        if kind is None:
+            return None
+        del self.kinds[kind][cell]
+        key = (cell[0] // self.bucket, cell[1] // self.bucket)
+        bucket = self.buckets[key]
+        del bucket[cell]
+        if not bucket:
+            del self.buckets[key]
+        self.version += 1
+        return kind
+
+    def clear(self, kind=None):
+        for cell in list(self.cells if kind is None else self.of_kind(kind)):
+            self.remove(cell)
+
+    def _buckets_near(self, center, radius):
+        """Non-empty buckets overlapping the circle's bounding box"""
+        cx, cy = center
+        b = self.bucket
+        get = self.buckets.get
+        xs = range((cx - radius + 1) // b, (cx + radius - 1) // b + 1)
+        return [bucket for by in range((cy - radius + 1) // b, (cy + radius - 1) // b + 1)
+                for bx in xs if (bucket := get((bx, by)))]
+
+    def within(self, left, top, right, bottom):
+        """(cell, kind) of the items whose cell corner lies in the box
+        [left, right) x [top, bottom), from the buckets it overlaps"""
+        b = self.bucket
+        get = self.buckets.get
+        found = []
+        for by in range(top // b, (bottom - 1) // b + 1):
+            for bx in range(left // b, (right - 1) // b + 1):
+                bucket = get((bx, by))
+                if bucket:
+                    found.extend((cell, kind) for cell, kind in bucket.items()
+                                 if left <= cell[0] < right and top <= cell[1] < bottom)
+        return found
+
+    def near(self, center, radius, kind=None):
+        """Items strictly within ``radius`` pixels of ``center``, nearest first,
+        as (cell, kind) pairs; ties are broken by cell so the order is stable"""
+        cx, cy = center
+        r2 = radius * radius
+        found = []
+        for bucket in self._buckets_near(center, radius):
+            for cell, what in bucket.items():
+                if kind is not None and what != kind:
+                    continue
+                d2 = (cell[0] - cx) ** 2 + (cell[1] - cy) ** 2
+                if d2 < r2:
+                    found.append((d2, cell, what))
+        found.sort()
+        return [(cell, what) for _, cell, what in found]
+
+    def nearest(self, center, radius, kind=None):
+        """Closest item cell within ``radius`` of ``center``, or None (same
+        tie-break as ``near``)"""
+        buckets = self._buckets_near(center, radius)
+        if not buckets:
+            return None
+        cx, cy = center
+        disc = _disc(radius, self.block)
+        if sum(map(len, buckets)) <= len(disc):
+            best, best_d2 = None, radius * radius
+            for bucket in buckets:
+                for cell, what in bucket.items():
+                    if kind is None or what == kind:
+                        d2 = (cell[0] - cx) ** 2 + (cell[1] - cy) ** 2
+                        if d2 < best_d2 or (d2 == best_d2 and best is not None and cell < best):
+                            best, best_d2 = cell, d2
+            return best
+        cells = self.cells
+        for dx, dy in disc:
+            what = cells.get((cx + dx, cy + dy))
+            if what is not None and (kind is None or what == kind):
+                return (cx + dx, cy + dy)
+        return None
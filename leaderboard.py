@@ -0,0 +1,378 @@
+"""Shared leaderboard: a small asyncio server and a non-blocking client.
+
+The server keeps every submitted score per mode in a ``ScoreIndex``: a
+Fenwick tree of counts per bucket of BUCKET consecutive scores, each bucket
+a sorted list of its scores. Inserting a score, ranking one and reading the
+top-K take O(log n) plus a bisect in one bucket, and memory follows the
+number of scores, not the size of the best one. It speaks newline-delimited JSON over TCP::
+
+    {"op": "submit", "scores": [[mode, score], ...]}  -> {"ranks": [...]}
+    {"op": "rank", "mode": m, "score": s}              -> {"rank": r, "total": n}
+    {"op": "top", "k": k}                              -> {"scores": {mode: [...]}}
+
+A request the server refuses gets ``{"error": msg}``; one it could not carry
+out for its own reasons (the journal's disk failing) also has ``"retry": true``.
+
+Submissions are acknowledged once they are in the server's score journal
+(a ``ScoreStore``); concurrent submissions share one locked write and fsync.
+
+``LeaderboardClient`` runs its own event loop on a daemon thread, so the
+game never waits on the network: ``submit()`` queues a score and returns,
+a background task batches queued scores into one request over a small pool
+of persistent connections, and scores stay queued (retried with backoff)
+while the server is unreachable or can't journal them. A batch the server
+rejects is dropped and reported on stderr rather than retried. ``scores()`` returns the last tables
+fetched and refreshes them in the background.
+
+    python leaderboard.py --port 8765
+    SNAKE_LEADERBOARD=127.0.0.1:8765 python main.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_right, insort
+from collections import deque
+
+from scorestore import DATA_DIR, MODES, TOP_K, ScoreStore
+
+DEFAULT_PORT = 8765
+MAX_SCORE = 10_000_000  # bounds the bucket table
+BUCKET = 256  # consecutive scores per Fenwick tree slot
+
+# ---------------- SCORE INDEX ----------------
+class ScoreIndex:
+    """Multiset of non-negative int scores: a Fenwick tree of counts per
+    score bucket over sorted per-bucket lists"""
+
+    def __init__(self, size=16):
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        self.buckets = {}  # score // BUCKET -> sorted scores
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+
+    def __len__(self):
+        return self.total
+
+    def _grow(self, bucket):
+        while self.size <= bucket:
+            self.size *= 2
+        tree = [0] * (self.size + 1)
+        for b, scores in self.buckets.items():
+            tree[b + 1] = len(scores)
+        for i in range(1, self.size + 1):  # O(n) rebuild
+            j = i + (i & -i)
+            if j <= self.size:
+                tree[j] += tree[i]
+        self.tree = tree
+
+    def add(self, score):
+        bucket = score // BUCKET
+        if bucket >= self.size:
+            self._grow(bucket)
+        scores = self.buckets.get(bucket)
+        if scores is None:
+            self.buckets[bucket] = [score]
+        else:
+            insort(scores, score)
+        self.total += 1
+        i = bucket + 1
+        while i <= self.size:
+            self.tree[i] += 1
+            i += i & -i
+
+    def count_upto(self, score):
+        """How many scores are <= ``score``"""
+        bucket = score // BUCKET
+        if bucket >= self.size:
+            return self.total
+        n = bisect_right(self.buckets.get(bucket, ()), score)
+        i = bucket  # buckets below this one
+        while i > 0:
+            n += self.tree[i]
+            i -= i & -i
+        return n
+
+    def rank(self, score):
+        """1-based leaderboard position of ``score``; ties share the best rank"""
+        return self.total - self.count_upto(score) + 1
+
+    def kth(self, k):
+        """The k-th smallest score (1-based)"""
+        pos = 0
+        step = self.size
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step //= 2
+        return self.buckets[pos][k - 1]  # tree index pos + 1 holds bucket pos
+
+    def top(self, k):
+        """Best ``k`` scores, best first"""
+        return [self.kth(self.total - i) for i in range(min(k, self.total))]
+
+# ---------------- SERVER ----------------
+class LeaderboardServer:
+    """Answers leaderboard requests; scores persist in a ScoreStore journal"""
+
+    def __init__(self, store=None):
+        self.store = store
+        self.boards = {mode: ScoreIndex() for mode in MODES}
+        self.pending = []  # (scores, future) waiting for the journal
+        self.flusher = None
+        if store is not None:
+            for record in store.history():
+                if self._valid(record.get("mode"), record.get("score")):
+                    self.boards[record["mode"]].add(record["score"])
+
+    @staticmethod
+    def _valid(mode, score):
+        return mode in MODES and isinstance(score, int) and 0 <= score <= MAX_SCORE
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = await self.dispatch(json.loads(line))
+                except OSError as e:  # the journal failed, not the request
+                    reply = {"error": str(e), "retry": True}
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"error": str(e)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):  # dropped, or a line over the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, msg):
+        op = msg["op"]
+        if op == "submit":
+            scores = [(mode, score) for mode, score in msg["scores"]]
+            if not all(self._valid(mode, score) for mode, score in scores):
+                raise ValueError("bad score")
+            if self.store is not None:
+                await self._commit(scores)
+            ranks = []
+            for mode, score in scores:
+                board = self.boards[mode]
+                board.add(score)
+                ranks.append(board.rank(score))
+            return {"ranks": ranks}
+        if op == "rank":
+            board = self.boards[msg["mode"]]
+            return {"rank": board.rank(msg["score"]), "total": len(board)}
+        if op == "top":
+            k = min(int(msg.get("k", TOP_K)), 1000)
+            return {"scores": {mode: board.top(k) for mode, board in self.boards.items()}}
+        raise ValueError(f"unknown op {op!r}")
+
+    async def _commit(self, scores):
+        """Wait until ``scores`` are journaled; concurrent calls share a write"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((scores, future))
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.ensure_future(self._flush())
+        await future
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        while self.pending:
+            batch, self.pending = self.pending, []
+            records = [pair for scores, _ in batch for pair in scores]
+            try:
+                await loop.run_in_executor(None, self.store.add_many, records)
+            except OSError as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(None)
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+# ---------------- CLIENT ----------------
+class LeaderboardClient:
+    """Non-blocking leaderboard access for the game; all methods return at once"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, pool_size=2, batch_size=64,
+                 batch_delay=0.05, timeout=2.0, retry=(0.5, 10.0), refresh_every=2.0,
+                 max_queued=10_000):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay  # seconds to gather a batch
+        self.timeout = timeout
+        self.retry = retry  # (first, max) backoff in seconds while offline
+        self.refresh_every = refresh_every
+        self.queue = deque(maxlen=max_queued)  # scores not yet sent; the oldest go first when full
+        self.sending = []  # the batch in flight, until the server acknowledges it
+        self.tables = None  # last {mode: top scores} from the server
+        self.online = False
+        self.refreshed = 0.0
+        self.refreshing = False
+
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.wake = asyncio.Event()
+        self.pool = asyncio.Queue()
+        for _ in range(self.pool_size):
+            self.pool.put_nowait(None)  # connections are opened lazily
+        self.sender = self.loop.create_task(self._send_loop())
+        ready.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    # ---- called from the game thread ----
+    def submit(self, mode, score):
+        """Queue a score for the server"""
+        self.loop.call_soon_threadsafe(self._enqueue, (mode, score))
+
+    def scores(self):
+        """Last fetched {mode: top scores}, or None; refreshes in the background"""
+        self.loop.call_soon_threadsafe(self._maybe_refresh)
+        return self.tables
+
+    def pending(self):
+        return len(self.queue) + len(self.sending)
+
+    def close(self, timeout=1.0):
+        """Give queued scores ``timeout`` seconds to go out, then stop"""
+        deadline = time.monotonic() + timeout
+        while self.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+    # ---- event loop side ----
+    def _enqueue(self, item):
+        if not LeaderboardServer._valid(*item):
+            print(f"leaderboard: not submitting {item!r}", file=sys.stderr)
+            return
+        self.queue.append(item)
+        self.wake.set()
+
+    async def _shutdown(self):
+        self.sender.cancel()
+        while not self.pool.empty():
+            conn = self.pool.get_nowait()
+            if conn is not None:
+                conn[1].close()
+
+    async def _send_loop(self):
+        backoff = self.retry[0]
+        while True:
+            await self.wake.wait()
+            self.wake.clear()
+            await asyncio.sleep(self.batch_delay)
+            while self.sending or self.queue:
+                if not self.sending:
+                    # taken off the queue, so a full queue can't evict it mid-send
+                    self.sending = [self.queue.popleft()
+                                    for _ in range(min(self.batch_size, len(self.queue)))]
+                try:
+                    await self._call({"op": "submit", "scores": self.sending})
+                except (OSError, asyncio.TimeoutError):
+                    self.online = False
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.retry[1])
+                    continue
+                except ValueError as e:  # rejected: resending won't help
+                    print(f"leaderboard: dropped {len(self.sending)} scores: {e}", file=sys.stderr)
+                else:
+                    self.refreshed = 0.0  # the tables may have changed
+                backoff = self.retry[0]
+                self.sending = []
+
+    def _maybe_refresh(self):
+        if not self.refreshing and time.monotonic() - self.refreshed > self.refresh_every:
+            self.refreshing = True
+            self.loop.create_task(self._refresh())
+
+    async def _refresh(self):
+        try:
+            reply = await self._call({"op": "top", "k": TOP_K})
+            self.tables = reply["scores"]
+        except (OSError, asyncio.TimeoutError, ValueError, KeyError):
+            self.online = False
+        finally:
+            self.refreshed = time.monotonic()
+            self.refreshing = False
+
+    async def _call(self, msg):
+        """One request/reply on a pooled connection"""
+        conn = await self.pool.get()
+        try:
+            if conn is None:
+                conn = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout)
+            reader, writer = conn
+            writer.write(json.dumps(msg).encode() + b"\n")
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+            if not line:
+                raise ConnectionError("server closed the connection")
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                raise ConnectionError("unreadable reply") from None
+        except BaseException:
+            if conn is not None:
+                conn[1].close()
+            self.pool.put_nowait(None)
+            raise
+        self.pool.put_nowait(conn)
+        self.online = True
+        if "error" in reply:
+            # the server's own trouble is retried like an unreachable server
+            raise (OSError if reply.get("retry") else ValueError)(reply["error"])
+        return reply
+
+
+def client_from_env():
+    """LeaderboardClient for $SNAKE_LEADERBOARD ("host:port"), or None"""
+    address = os.environ.get("SNAKE_LEADERBOARD")
+    if not address:
+        return None
+    host, _, port = address.rpartition(":")
+    return LeaderboardClient(host or "127.0.0.1", int(port or DEFAULT_PORT))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the shared leaderboard server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data", default=os.path.join(DATA_DIR, "leaderboard"),
+                        help="directory for the server's score journal")
+    args = parser.parse_args()
+
+    server = LeaderboardServer(ScoreStore(args.data))
+    print(f"leaderboard on {args.host}:{args.port}, data in {args.data}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
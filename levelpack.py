@@ -0,0 +1,351 @@
+"""Level packs: hand-written text compiled to a compact, lazily read binary.
+
+A pack is a text file in ``levels/``::
+
+    ; comments start with a semicolon
+    pack Classic
+
+    level Corridors
+    apples 8            ; apples to clear the level
+    speed 8 10 12       ; ticks/sec with 0, 1, 2+ apples eaten (a speed curve)
+    rocks 4             ; extra obstacles scattered at random when it starts
+    start 5 5 right     ; spawn cell and heading (or mark it in the map)
+    map
+    ########################################
+    #..>...................................#
+    ...
+    end
+
+Map rows use ``#`` for an obstacle, ``.`` for ground and one of ``> < ^ v``
+for the spawn point and its heading; short rows and missing rows are
+ground. Everything but ``apples`` is optional.
+
+Packs are compiled to ``SNKL`` files: a header with the source hash and an
+offset per level, then per level its metadata and the obstacle layout as a
+bitset, one bit per cell. Compiled packs are cached in ``DATA_DIR/levelcache``
+under the source's hash, so a pack is only compiled again after it was
+edited. Opening a pack memory-maps its compiled file and reads the offset
+table; a level is decoded the first time it is asked for. ``Preloader``
+does that (and whatever else the caller wants ready, like the baked
+background) on a background thread for the next level while this one is
+played. ``find_pack`` finds a pack again from its id (name and source hash),
+as replays store it, even one that was opened from a path.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import engine
+from scorestore import DATA_DIR, atomic_write
+
+MAGIC = b"SNKL"
+VERSION = 1
+HEADER = struct.Struct("<HH16s")  # version, level count, source hash
+LEVEL = struct.Struct("<HHHHHBHB")  # cols, rows, apples, start x, start y, heading, rocks, speeds
+
+LEVEL_DIR = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))),
+                         "levels")
+CACHE_DIR = os.path.join(DATA_DIR, "levelcache")
+DEFAULT_PACK = "classic"
+
+COLS, ROWS = engine.WIDTH // engine.BLOCK, engine.HEIGHT // engine.BLOCK
+HEADINGS = {"right": engine.RIGHT, "left": engine.LEFT, "up": engine.UP, "down": engine.DOWN}
+MARKS = {">": "right", "<": "left", "^": "up", "v": "down"}
+DEFAULT_START = (engine.START_POS[0] // engine.BLOCK, engine.START_POS[1] // engine.BLOCK, "right")
+
+
+class LevelPackError(ValueError):
+    """A pack source that doesn't parse, reported as ``file:line: message``"""
+
+
+class Level:
+    """One level's layout and rules, in board cells"""
+
+    def __init__(self, name, need, speeds, rocks=0, start=DEFAULT_START, walls=frozenset(),
+                 cols=COLS, rows=ROWS):
+        self.name = name
+        self.need = need
+        self.speeds = tuple(speeds)  # speed with 0, 1, ... apples eaten; the last one sticks
+        self.rocks = rocks
+        self.start = start  # (col, row, heading name)
+        self.walls = frozenset(walls)  # (col, row) of the fixed obstacles
+        self.cols, self.rows = cols, rows
+
+    def layout(self, block=engine.BLOCK):
+        """The level as ``engine.new_level(layout=...)`` takes it, in pixels"""
+        col, row, heading = self.start
+        return Layout(self.need, self.speeds, self.rocks, (col * block, row * block),
+                      HEADINGS[heading], frozenset((c * block, r * block) for c, r in self.walls))
+
+
+class Layout:
+    """Pixel-space level description for the engine"""
+
+    __slots__ = ("need", "speeds", "rocks", "start", "direction", "obstacles")
+
+    def __init__(self, need, speeds, rocks, start, direction, obstacles):
+        self.need = need
+        self.speeds = speeds
+        self.rocks = rocks
+        self.start = start
+        self.direction = direction
+        self.obstacles = obstacles
+
+# ---------------- PARSING ----------------
+def parse(text, filename="<pack>"):
+    """Pack source -> (pack name, [Level])"""
+    name, levels, level, in_map = None, [], None, None
+
+    def fail(lineno, message):
+        raise LevelPackError(f"{filename}:{lineno}: {message}")
+
+    def finish():
+        if level is not None:
+            if level["need"] is None:
+                fail(level["line"], f"level {level['name']!r} has no 'apples' line")
+            levels.append(Level(level["name"], level["need"], level["speeds"], level["rocks"],
+                                level["start"], level["walls"]))
+
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        line = raw.split(";", 1)[0].rstrip()
+        if in_map is not None:
+            if line.strip() == "end":
+                in_map = None
+                continue
+            row = in_map
+            if row >= ROWS:
+                fail(lineno, f"map is taller than {ROWS} rows")
+            if len(line) > COLS:
+                fail(lineno, f"map row is wider than {COLS} cells")
+            for col, ch in enumerate(line):
+                if ch == "#":
+                    level["walls"].add((col, row))
+                elif ch in MARKS:
+                    level["start"] = (col, row, MARKS[ch])
+                elif ch not in ". ":
+                    fail(lineno, f"unknown map cell {ch!r}")
+            in_map = row + 1
+            continue
+        if not line.strip():
+            continue
+        key, _, value = line.strip().partition(" ")
+        value = value.strip()
+        if key == "pack":
+            name = value
+        elif key == "level":
+            finish()
+            level = {"name": value or f"Level {len(levels) + 1}", "need": None, "speeds": (10,),
+                     "rocks": 0, "start": DEFAULT_START, "walls": set(), "line": lineno}
+        elif level is None:
+            fail(lineno, f"{key!r} before the first 'level'")
+        elif key == "map":
+            in_map = 0
+        elif key == "start":
+            col, row, heading = (value.split() + [None] * 3)[:3]
+            if heading not in HEADINGS or not (col.isdigit() and row.isdigit()):
+                fail(lineno, f"bad value in {line.strip()!r}")
+            level["start"] = (int(col), int(row), heading)
+        elif key in ("apples", "speed", "rocks"):
+            numbers = value.split()
+            if not numbers or not all(n.isdigit() for n in numbers) or \
+                    (key != "speed" and len(numbers) != 1):
+                fail(lineno, f"bad value in {line.strip()!r}")
+            numbers = [int(n) for n in numbers]
+            # ranges the binary form can hold (see LEVEL)
+            if key == "apples" and 0 < numbers[0] <= 0xFFFF:
+                level["need"] = numbers[0]
+            elif key == "speed" and len(numbers) <= 0xFF and all(0 < n <= 0xFF for n in numbers):
+                level["speeds"] = tuple(numbers)
+            elif key == "rocks" and numbers[0] <= 0xFFFF:
+                level["rocks"] = numbers[0]
+            else:
+                fail(lineno, f"bad value in {line.strip()!r}")
+        else:
+            fail(lineno, f"unknown line {line.strip()!r}")
+    if in_map is not None:
+        fail(level["line"], "map without 'end'")
+    finish()
+    if not levels:
+        raise LevelPackError(f"{filename}: no levels")
+    for n, lvl in enumerate(levels, 1):
+        col, row, _ = lvl.start
+        if not (0 <= col < COLS and 0 <= row < ROWS) or (col, row) in lvl.walls:
+            raise LevelPackError(f"{filename}: level {n} ({lvl.name}) starts off the board "
+                                 f"or inside a wall")
+    return name or os.path.splitext(os.path.basename(filename))[0], levels
+
+# ---------------- BINARY ----------------
+def _short_name(name):
+    """``name`` as UTF-8 in at most 255 bytes, cut between characters"""
+    return name.encode()[:255].decode(errors="ignore").encode()
+
+
+def _encode_level(level):
+    col, row, heading = level.start
+    bits = 0
+    for c, r in level.walls:
+        bits |= 1 << (r * level.cols + c)
+    name = _short_name(level.name)
+    return (LEVEL.pack(level.cols, level.rows, level.need, col, row,
+                       list(HEADINGS).index(heading), level.rocks, len(level.speeds))
+            + bytes(level.speeds) + bytes([len(name)]) + name
+            + bits.to_bytes((level.cols * level.rows + 7) // 8, "little"))
+
+
+def _decode_level(data, pos):
+    cols, rows, need, col, row, heading, rocks, count = LEVEL.unpack_from(data, pos)
+    pos += LEVEL.size
+    speeds = tuple(data[pos:pos + count])
+    pos += count
+    length = data[pos]
+    name = bytes(data[pos + 1:pos + 1 + length]).decode()
+    pos += 1 + length
+    bits = int.from_bytes(data[pos:pos + (cols * rows + 7) // 8], "little")
+    walls = []
+    while bits:  # one step per wall, not per cell
+        low = bits & -bits
+        i = low.bit_length() - 1
+        walls.append((i % cols, i // cols))
+        bits ^= low
+    return Level(name, need, speeds, rocks, (col, row, list(HEADINGS)[heading]), walls, cols, rows)
+
+
+def compile_pack(name, levels, digest):
+    """Binary form of a parsed pack"""
+    name = _short_name(name)
+    records = [_encode_level(level) for level in levels]
+    table = 4 + HEADER.size + 1 + len(name)
+    offsets, pos = [], table + 4 * len(records)
+    for record in records:
+        offsets.append(pos)
+        pos += len(record)
+    return b"".join([MAGIC, HEADER.pack(VERSION, len(records), digest), bytes([len(name)]), name,
+                     struct.pack(f"<{len(offsets)}I", *offsets)] + records)
+
+
+class LevelPack:
+    """A compiled pack, decoded one level at a time"""
+
+    def __init__(self, data, source=""):
+        self.data = data  # the compiled bytes, usually a read-only mmap
+        self.source = source  # name of the source file, without ".txt"
+        if data[:4] != MAGIC:
+            raise ValueError("not a compiled level pack")
+        version, count, self.digest = HEADER.unpack_from(data, 4)
+        if version != VERSION:
+            raise ValueError(f"unsupported level pack version {version}")
+        pos = 4 + HEADER.size
+        length = data[pos]
+        self.name = bytes(data[pos + 1:pos + 1 + length]).decode()
+        pos += 1 + length
+        self.offsets = struct.unpack_from(f"<{count}I", data, pos)
+        self.levels = {}  # number -> Level, decoded on first use
+
+    @classmethod
+    def open(cls, path, source=""):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), source)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def id(self):
+        """Source name plus source hash; replays use it to find the same levels"""
+        return f"{self.source or self.name}@{self.digest.hex()}"
+
+    def level(self, n):
+        """Level ``n`` (1-based)"""
+        level = self.levels.get(n)
+        if level is None:
+            if not 1 <= n <= len(self.offsets):
+                raise IndexError(f"pack {self.name!r} has no level {n}")
+            level = self.levels[n] = _decode_level(self.data, self.offsets[n - 1])
+        return level
+
+
+def pack_path(name):
+    """Source file of pack ``name``, or ``name`` itself if it is a path"""
+    if os.path.sep in name or name.endswith(".txt"):
+        return name
+    return os.path.join(LEVEL_DIR, f"{name}.txt")
+
+
+def open_pack(name=DEFAULT_PACK, cache_dir=CACHE_DIR):
+    """Open pack ``name`` (in ``levels/``) or a path to a pack source,
+    compiling it first unless the cache has it for this exact source"""
+    path = pack_path(name)
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha256(source).digest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(cache_dir, f"{stem}-{digest.hex()}.snkl")
+    try:
+        return LevelPack.open(cached, stem)
+    except (OSError, ValueError):
+        pass
+    pack_name, levels = parse(source.decode("utf-8"), path)
+    data = compile_pack(pack_name, levels, digest)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        atomic_write(cached, data)
+        for old in os.listdir(cache_dir):  # builds of earlier versions of this source
+            if old.startswith(f"{stem}-") and old.endswith(".snkl") and old != os.path.basename(cached):
+                os.remove(os.path.join(cache_dir, old))
+    except OSError:  # read-only data directory: just keep it in memory
+        return LevelPack(data, stem)
+    return LevelPack.open(cached, stem)
+
+
+def find_pack(pack_id, sources=(), cache_dir=CACHE_DIR):
+    """The pack whose ``LevelPack.id`` is ``pack_id``: its build in the cache
+    (wherever its source was), else whichever of the pack of that name and
+    ``sources`` (names or paths) still compiles to it; None if none does"""
+    stem, _, digest = pack_id.partition("@")
+    if not stem or os.path.basename(stem) != stem:
+        return None
+    try:
+        pack = LevelPack.open(os.path.join(cache_dir, f"{stem}-{digest}.snkl"), stem)
+        if pack.id == pack_id:
+            return pack
+    except (OSError, ValueError):
+        pass
+    for name in (stem, *sources):
+        try:
+            pack = open_pack(name, cache_dir)
+        except (OSError, ValueError):
+            continue
+        if pack.id == pack_id:
+            return pack
+    return None
+
+# ---------------- PRELOADING ----------------
+class Preloader:
+    """Decodes levels, and prepares whatever ``prepare(level)`` builds, on a
+    background thread ahead of when they are needed"""
+
+    def __init__(self, pack, prepare=None):
+        self.pack = pack
+        self.prepare = prepare
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-preload")
+        self.pending = {}  # level number -> future of (Level, prepared)
+
+    def _load(self, n):
+        level = self.pack.level(n)
+        return level, self.prepare(level) if self.prepare else None
+
+    def prefetch(self, n):
+        """Start loading level ``n`` if it exists and isn't already under way"""
+        if 1 <= n <= len(self.pack) and n not in self.pending:
+            self.pending[n] = self.pool.submit(self._load, n)
+
+    def get(self, n):
+        """(Level, prepared) for level ``n``, waiting only if it isn't ready yet"""
+        self.prefetch(n)
+        return self.pending.pop(n).result()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets', 'assets'), ('scores.json', '.')],
+    datas=[('assets', 'assets'), ('levels', 'levels'), ('scores.json', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
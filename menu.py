@@ -1,6 +1,9 @@
 import pygame, sys
-from game import start_level_mode, start_survival_mode
+from game import start_level_mode, start_multiplayer_mode, start_survival_mode, start_world_mode
 from highscores import show_highscores
+from particles import MENU_SPARKS, ParticleSystem
+from textcache import get_font, render_text
+from widgets import Backdrop, Button, ButtonStyle, Label
 
 pygame.init()
 
@@ -11,9 +14,10 @@ pygame.display.set_caption("Arcade Monster Snake")
 clock = pygame.time.Clock()
 
 # ---------------- FONTS ----------------
-title_font = pygame.font.SysFont("arial", 72, bold=True)
-subtitle_font = pygame.font.SysFont("arial", 28)
-button_font = pygame.font.SysFont("arial", 32, bold=True)
+title_font = get_font("arial", 72, bold=True)
+subtitle_font = get_font("arial", 28)
+button_font = get_font("arial", 32, bold=True)
+footer_font = get_font("arial", 16)
 
 # ---------------- COLORS ----------------
 BG_COLOR = (15, 15, 35)
@@ -25,68 +29,14 @@ BUTTON_HOVER = (60, 60, 100)
 ACCENT_GREEN = (50, 255, 150)
 
 # ---------------- PARTICLE SYSTEM ----------------
-class Particle:
-    def __init__(self):
-        self.x = WIDTH // 2
-        self.y = HEIGHT // 2
-        self.vx = (pygame.time.get_ticks() % 100 - 50) / 10
-        self.vy = (pygame.time.get_ticks() % 100 - 50) / 10
-        self.size = 2
-        self.alpha = 255
-        
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.alpha -= 3
-        
-    def draw(self, surface):
-        if self.alpha > 0:
-            color = (*ACCENT_GREEN, int(self.alpha))
-            pygame.draw.circle(surface, color, (int(self.x), int(self.y)), self.size)
+particles = ParticleSystem(capacity=512)
 
-particles = []
+# ---------------- WIDGETS ----------------
+MENU_BUTTON = ButtonStyle(button_font, BUTTON_COLOR, BUTTON_HOVER, (100, 100, 150), HIGHLIGHT_COLOR,
+                          hover_text=HIGHLIGHT_COLOR, hover_border_width=4, radius=12,
+                          shadow_offset=4, glow=True)
 
 # ---------------- HELPER FUNCTIONS ----------------
-def draw_text_with_shadow(surface, text, font, color, x, y, shadow_offset=3):
-    """Draw text with shadow effect"""
-    shadow = font.render(text, True, (0, 0, 0))
-    surface.blit(shadow, (x + shadow_offset, y + shadow_offset))
-    text_surf = font.render(text, True, color)
-    surface.blit(text_surf, (x, y))
-
-def draw_button(surface, text, rect, hover=False):
-    """Draw a modern button with hover effect"""
-    color = BUTTON_HOVER if hover else BUTTON_COLOR
-    border_color = HIGHLIGHT_COLOR if hover else (100, 100, 150)
-    
-    # Button shadow
-    shadow_rect = pygame.Rect(rect[0] + 4, rect[1] + 4, rect[2], rect[3])
-    shadow_surface = pygame.Surface((rect[2], rect[3]))
-    shadow_surface.set_alpha(100)
-    shadow_surface.fill((0, 0, 0))
-    surface.blit(shadow_surface, (shadow_rect[0], shadow_rect[1]))
-    
-    # Button background
-    btn_surface = pygame.Surface((rect[2], rect[3]))
-    btn_surface.set_alpha(240)
-    btn_surface.fill(color)
-    surface.blit(btn_surface, (rect[0], rect[1]))
-    
-    # Button border with glow effect
-    if hover:
-        pygame.draw.rect(surface, border_color, rect, 4, border_radius=12)
-        # Glow effect
-        glow_rect = pygame.Rect(rect[0] - 2, rect[1] - 2, rect[2] + 4, rect[3] + 4)
-        pygame.draw.rect(surface, (*HIGHLIGHT_COLOR[:3], 100), glow_rect, 2, border_radius=14)
-    else:
-        pygame.draw.rect(surface, border_color, rect, 3, border_radius=12)
-    
-    # Button text
-    text_color = HIGHLIGHT_COLOR if hover else TEXT_COLOR
-    text_surf = button_font.render(text, True, text_color)
-    text_rect = text_surf.get_rect(center=(rect[0] + rect[2]//2, rect[1] + rect[3]//2))
-    surface.blit(text_surf, text_rect)
-
 def draw_snake_animation(surface, offset_y=0):
     """Draw animated snake decoration"""
     time = pygame.time.get_ticks() / 1000
@@ -103,78 +53,61 @@ def main_menu():
     """Modern main menu with buttons"""
     
     # Button positions
-    btn_width, btn_height = 300, 60
+    btn_width, btn_height = 300, 48
     btn_x = (WIDTH - btn_width) // 2
     
-    level_btn = pygame.Rect(btn_x, 250, btn_width, btn_height)
-    survival_btn = pygame.Rect(btn_x, 330, btn_width, btn_height)
-    highscore_btn = pygame.Rect(btn_x, 410, btn_width, btn_height)
-    exit_btn = pygame.Rect(btn_x, 490, btn_width, btn_height)
-    
     buttons = [
-        (level_btn, "LEVEL MODE", start_level_mode),
-        (survival_btn, "SURVIVAL MODE", start_survival_mode),
-        (highscore_btn, "HIGH SCORES", show_highscores),
-        (exit_btn, "EXIT", None)
+        Button((btn_x, 200, btn_width, btn_height), "LEVEL MODE", MENU_BUTTON, start_level_mode),
+        Button((btn_x, 260, btn_width, btn_height), "SURVIVAL MODE", MENU_BUTTON, start_survival_mode),
+        Button((btn_x, 320, btn_width, btn_height), "WORLD MODE", MENU_BUTTON, start_world_mode),
+        Button((btn_x, 380, btn_width, btn_height), "MULTIPLAYER", MENU_BUTTON, start_multiplayer_mode),
+        Button((btn_x, 440, btn_width, btn_height), "HIGH SCORES", MENU_BUTTON, show_highscores),
+        Button((btn_x, 500, btn_width, btn_height), "EXIT", MENU_BUTTON, None)
     ]
     
+    # Background with gradient effect and some visual flair with rectangles
+    backdrop = Backdrop((WIDTH, HEIGHT), BG_COLOR, PANEL_COLOR, alphas=(30, 20, 10))
+    subtitle = Label("SNAKE", subtitle_font, HIGHLIGHT_COLOR, (WIDTH // 2, 130), center=True)
+    footer = Label("Click buttons to start", footer_font, (150, 150, 150), (WIDTH // 2, HEIGHT - 30), center=True)
+    
     particle_timer = 0
     
     while True:
         mouse_pos = pygame.mouse.get_pos()
-        
-        # Background with gradient effect
-        screen.fill(BG_COLOR)
-        
-        # Add some visual flair with rectangles
-        for i in range(3):
-            alpha = 30 - i * 10
-            rect_surface = pygame.Surface((WIDTH - i * 100, HEIGHT - i * 100))
-            rect_surface.set_alpha(alpha)
-            rect_surface.fill(PANEL_COLOR)
-            screen.blit(rect_surface, (i * 50, i * 50))
+        backdrop.draw(screen)
         
         # Particle effects
         particle_timer += 1
         if particle_timer % 10 == 0:
-            for _ in range(2):
-                particles.append(Particle())
-        
-        particles_copy = particles.copy()
-        for p in particles_copy:
-            p.update()
-            if p.alpha <= 0:
-                particles.remove(p)
-            else:
-                p.draw(screen)
+            particles.emit(MENU_SPARKS, WIDTH // 2, HEIGHT // 2)
+        particles.update()
+        particles.draw(screen)
         
         # Draw animated snake decoration
         draw_snake_animation(screen)
         
         # Title with glow effect
         title_text = "ARCADE MONSTER"
-        title_surf = title_font.render(title_text, True, ACCENT_GREEN)
+        title_surf = render_text(title_font, title_text, ACCENT_GREEN)
         title_rect = title_surf.get_rect(center=(WIDTH // 2, 80))
         
         # Glow effect for title
-        glow_surf = title_font.render(title_text, True, (*ACCENT_GREEN[:3], 100))
+        glow_surf = render_text(title_font, title_text, (*ACCENT_GREEN[:3], 100))
         for offset in [(2, 2), (-2, 2), (2, -2), (-2, -2)]:
             screen.blit(glow_surf, (title_rect.x + offset[0], title_rect.y + offset[1]))
         
         screen.blit(title_surf, title_rect)
         
         # Subtitle
-        subtitle = subtitle_font.render("SNAKE", True, HIGHLIGHT_COLOR)
-        screen.blit(subtitle, subtitle.get_rect(center=(WIDTH // 2, 130)))
+        subtitle.draw(screen)
         
         # Draw buttons
-        for btn_rect, btn_text, _ in buttons:
-            hover = btn_rect.collidepoint(mouse_pos)
-            draw_button(screen, btn_text, btn_rect, hover)
+        for btn in buttons:
+            btn.update(mouse_pos)
+            btn.draw(screen)
         
         # Footer text
-        footer = pygame.font.SysFont("arial", 16).render("Click buttons to start", True, (150, 150, 150))
-        screen.blit(footer, footer.get_rect(center=(WIDTH // 2, HEIGHT - 30)))
+        footer.draw(screen)
         
         pygame.display.update()
         clock.tick(60)
@@ -186,10 +119,10 @@ def main_menu():
                 sys.exit()
             
             if e.type == pygame.MOUSEBUTTONDOWN:
-                for btn_rect, btn_text, action in buttons:
-                    if btn_rect.collidepoint(mouse_pos):
-                        if action:
-                            action()
+                for btn in buttons:
+                    if btn.rect.collidepoint(mouse_pos):
+                        if btn.action:
+                            btn.action()
                         else:
                             pygame.quit()
                             sys.exit()
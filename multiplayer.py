@@ -0,0 +1,779 @@
+"""Multiplayer survival: an authoritative asyncio tick server and its clients.
+
+The server owns the only real game, an ``Arena`` of N snakes on one board
+sharing its items, stepped at a fixed tick rate. Clients send nothing but
+direction inputs; the server queues a few per player and applies one per
+tick, so the rules never wait on the network.
+
+After every tick the server broadcasts one snapshot to all clients,
+encoded once. Most are deltas: per snake the cells its head moved onto and
+how many tail cells it dropped, snakes that spawned (with their cells) or
+died, the net item changes and changed scores. A full keyframe goes out
+every ``KEYFRAME_EVERY`` ticks, to a client when it joins and to any
+client that asks for one. Both carry a 32-bit hash of the whole state: the
+sum of a mixed key per body segment, item and score, which the server and
+each client's ``Mirror`` keep up to date change by change, so checking it
+costs nothing per tick. A mirror whose hash disagrees (or that missed a
+tick) drops deltas and asks for a keyframe.
+
+A client that can't keep up isn't waited for: once more than
+``SEND_BUFFER`` bytes are queued for it, it is skipped and gets a keyframe
+when its buffer has drained.
+
+Frames are ``<u32 length><u8 type>`` plus a little-endian body; cells are
+u16 board indices (row * cols + col)::
+
+    WELCOME  protocol player cols rows block rate keyframe_every
+    KEYFRAME tick hash players (id alive score length cells*length)*players
+             items cells*items kinds*items
+    DELTA    tick hash moves (id pops heads cells*heads)*moves
+             spawns (id length cells*length)*spawns removals (id left)*removals
+             removed-items cells*n added-items cells*n kinds*n scores (id score)*scores
+    INPUT    direction last-tick-seen          (client -> server)
+    RESYNC                                     (client -> server)
+
+    python multiplayer.py --port 8766
+    SNAKE_SERVER=127.0.0.1:8766 python main.py
+"""
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import threading
+import time
+from array import array
+from collections import Counter, deque
+
+import engine
+from body import SnakeBody
+from freecells import empty_board
+from itemgrid import ItemGrid
+
+DEFAULT_PORT = 8766
+PROTOCOL = 1
+TICK_RATE = engine.SLOW_SPEED  # ticks per second, the same for every snake
+KEYFRAME_EVERY = 50  # ticks between broadcast keyframes
+RESPAWN_TICKS = 20  # ticks a dead snake waits before it respawns
+INPUT_QUEUE = 3  # direction inputs kept per player; one is applied per tick
+SEND_BUFFER = 64 * 1024  # bytes queued for a client before it is skipped
+MAX_FRAME = 1 << 20
+MAX_PLAYERS = 0x3FFF
+
+DIRECTIONS = (engine.UP, engine.DOWN, engine.LEFT, engine.RIGHT)  # same order as replays
+KINDS = ("food", "bomb", "magnet", "scissor")
+MAGNET_TICKS = engine.MAGNET_DURATION * TICK_RATE // 1000
+
+# message types
+WELCOME, KEYFRAME, DELTA, INPUT, RESYNC = range(1, 6)
+
+FRAME = struct.Struct("<IB")  # body length, message type
+HELLO = struct.Struct("<BHHHHHH")  # protocol, player id, cols, rows, block, rate, keyframe_every
+TICK = struct.Struct("<II")  # tick, state hash
+COUNT = struct.Struct("<H")
+PLAYER = struct.Struct("<HBIH")  # id, alive, score, length
+MOVE = struct.Struct("<HHH")  # id, tail cells dropped, head cells added
+SPAWN = struct.Struct("<HH")  # id, length
+REMOVE = struct.Struct("<HB")  # id, left the game
+SCORE = struct.Struct("<HI")  # id, score
+STEER = struct.Struct("<BI")  # direction index, last tick seen
+
+# ---------------- STATE HASH ----------------
+MASK = 0xFFFFFFFF
+ITEM_KEY = 0x4000  # key spaces: segments use the player id, items and scores these
+SCORE_KEY = 0x8000
+
+
+def _key(a, b):
+    """Well-mixed 32-bit key of the pair (a, b), both below 2**16"""
+    x = ((a << 16) | b) * 0x9E3779B1 & MASK
+    x ^= x >> 15
+    x = x * 0x85EBCA6B & MASK
+    x ^= x >> 13
+    x = x * 0xC2B2AE35 & MASK
+    return x ^ (x >> 16)
+
+
+def _cells(indices):
+    return struct.pack(f"<{len(indices)}H", *indices)
+
+# ---------------- FRAMES ----------------
+def frame(kind, body=b""):
+    return FRAME.pack(len(body), kind) + body
+
+
+async def read_frame(reader):
+    """(type, body) of the next frame"""
+    length, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if length > MAX_FRAME:
+        raise ValueError(f"frame of {length} bytes")
+    return kind, await reader.readexactly(length)
+
+
+def _no_delay(writer):
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+# ---------------- ARENA ----------------
+class Player:
+    """One snake in the arena and the inputs waiting for it"""
+
+    __slots__ = ("id", "snake", "direction", "inputs", "score", "alive", "respawn", "magnet")
+
+    def __init__(self, pid, tick):
+        self.id = pid
+        self.snake = None
+        self.direction = engine.RIGHT
+        self.inputs = deque(maxlen=INPUT_QUEUE)
+        self.score = 0
+        self.alive = False
+        self.respawn = tick  # tick at which it (re)enters the board
+        self.magnet = 0  # tick the magnet wears off
+
+
+class Arena:
+    """N snakes on one survival board; the server's authoritative state.
+
+    Every change goes through a helper that updates ``hash`` and the change
+    log ``take_delta()`` encodes and clears."""
+
+    def __init__(self, cols=engine.WIDTH // engine.BLOCK, rows=engine.HEIGHT // engine.BLOCK,
+                 block=engine.BLOCK, rng=None, limits=None):
+        if cols * rows > 0x10000:
+            raise ValueError("board too large for u16 cell indices")
+        self.cols, self.rows, self.block = cols, rows, block
+        self.width, self.height = cols * block, rows * block
+        self.rng = rng if rng is not None else random.Random()
+        self.free = empty_board(self.width, self.height, block)
+        self.items = ItemGrid(max(engine.MAGNET_RADIUS // block, 1) * block, block)
+        self.limits = dict(engine.ITEM_LIMITS)  # per player on the board
+        if limits:
+            self.limits.update(limits)
+        self.players = {}  # id -> Player, in join order
+        self.tick = 0
+        self.hash = 0
+        self._clear_log()
+
+    def _clear_log(self):
+        self.moves = {}  # id -> [head cell indices, tail cells dropped]
+        self.spawned = []
+        self.removed = {}  # id -> left the game
+        self.touched = {}  # cell -> item kind before this tick
+        self.scored = set()
+
+    def index(self, cell):
+        return cell[1] // self.block * self.cols + cell[0] // self.block
+
+    # ---- logged changes ----
+    def _push(self, p, cell):
+        p.snake.push_head(cell)
+        i = self.index(cell)
+        self.hash = (self.hash + _key(p.id, i)) & MASK
+        self.moves.setdefault(p.id, [[], 0])[0].append(i)
+
+    def _pop(self, p):
+        cell = p.snake.pop_tail()
+        self.hash = (self.hash - _key(p.id, self.index(cell))) & MASK
+        self.moves.setdefault(p.id, [[], 0])[1] += 1
+
+    def _add_item(self, cell, kind):
+        self.touched.setdefault(cell, None)
+        self.items.add(cell, kind)
+        self.hash = (self.hash + _key(ITEM_KEY + KINDS.index(kind), self.index(cell))) & MASK
+
+    def _take_item(self, cell):
+        kind = self.items.get(cell)
+        self.touched.setdefault(cell, kind)
+        self.items.remove(cell)
+        self.hash = (self.hash - _key(ITEM_KEY + KINDS.index(kind), self.index(cell))) & MASK
+        return kind
+
+    def _set_score(self, p, score):
+        key = _key(SCORE_KEY, p.id)
+        self.hash = (self.hash + (score - p.score) * key) & MASK
+        p.score = score
+        self.scored.add(p.id)
+
+    def _spawn_item(self, kind):
+        cell = engine.spawn(self)
+        if cell is not None:
+            self._add_item(cell, kind)
+        return cell
+
+    # ---- players ----
+    def add_player(self):
+        """A new player, entering the board on the next tick; returns its id"""
+        pid = next((i for i in range(1, MAX_PLAYERS + 1) if i not in self.players), None)
+        if pid is None:
+            raise ValueError("arena is full")
+        self.players[pid] = Player(pid, self.tick + 1)
+        return pid
+
+    def remove_player(self, pid):
+        p = self.players.pop(pid, None)
+        if p is None:
+            return
+        if p.alive:
+            self._clear_body(p)
+        self.hash = (self.hash - p.score * _key(SCORE_KEY, pid)) & MASK
+        self.moves.pop(pid, None)
+        self.scored.discard(pid)
+        if pid in self.spawned:
+            self.spawned.remove(pid)
+        self.removed[pid] = 1
+
+    def steer(self, pid, direction):
+        p = self.players.get(pid)
+        if p is not None:
+            p.inputs.append(direction)
+
+    def _clear_body(self, p):
+        for cell in p.snake:
+            self.hash = (self.hash - _key(p.id, self.index(cell))) & MASK
+        p.snake.truncate(len(p.snake))
+        p.alive = False
+
+    def _kill(self, p):
+        self._clear_body(p)
+        self.moves.pop(p.id, None)
+        self.removed[p.id] = 0
+        p.respawn = self.tick + RESPAWN_TICKS
+
+    def _spawn(self, p):
+        """Put ``p`` on an empty cell with room ahead; False if none was found"""
+        b = self.block
+        for _ in range(20):
+            cell = self.free.sample(self.rng)
+            if cell is None:
+                return False
+            direction = engine.RIGHT if cell[0] < self.width // 2 else engine.LEFT
+            ahead = [(cell[0] + direction[0] * k, cell[1]) for k in range(1, 4)]
+            if all(c in self.free for c in ahead):
+                break
+        else:
+            return False
+        p.snake = SnakeBody([cell], self.free)
+        self.hash = (self.hash + _key(p.id, self.index(cell))) & MASK
+        p.direction = direction
+        p.inputs.clear()
+        p.alive = True
+        p.magnet = 0
+        self._set_score(p, 0)
+        self.spawned.append(p.id)
+        return True
+
+    # ---- rules ----
+    def step(self):
+        """Advance every snake one tick, all at once"""
+        self.tick += 1
+        items = self.items
+        alive = [p for p in self.players.values() if p.alive]
+
+        heads = {}
+        was = {}  # cell a head moves off -> that snake's id
+        for p in alive:
+            was[p.snake.head] = p.id
+            if p.inputs:
+                direction = p.inputs.popleft()
+                if direction != (-p.direction[0], -p.direction[1]):
+                    p.direction = direction
+            hx, hy = p.snake.head
+            heads[p.id] = (hx + p.direction[0], hy + p.direction[1])
+
+        # Tails move first (except for snakes about to eat), so following
+        # a tail is safe; then every head is checked against the board
+        for p in alive:
+            if items.get(heads[p.id]) != "food":
+                self._pop(p)
+        crowd = Counter(heads.values())
+        dead = []
+        for p in alive:
+            head = heads[p.id]
+            other = was.get(head)
+            if (not (0 <= head[0] < self.width and 0 <= head[1] < self.height)
+                    or crowd[head] > 1 or items.get(head) == "bomb"
+                    or any(head in q.snake for q in alive)
+                    or (other is not None and other != p.id
+                        and was.get(heads[other]) == p.id)):  # two heads swapping cells
+                dead.append(p)
+        for p in dead:
+            head = heads[p.id]
+            if items.get(head) == "bomb":
+                self._take_item(head)
+                self.free.add(head)
+            self._kill(p)
+
+        for p in alive:
+            if not p.alive:
+                continue
+            head = heads[p.id]
+            hit = self._take_item(head) if head in items else None
+            self._push(p, head)
+            if hit == "food":
+                self._set_score(p, p.score + engine.APPLE_POINTS)
+            elif hit == "magnet":
+                p.magnet = self.tick + MAGNET_TICKS
+            elif hit == "scissor" and len(p.snake) > engine.SCISSOR_CUT:
+                for _ in range(engine.SCISSOR_CUT):
+                    self._pop(p)
+        # Magnets pull once every head has moved, so no snake's food for
+        # this tick (and no cell a head is on) can be pulled from under it
+        for p in alive:
+            if p.alive and p.magnet > self.tick:
+                food = items.nearest(p.snake.head, engine.MAGNET_RADIUS, "food")
+                if food is not None:
+                    self._take_item(food)
+                    self._push(p, food)
+                    self._set_score(p, p.score + engine.APPLE_POINTS)
+
+        self._top_up(alive)
+        for p in self.players.values():
+            if not p.alive and p.respawn <= self.tick:
+                self._spawn(p)
+
+    def _top_up(self, alive):
+        """Keep a food per player on the board; roll the power-ups per snake"""
+        rng = self.rng
+        players = max(len(self.players), 1)
+        while self.items.count("food") < self.limits["food"] * players:
+            if self._spawn_item("food") is None:
+                break
+        for p in alive:
+            if not p.alive:
+                continue
+            length = len(p.snake)
+            for kind, chance, needs in (("bomb", engine.BOMB_CHANCE, 0),
+                                        ("magnet", engine.MAGNET_CHANCE, engine.MAGNET_LENGTH),
+                                        ("scissor", engine.SCISSOR_CHANCE, engine.SCISSOR_LENGTH)):
+                if (length >= needs and self.items.count(kind) < self.limits[kind] * players
+                        and rng.randint(1, chance) == 1):
+                    self._spawn_item(kind)
+
+    # ---- snapshots ----
+    def keyframe(self):
+        """The whole state as a KEYFRAME body"""
+        out = [TICK.pack(self.tick, self.hash), COUNT.pack(len(self.players))]
+        for p in self.players.values():
+            cells = [self.index(c) for c in p.snake] if p.alive else []
+            out.append(PLAYER.pack(p.id, p.alive, p.score, len(cells)))
+            out.append(_cells(cells))
+        cells = list(self.items.cells)
+        out.append(COUNT.pack(len(cells)))
+        out.append(_cells([self.index(c) for c in cells]))
+        out.append(bytes(KINDS.index(self.items.cells[c]) for c in cells))
+        return b"".join(out)
+
+    def take_delta(self):
+        """Everything that changed since the last call, as a DELTA body"""
+        out = [TICK.pack(self.tick, self.hash)]
+        moves = [(pid, heads, pops) for pid, (heads, pops) in self.moves.items() if heads or pops]
+        out.append(COUNT.pack(len(moves)))
+        for pid, heads, pops in moves:
+            out.append(MOVE.pack(pid, pops, len(heads)))
+            out.append(_cells(heads))
+        out.append(COUNT.pack(len(self.spawned)))
+        for pid in self.spawned:
+            cells = [self.index(c) for c in self.players[pid].snake]
+            out.append(SPAWN.pack(pid, len(cells)))
+            out.append(_cells(cells))
+        out.append(COUNT.pack(len(self.removed)))
+        out.extend(REMOVE.pack(pid, left) for pid, left in self.removed.items())
+        get = self.items.get
+        gone = [self.index(c) for c, was in self.touched.items() if was is not None and get(c) != was]
+        new = [(c, kind) for c, was in self.touched.items() if (kind := get(c)) is not None and kind != was]
+        out.append(COUNT.pack(len(gone)))
+        out.append(_cells(gone))
+        out.append(COUNT.pack(len(new)))
+        out.append(_cells([self.index(c) for c, _ in new]))
+        out.append(bytes(KINDS.index(kind) for _, kind in new))
+        scores = [pid for pid in self.scored if pid in self.players]
+        out.append(COUNT.pack(len(scores)))
+        out.extend(SCORE.pack(pid, self.players[pid].score) for pid in scores)
+        self._clear_log()
+        return b"".join(out)
+
+# ---------------- CLIENT MIRROR ----------------
+class Mirror:
+    """A client's copy of the arena, rebuilt from keyframes and deltas"""
+
+    def __init__(self, cols, rows, block):
+        self.cols, self.rows, self.block = cols, rows, block
+        self.width, self.height = cols * block, rows * block
+        self.bodies = {}  # id -> deque of (x, y) cells, head first; alive players only
+        self.scores = {}  # id -> score, every player seen
+        self.items = {}  # cell -> kind
+        self.occupied = Counter()  # cell -> body segments on it
+        self.tick = 0
+        self.hash = 0
+        self.synced = False  # a keyframe has been applied and no delta disagreed since
+        self.waiting = False  # a keyframe has been asked for
+
+    def cell(self, i):
+        return (i % self.cols * self.block, i // self.cols * self.block)
+
+    def index(self, cell):
+        return cell[1] // self.block * self.cols + cell[0] // self.block
+
+    def apply(self, kind, body):
+        """Apply a KEYFRAME or DELTA body; True if the mirror lost sync and
+        should ask the server for a keyframe (once until one arrives)"""
+        if kind == KEYFRAME:
+            self._keyframe(body)
+        elif kind == DELTA and self.synced:
+            tick, _ = TICK.unpack_from(body)
+            if tick == self.tick + 1:
+                self._delta(body)
+            else:
+                self.synced = False  # a delta went missing
+        if self.synced or self.waiting:
+            return False
+        self.waiting = True
+        return True
+
+    def _keyframe(self, body):
+        self.tick, expected = TICK.unpack_from(body)
+        pos = TICK.size
+        self.bodies, self.scores, self.items = {}, {}, {}
+        self.occupied = Counter()
+        self.hash = 0
+        (count,) = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        for _ in range(count):
+            pid, alive, score, length = PLAYER.unpack_from(body, pos)
+            pos += PLAYER.size
+            cells = struct.unpack_from(f"<{length}H", body, pos)
+            pos += 2 * length
+            if alive:
+                self._spawn(pid, cells)
+            self._score(pid, score)
+        (count,) = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        cells = struct.unpack_from(f"<{count}H", body, pos)
+        pos += 2 * count
+        for i, k in zip(cells, body[pos:pos + count]):
+            self._add_item(i, KINDS[k])
+        self.synced = self.hash == expected
+        self.waiting = False
+
+    def _delta(self, body):
+        self.tick, expected = TICK.unpack_from(body)
+        pos = TICK.size
+        unpack = struct.unpack_from
+        (count,) = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        for _ in range(count):
+            pid, pops, n = MOVE.unpack_from(body, pos)
+            pos += MOVE.size
+            snake = self.bodies[pid]
+            for i in unpack(f"<{n}H", body, pos):
+                cell = self.cell(i)
+                snake.appendleft(cell)
+                self.occupied[cell] += 1
+                self.hash = (self.hash + _key(pid, i)) & MASK
+            pos += 2 * n
+            for _ in range(pops):
+                self._unoccupy(pid, snake.pop())
+        (count,) = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        spawns = []
+        for _ in range(count):
+            pid, n = SPAWN.unpack_from(body, pos)
+            pos += SPAWN.size
+            spawns.append((pid, unpack(f"<{n}H", body, pos)))
+            pos += 2 * n
+        (count,) = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        for _ in range(count):
+            pid, left = REMOVE.unpack_from(body, pos)
+            pos += REMOVE.size
+            for cell in self.bodies.pop(pid, ()):
+                self._unoccupy(pid, cell)
+            if left:
+                self._score(pid, 0)
+                self.scores.pop(pid, None)
+        for pid, cells in spawns:
+            self._spawn(pid, cells)
+        (count,) = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        for i in unpack(f"<{count}H", body, pos):
+            kind = self.items.pop(self.cell(i))
+            self.hash = (self.hash - _key(ITEM_KEY + KINDS.index(kind), i)) & MASK
+        pos += 2 * count
+        (count,) = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        cells = unpack(f"<{count}H", body, pos)
+        pos += 2 * count
+        for i, k in zip(cells, body[pos:pos + count]):
+            self._add_item(i, KINDS[k])
+        pos += count
+        (count,) = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        for _ in range(count):
+            pid, score = SCORE.unpack_from(body, pos)
+            pos += SCORE.size
+            self._score(pid, score)
+        self.synced = self.hash == expected
+
+    def _spawn(self, pid, cells):
+        snake = self.bodies[pid] = deque()
+        for i in cells:
+            cell = self.cell(i)
+            snake.append(cell)
+            self.occupied[cell] += 1
+            self.hash = (self.hash + _key(pid, i)) & MASK
+
+    def _unoccupy(self, pid, cell):
+        left = self.occupied[cell] - 1
+        if left:
+            self.occupied[cell] = left
+        else:
+            del self.occupied[cell]
+        self.hash = (self.hash - _key(pid, self.index(cell))) & MASK
+
+    def _add_item(self, i, kind):
+        self.items[self.cell(i)] = kind
+        self.hash = (self.hash + _key(ITEM_KEY + KINDS.index(kind), i)) & MASK
+
+    def _score(self, pid, score):
+        key = _key(SCORE_KEY, pid)
+        self.hash = (self.hash + (score - self.scores.get(pid, 0)) * key) & MASK
+        self.scores[pid] = score
+
+# ---------------- SERVER ----------------
+class _Client:
+    __slots__ = ("writer", "needs_keyframe", "seen")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.needs_keyframe = True
+        self.seen = 0  # last tick the client said it had
+
+
+class TickServer:
+    """Steps an Arena at a fixed rate and streams snapshots to every client"""
+
+    def __init__(self, arena=None, rate=TICK_RATE, keyframe_every=KEYFRAME_EVERY):
+        self.arena = arena if arena is not None else Arena()
+        self.rate = rate
+        self.keyframe_every = keyframe_every
+        self.clients = {}  # player id -> _Client
+        self.tick_times = array("d")  # seconds of work per tick: rules, encoding, sending
+        self.bytes_sent = 0
+        self.skipped = 0  # snapshots not sent to a client that was behind
+        self.ticker = None
+
+    async def handle(self, reader, writer):
+        try:
+            pid = self.arena.add_player()
+        except ValueError:
+            writer.close()
+            return
+        _no_delay(writer)
+        client = self.clients[pid] = _Client(writer)
+        a = self.arena
+        writer.write(frame(WELCOME, HELLO.pack(PROTOCOL, pid, a.cols, a.rows, a.block,
+                                               self.rate, self.keyframe_every)))
+        try:
+            while True:
+                kind, body = await read_frame(reader)
+                if kind == INPUT:
+                    direction, client.seen = STEER.unpack(body)
+                    if direction < len(DIRECTIONS):
+                        a.steer(pid, DIRECTIONS[direction])
+                elif kind == RESYNC:
+                    client.needs_keyframe = True
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, struct.error):
+            pass
+        finally:
+            del self.clients[pid]
+            a.remove_player(pid)
+            writer.close()
+
+    def tick(self):
+        """Run one tick and send its snapshot"""
+        start = time.perf_counter()
+        a = self.arena
+        a.step()
+        delta = frame(DELTA, a.take_delta())
+        broadcast = a.tick % self.keyframe_every == 0
+        keyframe = frame(KEYFRAME, a.keyframe()) if broadcast else None
+        for client in self.clients.values():
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > SEND_BUFFER:
+                client.needs_keyframe = True
+                self.skipped += 1
+                continue
+            data = delta
+            if broadcast or client.needs_keyframe:
+                if keyframe is None:  # encoded once, however many clients need it
+                    keyframe = frame(KEYFRAME, a.keyframe())
+                data = keyframe
+                client.needs_keyframe = False
+            client.writer.write(data)
+            self.bytes_sent += len(data)
+        self.tick_times.append(time.perf_counter() - start)
+
+    async def run(self):
+        """Tick at ``rate``; if the loop falls behind, ticks are dropped, not bunched"""
+        loop = asyncio.get_running_loop()
+        period = 1 / self.rate
+        due = loop.time()
+        while True:
+            due += period
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -period:
+                due = loop.time()
+            self.tick()
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Listen and start ticking; returns the asyncio server"""
+        server = await asyncio.start_server(self.handle, host, port)
+        self.ticker = asyncio.ensure_future(self.run())
+        return server
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+# ---------------- CLIENT ----------------
+class Session:
+    """One connection to a TickServer"""
+
+    def __init__(self, reader, writer, pid, mirror, rate):
+        self.reader = reader
+        self.writer = writer
+        self.pid = pid  # our player id
+        self.mirror = mirror
+        self.rate = rate
+        self.bytes_received = self.bytes_sent = 0
+        self.desyncs = 0
+
+    @classmethod
+    async def open(cls, host="127.0.0.1", port=DEFAULT_PORT, timeout=3.0):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        _no_delay(writer)
+        kind, body = await asyncio.wait_for(read_frame(reader), timeout)
+        if kind != WELCOME:
+            writer.close()
+            raise ConnectionError("not a snake server")
+        protocol, pid, cols, rows, block, rate, _ = HELLO.unpack(body)
+        if protocol != PROTOCOL:
+            writer.close()
+            raise ConnectionError(f"server speaks protocol {protocol}, not {PROTOCOL}")
+        return cls(reader, writer, pid, Mirror(cols, rows, block), rate)
+
+    def send(self, direction):
+        data = frame(INPUT, STEER.pack(DIRECTIONS.index(direction), self.mirror.tick))
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+    def resync(self):
+        self.desyncs += 1
+        self.writer.write(frame(RESYNC))
+        self.bytes_sent += FRAME.size
+
+    def apply(self, kind, body):
+        """Apply a received frame; asks for a keyframe if the mirror lost sync"""
+        self.bytes_received += FRAME.size + len(body)
+        if self.mirror.apply(kind, body):
+            self.resync()
+
+    async def receive(self):
+        """Wait for and apply the next frame; returns its type"""
+        kind, body = await read_frame(self.reader)
+        self.apply(kind, body)
+        return kind
+
+    def close(self):
+        self.writer.close()
+
+
+class MultiplayerClient:
+    """A Session run on its own event loop thread, for the game loop: frames
+    are queued as they arrive and applied to ``mirror`` by ``poll()``"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, timeout=3.0):
+        self.inbox = deque()  # frames received, not yet applied
+        self.connected = False
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        try:
+            self.session = asyncio.run_coroutine_threadsafe(
+                Session.open(host, port, timeout), self.loop).result(timeout + 1)
+        except BaseException as e:
+            self._stop()
+            if isinstance(e, (TimeoutError, asyncio.TimeoutError)):
+                raise ConnectionError(f"no answer from {host}:{port}") from e
+            raise
+        self.mirror = self.session.mirror
+        self.pid = self.session.pid
+        self.connected = True
+        self.loop.call_soon_threadsafe(self._start)
+
+    def _start(self):
+        self.receiver = self.loop.create_task(self._receive())
+
+    async def _receive(self):
+        try:
+            while True:
+                self.inbox.append(await read_frame(self.session.reader))
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connected = False
+
+    # ---- called from the game thread ----
+    def send(self, direction):
+        self.loop.call_soon_threadsafe(self.session.send, direction)
+
+    def poll(self):
+        """Apply the frames that arrived since the last call; returns how many"""
+        count = 0
+        while self.inbox:
+            kind, body = self.inbox.popleft()
+            self.session.bytes_received += FRAME.size + len(body)
+            if self.session.mirror.apply(kind, body):
+                self.loop.call_soon_threadsafe(self.session.resync)
+            count += 1
+        return count
+
+    def close(self, timeout=1.0):
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except Exception:
+            pass
+        self._stop()
+
+    async def _shutdown(self):
+        self.session.close()
+        self.receiver.cancel()
+        await asyncio.gather(self.receiver, return_exceptions=True)
+
+    def _stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a multiplayer survival server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rate", type=int, default=TICK_RATE, help="ticks per second")
+    parser.add_argument("--cols", type=int, default=engine.WIDTH // engine.BLOCK)
+    parser.add_argument("--rows", type=int, default=engine.HEIGHT // engine.BLOCK)
+    args = parser.parse_args()
+
+    server = TickServer(Arena(args.cols, args.rows), args.rate)
+    print(f"multiplayer server on {args.host}:{args.port}, {args.cols}x{args.rows} cells, "
+          f"{args.rate} ticks/s")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,176 @@
+"""Pooled particle system for menu sparkles and in-game effects.
+
+Particles live in a fixed-capacity pool of parallel ``array`` columns
+(position, velocity, gravity, alpha, fade, emitter), so spawning and
+killing them allocates nothing per particle. A dead particle is
+swap-removed: the last live particle moves into its slot and the live
+count shrinks. With NumPy installed the update runs vectorized over views
+of the same buffers; without it a plain loop does the same work.
+
+Each emitter pre-renders its dot at ``ALPHA_LEVELS`` opacities, so drawing
+is a single ``Surface.blits`` call and the fade is actually visible.
+"""
+import math
+import random
+from array import array
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # optional, see README
+    np = None
+
+ALPHA_LEVELS = 32
+ALPHA_SCALE = ALPHA_LEVELS / 256
+
+
+# ---------------- EMITTERS ----------------
+class Emitter:
+    """What a burst of particles looks like and how it moves"""
+
+    def __init__(self, color, size=2, count=10, speed=(1.0, 5.0), angle=(0, 360),
+                 fade=(3.0, 3.0), gravity=0.0, jitter=0):
+        self.color = color
+        self.size = size  # dot radius in pixels
+        self.count = count  # particles per emit() call
+        self.speed = speed  # pixels per frame, (min, max)
+        self.angle = angle  # launch direction in degrees, (min, max)
+        self.fade = fade  # alpha lost per frame, (min, max)
+        self.gravity = gravity  # added to vy every frame
+        self.jitter = jitter  # random offset of the spawn point
+
+
+MENU_SPARKS = Emitter((50, 255, 150), count=2)
+APPLE_BURST = Emitter((255, 80, 80), count=16, speed=(1.0, 3.0), fade=(8.0, 12.0), jitter=4)
+BOMB_BLAST = Emitter((255, 160, 40), size=3, count=60, speed=(2.0, 7.0), fade=(5.0, 9.0),
+                     gravity=0.15, jitter=6)
+
+
+# ---------------- PARTICLE SYSTEM ----------------
+class ParticleSystem:
+    """Fixed pool of particles updated and drawn in bulk"""
+
+    def __init__(self, capacity=4096, vectorized=None, rng=None):
+        self.capacity = capacity
+        self.count = 0
+        self.rng = rng or random.Random()
+        self.vectorized = np is not None if vectorized is None else vectorized
+        zeros = bytes(4 * capacity)
+        # x/y hold the sprite's top-left corner so drawing needs no offset
+        self.x, self.y, self.vx, self.vy, self.ay, self.alpha, self.fade = (
+            array("f", zeros) for _ in range(7))
+        self.kind = array("i", zeros)
+        self.columns = (self.x, self.y, self.vx, self.vy, self.ay, self.alpha, self.fade, self.kind)
+        if self.vectorized:
+            self.views = tuple(np.frombuffer(col, dtype=np.float32 if col.typecode == "f" else np.int32)
+                               for col in self.columns)
+        self.kinds = {}  # emitter -> index of its first sprite
+        self.sprites = []
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    # ---------------- SPAWNING ----------------
+    def _kind(self, emitter):
+        kind = self.kinds.get(emitter)
+        if kind is None:
+            kind = self.kinds[emitter] = len(self.sprites) // ALPHA_LEVELS
+            r = emitter.size
+            for level in range(ALPHA_LEVELS):
+                alpha = min(255, (level + 1) * 256 // ALPHA_LEVELS)
+                sprite = pygame.Surface((2 * r + 1, 2 * r + 1), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, (*emitter.color, alpha), (r, r), r)
+                if pygame.display.get_surface() is not None:
+                    sprite = sprite.convert_alpha()
+                self.sprites.append(sprite)
+        return kind
+
+    def emit(self, emitter, x, y, count=None):
+        """Spawn a burst at (x, y); particles beyond capacity are dropped"""
+        kind = self._kind(emitter)
+        count = emitter.count if count is None else count
+        i = self.count
+        end = min(self.capacity, i + count)
+        rng = self.rng
+        uniform = rng.uniform
+        x -= emitter.size
+        y -= emitter.size
+        jitter = emitter.jitter
+        for i in range(i, end):
+            angle = math.radians(uniform(*emitter.angle))
+            speed = uniform(*emitter.speed)
+            self.x[i] = x + (uniform(-jitter, jitter) if jitter else 0)
+            self.y[i] = y + (uniform(-jitter, jitter) if jitter else 0)
+            self.vx[i] = speed * math.cos(angle)
+            self.vy[i] = speed * math.sin(angle)
+            self.ay[i] = emitter.gravity
+            self.alpha[i] = 255
+            self.fade[i] = uniform(*emitter.fade)
+            self.kind[i] = kind
+        self.count = end
+
+    # ---------------- UPDATE ----------------
+    def update(self):
+        """Advance every particle one frame and recycle the faded ones"""
+        if self.vectorized:
+            self._update_vectorized()
+        else:
+            self._update_loop()
+
+    def _update_vectorized(self):
+        n = self.count
+        x, y, vx, vy, ay, alpha, fade, _ = (v[:n] for v in self.views)
+        x += vx
+        y += vy
+        vy += ay
+        alpha -= fade
+
+        dead = np.flatnonzero(alpha <= 0)
+        if not len(dead):
+            return
+        live = n - len(dead)
+        holes = dead[dead < live]
+        donors = live + np.flatnonzero(alpha[live:] > 0)
+        for view in self.views:
+            view[holes] = view[donors]
+        self.count = live
+
+    def _update_loop(self):
+        x, y, vx, vy, ay, alpha, fade, _ = self.columns
+        columns = self.columns
+        n = self.count
+        i = 0
+        while i < n:
+            a = alpha[i] - fade[i]
+            if a <= 0:
+                n -= 1
+                for col in columns:
+                    col[i] = col[n]
+                continue  # the swapped-in particle still needs its update
+            alpha[i] = a
+            x[i] += vx[i]
+            y[i] += vy[i]
+            vy[i] += ay[i]
+            i += 1
+        self.count = n
+
+    # ---------------- DRAWING ----------------
+    def draw(self, surface):
+        n = self.count
+        if not n:
+            return
+        sprites = self.sprites
+        if self.vectorized:
+            x, y, _, _, _, alpha, _, kind = (v[:n] for v in self.views)
+            index = kind * ALPHA_LEVELS + (alpha * ALPHA_SCALE).astype(np.int32)
+            positions = zip(x.astype(np.int32).tolist(), y.astype(np.int32).tolist())
+            batch = zip(map(sprites.__getitem__, index.tolist()), positions)
+        else:
+            x, y, _, _, _, alpha, _, kind = self.columns
+            batch = ((sprites[kind[i] * ALPHA_LEVELS + int(alpha[i] * ALPHA_SCALE)],
+                      (int(x[i]), int(y[i]))) for i in range(n))
+        surface.blits(batch, doreturn=False)
@@ -0,0 +1,158 @@
+"""Per-frame timing for the game loops and an on-screen overlay.
+
+``FrameStats`` splits every frame into stages (input, game logic, each
+render layer, ``display.update`` and the wait for the next frame) and keeps
+the last ``capacity`` frames in a flat ``array`` ring buffer. The loop calls
+``frame()`` once per frame and ``lap(stage)`` after each piece of work; a
+lap adds the time since the previous lap to that stage, so stages that run
+several times a frame (one render pass per dirty rect) accumulate. While
+disabled both calls return after one attribute check.
+
+``PerfOverlay`` shows FPS, p50/p95/p99 frame time and the per-stage
+breakdown; ``FrameStats.dump()`` writes the buffer as CSV or JSON.
+"""
+import csv
+import json
+import time
+from array import array
+
+import pygame
+
+from textcache import get_font, render_text
+from widgets import Panel
+
+STAGES = ("events", "logic", "background", "snake", "items", "hud", "render", "display", "wait")
+
+
+class FrameStats:
+    """Ring buffer of per-stage frame timings"""
+
+    def __init__(self, capacity=600, stages=STAGES, enabled=False):
+        self.capacity = capacity
+        self.stages = stages
+        self.index = {stage: i for i, stage in enumerate(stages)}
+        self.width = 1 + len(stages)  # frame total, then each stage
+        self.buffer = array("d", bytes(8 * capacity * self.width))
+        self.current = [0.0] * len(stages)
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.count = 0  # frames recorded since reset
+        self.start = self.last = None
+
+    def enable(self, on=True):
+        if on != self.enabled:
+            self.enabled = on
+            self.start = self.last = None
+
+    def lap(self, stage):
+        """Charge the time since the previous lap to ``stage``"""
+        if not self.enabled or self.last is None:
+            return
+        now = time.perf_counter()
+        self.current[self.index[stage]] += now - self.last
+        self.last = now
+
+    def frame(self):
+        """Close the previous frame (its leftover time is "wait") and start a new one"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        current = self.current
+        if self.start is not None:
+            current[-1] += now - self.last
+            base = self.count % self.capacity * self.width
+            self.buffer[base] = now - self.start
+            self.buffer[base + 1:base + self.width] = array("d", current)
+            self.count += 1
+        for i in range(len(current)):
+            current[i] = 0.0
+        self.start = self.last = now
+
+    def rows(self):
+        """Recorded frames, oldest first, as [total, stage...] in seconds"""
+        n = min(self.count, self.capacity)
+        first = self.count - n
+        w = self.width
+        rows = []
+        for k in range(first, self.count):
+            base = k % self.capacity * w
+            rows.append(self.buffer[base:base + w].tolist())
+        return rows
+
+    def summary(self):
+        """FPS, frame-time percentiles and mean stage times, in ms"""
+        rows = self.rows()
+        if not rows:
+            return None
+        totals = sorted(row[0] for row in rows)
+        n = len(totals)
+        pick = lambda p: totals[min(n - 1, int(p / 100 * n))] * 1000
+        return {
+            "frames": n,
+            "fps": n / sum(totals),
+            "p50": pick(50), "p95": pick(95), "p99": pick(99),
+            "stages": {stage: sum(row[i + 1] for row in rows) / n * 1000
+                       for i, stage in enumerate(self.stages)},
+        }
+
+    def dump(self, path, fmt="csv"):
+        """Write the buffer to ``path`` as "csv" or "json" (times in ms)"""
+        rows = [[round(t * 1000, 4) for t in row] for row in self.rows()]
+        header = ["frame"] + list(self.stages)
+        with open(path, "w", newline="") as f:
+            if fmt == "json":
+                json.dump({"columns": header, "frames": rows, "summary": self.summary()}, f)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+        return path
+
+
+# ---------------- OVERLAY ----------------
+class PerfOverlay:
+    """Toggleable panel with live FPS, percentiles and the stage breakdown"""
+
+    def __init__(self, stats, pos=(570, 10), width=220, refresh=30, always_record=False):
+        self.stats = stats
+        self.font = get_font("consolas", 15)
+        self.line_height = 17
+        lines = 2 + len(stats.stages)
+        self.rect = pygame.Rect(pos, (width, 12 + lines * self.line_height))
+        self.panel = Panel(self.rect, alpha=200, radius=6)
+        self.refresh = refresh  # frames between text updates
+        self.always_record = always_record
+        self.visible = False
+        self.dirty = False  # its area needs repainting after hiding
+        self.frames = 0
+        self.lines = []
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.dirty = not self.visible
+        self.stats.enable(self.visible or self.always_record)
+        self.frames = 0
+        self.lines = []
+
+    def _text(self):
+        s = self.stats.summary()
+        if s is None:
+            return ["collecting..."]
+        lines = [f"FPS {s['fps']:6.1f}  frames {s['frames']}",
+                 f"p50 {s['p50']:.1f} p95 {s['p95']:.1f} p99 {s['p99']:.1f} ms"]
+        lines += [f"{stage:<11}{ms:7.3f} ms" for stage, ms in s["stages"].items()]
+        return lines
+
+    def draw(self, surface):
+        if self.frames % self.refresh == 0:
+            self.lines = self._text()
+        self.frames += 1
+        self.panel.draw(surface)
+        x, y = self.rect.x + 10, self.rect.y + 6
+        surface.blits([(render_text(self.font, line, (220, 220, 220)), (x, y + i * self.line_height))
+                       for i, line in enumerate(self.lines)], doreturn=False)
+
+
+NO_STATS = FrameStats(capacity=1)  # disabled stand-in for code run without stats
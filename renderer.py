@@ -0,0 +1,354 @@
+"""Gameplay renderer with a dirty-rectangle mode.
+
+``GameRenderer.render(state)`` draws a survival or level frame and returns
+the screen rects that changed, ready for ``pygame.display.update(rects)``.
+In a normal tick only the new head, the neck, the old and new tail cells,
+items that appeared or went, the magnet ring and the HUD (when its numbers change) are
+redrawn and uploaded. Anything the diff can't explain (first frame,
+scissor cut, magnet pull, a new level) falls back to a full redraw.
+
+Frames are composited from layers: a static layer (background plus the
+level's obstacles and their glows) baked once per level, then the snake,
+then item sprites with their glow rings pre-rendered, the magnet ring and
+the HUD. The static layer is rebuilt only through ``invalidate_static()``,
+which runs when the obstacle layout changes (a level starts), or swapped
+for one baked ahead of time by ``bake_static``/``adopt_static``.
+
+``render`` may be called more often than the game ticks. A new tick is
+recognised by ``state.time``; in between, ``alpha`` (0..1, how far the frame
+is towards the next tick) slides the head sprite from its previous cell
+into its current one and a tail sprite out of the cell the tail just left,
+and only the cells under the two sliding ends are redrawn.
+"""
+import pygame
+
+from perfstats import NO_STATS
+from snake_sprites import PAD, get_sprites, segment_key
+
+RING_COLOR = (0, 255, 255)
+
+
+class GameRenderer:
+    """Draws engine state; full frames or only the cells that changed"""
+
+    def __init__(self, surface, art, bg_color, hud, hud_rect,
+                 ring_radius=0, block=20, dirty=True, stats=None):
+        self.surface = surface
+        self.art = art  # name -> (image, glow color or None, glow radius)
+        self.bg_color = bg_color
+        self.hud = hud  # hud(surface, state) draws the HUD panel
+        self.hud_rect = pygame.Rect(hud_rect)
+        self.ring_radius = ring_radius
+        self.block = block
+        self.dirty = dirty
+        self.stats = stats or NO_STATS  # per-layer frame timings
+
+        # how far anything drawn for a cell can spill into its neighbours
+        glow = max([r for _, c, r in art.values() if c] + [0])
+        self.margin = max(PAD, glow - block // 2 + 1)
+        self.item_sprites = {name: self._item_sprite(*a) for name, a in art.items()}
+        self.static = None
+        self.obstacles = frozenset()
+        self.invalidate()
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (scene change)"""
+        self.full = True
+        self.tiles = {}  # cell -> (sprite key, stamp); newer segments have larger stamps
+        self.head = self.tail = None
+        self.length = 0
+        self.time = None  # state.time of the last tick drawn
+        self.slide_from = None  # previous head cell while the head slides
+        self.head_pos = None  # where the head sprite was last drawn
+        self.tail_from = None  # cell the tail just left, while the tail slides
+        self.tail_pos = None  # where the sliding tail sprite was last drawn, if it was
+        self.items = {}  # cell -> kind as last drawn
+        self.item_grid = None  # state.items and its version when self.items was taken
+        self.item_version = None
+        self.ring = None
+        self.hud_key = None
+
+    # ---------------- FRAME ----------------
+    def render(self, state, alpha=1.0):
+        """Draw the frame for ``state`` and return the rects to upload"""
+        rects = []
+        if state.time != self.time:
+            self.time = state.time
+            if frozenset(state.obstacles) != self.obstacles:
+                self.invalidate_static()
+            self.slide_from = self.head if self._one_step(self.head, state.head) else None
+            self.tail_from = self._tail_from(state)
+            if self.full or not self.dirty or not self._update_snake(state):
+                return self._full_frame(state, alpha)
+            rects = self._tick_rects(state)
+        elif self.full or not self.dirty:
+            return self._full_frame(state, alpha)
+
+        head_pos = self._head_pos(alpha)
+        if head_pos != self.head_pos:
+            rects += [self._cell_rect(self.head_pos), self._cell_rect(head_pos)]
+            self.head_pos = head_pos
+        tail_pos = self._tail_pos(alpha)
+        if tail_pos != self.tail_pos:
+            rects += [self._cell_rect(pos) for pos in (self.tail_pos, tail_pos) if pos]
+            self.tail_pos = tail_pos
+
+        # Clipped rounded borders don't match unclipped ones, so the HUD
+        # is always repainted whole
+        hud = self.hud_rect
+        rects = [r.union(hud) if r.colliderect(hud) else r for r in rects]
+        for rect in rects:
+            self._redraw(state, rect)
+        return rects
+
+    def _tick_rects(self, state):
+        """Regions changed by the tick just taken"""
+        rects = [self._cell_rect(cell) for cell in self._changed]
+
+        grid = state.items
+        if grid is not self.item_grid or grid.version != self.item_version:
+            items = dict(grid.cells)
+            rects.extend(self._cell_rect(cell) for cell, _ in items.items() ^ self.items.items())
+            self._take_items(grid, items)
+
+        ring = self._ring_rect(state)
+        if ring != self.ring:
+            rects.extend(r for r in (self.ring, ring) if r)
+            self.ring = ring
+        elif ring:
+            rects.append(ring)
+
+        hud_key = self._hud_key(state)
+        if hud_key != self.hud_key:
+            rects.append(self.hud_rect)
+            self.hud_key = hud_key
+        return rects
+
+    def _full_frame(self, state, alpha=1.0):
+        if self.static is None:
+            self._build_static(state)
+        self.full = False
+        self.tiles = self._snake_tiles(state.snake)
+        self.head, self.tail = state.snake.head, state.snake.tail
+        self.length = len(state.snake)
+        self.head_pos = self._head_pos(alpha)
+        self.tail_pos = self._tail_pos(alpha)
+        self._take_items(state.items, dict(state.items.cells))
+        self.ring = self._ring_rect(state)
+        self.hud_key = self._hud_key(state)
+        screen_rect = self.surface.get_rect()
+        self._redraw(state, screen_rect)
+        return [screen_rect]
+
+    def repaint(self, state, rect):
+        """Redraw the scene under ``rect`` (e.g. after an overlay) and return it"""
+        rect = pygame.Rect(rect)
+        if rect.colliderect(self.hud_rect):
+            rect.union_ip(self.hud_rect)
+        self._redraw(state, rect)
+        return rect
+
+    # ---------------- SNAKE DIFF ----------------
+    def _snake_tiles(self, snake):
+        segments = list(snake)
+        last = len(segments) - 1
+        tiles = {}
+        for i, pos in enumerate(segments):
+            prev_pos = segments[i-1] if i > 0 else None
+            next_pos = segments[i+1] if i < last else None
+            tiles[pos] = (segment_key(pos, i == 0, i == last, prev_pos, next_pos), -i)
+        return tiles
+
+    def _update_snake(self, state):
+        """Patch the tile map from the last frame; False if a full redraw is needed"""
+        snake = state.snake
+        grown = len(snake) - self.length
+        hx, hy = snake.head
+        ox, oy = self.head
+        if (grown not in (0, 1) or abs(hx - ox) + abs(hy - oy) != self.block
+                or (len(snake) > 1 and snake[1] != self.head)
+                or len(snake.counts) != len(snake)):
+            return False
+
+        stamp = self.tiles[self.head][1] + 1
+        changed = []
+        if not grown and self.tail not in snake:
+            del self.tiles[self.tail]
+            changed.append(self.tail)
+
+        last = len(snake) - 1
+        for i in {0, 1, last} if last > 0 else {0}:
+            pos = snake[i]
+            prev_pos = snake[i-1] if i > 0 else None
+            next_pos = snake[i+1] if i < last else None
+            key = segment_key(pos, i == 0, i == last, prev_pos, next_pos)
+            old = self.tiles.get(pos)
+            if old is None:
+                self.tiles[pos] = (key, stamp)
+                changed.append(pos)
+            elif old[0] != key:
+                self.tiles[pos] = (key, old[1])
+                changed.append(pos)
+
+        self.head, self.tail, self.length = snake.head, snake.tail, len(snake)
+        self._changed = changed
+        return True
+
+    def _take_items(self, grid, items):
+        self.items = items
+        self.item_grid, self.item_version = grid, grid.version
+
+    def _one_step(self, old, new):
+        return old is not None and abs(new[0] - old[0]) + abs(new[1] - old[1]) == self.block
+
+    def _tail_from(self, state):
+        """The cell the tail just left, if the tick moved it one cell on"""
+        snake = state.snake
+        return self.tail if len(snake) > 1 and self._one_step(self.tail, snake.tail) else None
+
+    def _head_pos(self, alpha):
+        """Top-left of the head sprite, ``alpha`` of the way from its last cell"""
+        if self.slide_from is None or alpha >= 1:
+            return self.head
+        (fx, fy), (hx, hy) = self.slide_from, self.head
+        return (round(fx + (hx - fx) * alpha), round(fy + (hy - fy) * alpha))
+
+    def _tail_pos(self, alpha):
+        """Top-left of the tail sprite sliding out of the cell the tail left,
+        ``alpha`` of the way to the tail's cell; None once it is there"""
+        if self.tail_from is None or alpha >= 1:
+            return None
+        (fx, fy), (tx, ty) = self.tail_from, self.tail
+        return (round(fx + (tx - fx) * alpha), round(fy + (ty - fy) * alpha))
+
+    # ---------------- REGIONS ----------------
+    def _cell_rect(self, cell):
+        m = self.margin
+        return pygame.Rect(cell[0] - m, cell[1] - m, self.block + 2 * m, self.block + 2 * m)
+
+    def _ring_rect(self, state):
+        if not (self.ring_radius and getattr(state, "magnet_active", False)):
+            return None
+        hx, hy = state.head
+        r = self.ring_radius
+        half = self.block // 2
+        return pygame.Rect(hx + half - r - 1, hy + half - r - 1, 2 * r + 3, 2 * r + 3)
+
+    def _hud_key(self, state):
+        return (state.score, len(state.snake), state.apples, state.level, state.need)
+
+    def _cells_near(self, rect):
+        """Board cells whose drawing could reach into ``rect``"""
+        b, m = self.block, self.margin
+        x0 = (rect.left - m) // b * b
+        y0 = (rect.top - m) // b * b
+        for y in range(y0, rect.bottom + m, b):
+            for x in range(x0, rect.right + m, b):
+                yield (x, y)
+
+    # ---------------- LAYERS ----------------
+    def invalidate_static(self):
+        """Drop the baked background; it is rebuilt with a full redraw"""
+        self.static = None
+        self.full = True
+
+    def _build_static(self, state):
+        """Bake the background and the obstacles with their glows"""
+        self.adopt_static(self.bake_static(state.obstacles), (), state)
+
+    def bake_static(self, obstacles):
+        """Background plus ``obstacles`` as a new surface. Changes nothing on
+        the renderer, so a level preloading thread may call it."""
+        static = pygame.Surface(self.surface.get_size())
+        static.fill(self.bg_color)
+        if obstacles:
+            sprite, offset = self.item_sprites["obstacle"]
+            static.blits([(sprite, (x + offset, y + offset)) for x, y in obstacles],
+                         doreturn=False)
+        return static
+
+    def adopt_static(self, static, baked, state):
+        """Use ``static`` from ``bake_static(baked)`` as the static layer for
+        ``state``, adding the obstacles it lacks (a level's random rocks)"""
+        if pygame.display.get_surface() is not None:
+            static = static.convert()
+        extra = [cell for cell in state.obstacles if cell not in baked]
+        if extra:
+            sprite, offset = self.item_sprites["obstacle"]
+            static.blits([(sprite, (x + offset, y + offset)) for x, y in extra], doreturn=False)
+        self.static = static
+        self.obstacles = frozenset(state.obstacles)
+        self.full = True
+
+    def _item_sprite(self, image, glow, radius):
+        """Item image with its glow ring drawn once; returns (sprite, offset)"""
+        if not glow:
+            return image, 0
+        half = self.block // 2
+        ext = max(radius + 2, half)
+        sprite = pygame.Surface((2 * ext, 2 * ext), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, glow, (ext, ext), radius, 2)
+        sprite.blit(image, (ext - half, ext - half))
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        return sprite, half - ext
+
+    # ---------------- DRAWING ----------------
+    def _redraw(self, state, rect):
+        surface = self.surface
+        lap = self.stats.lap
+        surface.set_clip(rect)
+        surface.blit(self.static, rect, rect)
+        lap("background")
+        whole = rect == surface.get_rect()
+        cells = None if whole else list(self._cells_near(rect))
+
+        # Snake, head first so overlaps match a full redraw; the head is
+        # drawn at its (possibly interpolated) position, and under it all
+        # the tail still sliding out of its last cell
+        sprites = get_sprites()
+        tiles = self.tiles
+        head = self.head
+        batch = []
+        if self.tail_pos and (whole or rect.colliderect(self._cell_rect(self.tail_pos))):
+            tx, ty = self.tail_pos
+            batch.append((sprites[tiles[self.tail][0]], (tx - PAD, ty - PAD)))
+        hx, hy = self.head_pos
+        if whole or rect.colliderect(self._cell_rect(self.head_pos)):
+            batch.append((sprites[tiles[head][0]], (hx - PAD, hy - PAD)))
+        if whole:
+            batch += [(sprites[key], (x - PAD, y - PAD)) for (x, y), (key, _) in tiles.items()
+                      if (x, y) != head]
+        else:
+            near = sorted((c for c in cells if c in tiles and c != head), key=lambda c: -tiles[c][1])
+            batch += [(sprites[tiles[c][0]], (c[0] - PAD, c[1] - PAD)) for c in near]
+        surface.blits(batch, doreturn=False)
+        lap("snake")
+
+        # Items with glow effect
+        # in row order either way, so overlapping glows stack the same
+        items = state.items.cells
+        if whole:
+            near = sorted(items.items(), key=lambda item: (item[0][1], item[0][0]))
+        else:
+            near = [(c, items[c]) for c in cells if c in items]
+        sprites = self.item_sprites
+        batch = []
+        for (x, y), kind in near:
+            sprite, offset = sprites[kind]
+            batch.append((sprite, (x + offset, y + offset)))
+        surface.blits(batch, doreturn=False)
+
+        # Magnet radius
+        if self.ring and rect.colliderect(self.ring):
+            hx, hy = state.head
+            half = self.block // 2
+            pygame.draw.circle(surface, RING_COLOR, (hx + half, hy + half), self.ring_radius, 2)
+        lap("items")
+
+        # HUD Panel
+        if rect.colliderect(self.hud_rect):
+            self.hud(surface, state)
+        lap("hud")
+
+        surface.set_clip(None)
@@ -0,0 +1,270 @@
+"""Seeded runs recorded as compact binary replays.
+
+Every game draws its randomness from one ``random.Random(seed)`` and its
+timers from game time, so a run is fully determined by its mode, starting
+level (and level pack), seed and the direction the snake was heading on
+each tick. A replay stores exactly that: each direction change is one
+varint, ``(ticks since the previous change << 2) | direction``, so a
+typical game is a few dozen bytes.
+
+A run that was rewound or resumed from a save (see snapshot.py) also lists
+the ticks it was restored on: a restore rebuilds the free-cell index, which
+decides where items spawn, so the re-simulation rebuilds it on those ticks.
+
+``verify()`` re-simulates a replay with the headless engine and checks
+that it ends on its last tick with the score the game saved:
+
+    python replay.py replays/*.snkr
+
+Layout (all integers unsigned LEB128 varints)::
+
+    b"SNKR" version mode level pack_length pack seed changes (delta<<2|dir)*changes
+            restores delta*restores ticks score
+
+``pack`` is the UTF-8 id (name and source hash) of the level pack a level
+run was played from, empty for the built-in ``engine.LEVELS``.
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+import levelpack
+from scorestore import DATA_DIR
+
+MAGIC = b"SNKR"
+VERSION = 4  # 2: circular magnet; 3: level pack id; 4: restores
+MODES = ("survival", "level", "world")
+DIRECTIONS = (engine.UP, engine.DOWN, engine.LEFT, engine.RIGHT)
+REPLAY_DIR = os.path.join(DATA_DIR, "replays")
+
+
+def new_seed():
+    return random.getrandbits(63)
+
+# ---------------- VARINTS ----------------
+def write_varint(out, n):
+    """Append ``n`` to the bytearray ``out`` as an unsigned LEB128 varint"""
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def read_varint(data, pos):
+    """Decode the varint at ``data[pos]``; returns (value, next position)"""
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+# ---------------- REPLAY ----------------
+class Replay:
+    """One recorded run: its starting conditions and direction changes"""
+
+    def __init__(self, mode, seed, level=1, changes=None, ticks=0, score=0, pack="", restores=None):
+        self.mode = mode
+        self.seed = seed
+        self.level = level
+        self.pack = pack  # LevelPack.id, or "" for engine.LEVELS
+        self.changes = changes if changes is not None else []  # (tick, direction index)
+        self.restores = restores if restores is not None else []  # ticks the game was restored on
+        self.ticks = ticks  # ticks simulated in total, across levels
+        self.score = score  # score passed to save_score()
+
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        pack = self.pack.encode()
+        for n in (VERSION, MODES.index(self.mode), self.level, len(pack)):
+            write_varint(out, n)
+        out += pack
+        for n in (self.seed, len(self.changes)):
+            write_varint(out, n)
+        last = 0
+        for tick, direction in self.changes:
+            write_varint(out, (tick - last) << 2 | direction)
+            last = tick
+        write_varint(out, len(self.restores))
+        last = 0
+        for tick in self.restores:
+            write_varint(out, tick - last)
+            last = tick
+        write_varint(out, self.ticks)
+        write_varint(out, self.score)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a replay file")
+        version, pos = read_varint(data, 4)
+        if version not in (3, VERSION):  # 3 is 4 without restores
+            raise ValueError(f"unsupported replay version {version}")
+        mode, pos = read_varint(data, pos)
+        level, pos = read_varint(data, pos)
+        length, pos = read_varint(data, pos)
+        pack = data[pos:pos + length].decode()
+        pos += length
+        seed, pos = read_varint(data, pos)
+        count, pos = read_varint(data, pos)
+        changes = []
+        tick = 0
+        for _ in range(count):
+            n, pos = read_varint(data, pos)
+            tick += n >> 2
+            changes.append((tick, n & 3))
+        restores = []
+        if version > 3:
+            count, pos = read_varint(data, pos)
+            tick = 0
+            for _ in range(count):
+                n, pos = read_varint(data, pos)
+                tick += n
+                restores.append(tick)
+        ticks, pos = read_varint(data, pos)
+        score, pos = read_varint(data, pos)
+        return cls(MODES[mode], seed, level, changes, ticks, score, pack, restores)
+
+    def save(self, path=None):
+        """Write the replay (by default into REPLAY_DIR) and return its path"""
+        if path is None:
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            path = os.path.join(REPLAY_DIR, f"{self.mode}-{self.seed:016x}.snkr")
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    """Builds a Replay while a run is played; call tick() before each step"""
+
+    def __init__(self, mode, seed, level=1, pack=""):
+        self.replay = Replay(mode, seed, level, pack=pack)
+        self.direction = None
+
+    def tick(self, state):
+        if state.direction != self.direction:
+            self.direction = state.direction
+            self.replay.changes.append((self.replay.ticks, DIRECTIONS.index(state.direction)))
+        self.replay.ticks += 1
+
+    @classmethod
+    def resume(cls, replay):
+        """Carry on recording ``replay`` in a game restored from a save"""
+        recorder = cls(replay.mode, replay.seed)
+        recorder.replay = replay
+        recorder.restore(replay.ticks)
+        return recorder
+
+    def restore(self, tick):
+        """The game was put back to how it was after ``tick`` ticks: forget
+        the inputs since and note the restore"""
+        replay = self.replay
+        while replay.changes and replay.changes[-1][0] >= tick:
+            replay.changes.pop()
+        replay.restores = [t for t in replay.restores if t < tick] + [tick]
+        replay.ticks = tick
+        self.direction = DIRECTIONS[replay.changes[-1][1]] if replay.changes else None
+
+    def finish(self, score):
+        self.replay.score = score
+        return self.replay
+
+# ---------------- PLAYBACK ----------------
+def open_replay_pack(pack_id):
+    """The level pack a replay was recorded with, from the compile cache,
+    ``levels/`` or $SNAKE_LEVEL_PACK; ValueError if it has changed since"""
+    custom = os.environ.get("SNAKE_LEVEL_PACK")
+    pack = levelpack.find_pack(pack_id, [custom] if custom else [])
+    if pack is None:
+        raise ValueError(f"level pack {pack_id.partition('@')[0]!r} has changed or moved "
+                         f"since the replay was recorded")
+    return pack
+
+
+def new_state(mode, level, total_score, rng, pack=None):
+    if mode == "level":
+        if pack is not None:
+            return engine.new_level(level, total_score, rng=rng, layout=pack.level(level).layout())
+        return engine.new_level(level, total_score, rng=rng)
+    if mode == "world":
+        return engine.new_world(rng=rng)
+    return engine.new_survival(rng=rng)
+
+
+def simulate(replay):
+    """Re-run a replay headless; returns (final state, ticks simulated)"""
+    rng = random.Random(replay.seed)
+    level = replay.level
+    pack = open_replay_pack(replay.pack) if replay.pack else None
+    last = len(pack) if pack is not None else len(engine.LEVELS)
+    state = new_state(replay.mode, level, 0, rng, pack)
+    changes = replay.changes
+    i, count = 0, len(changes)
+    restores = iter(replay.restores)
+    restore = next(restores, None)
+    direction = state.direction
+    step = engine.step
+    for tick in range(replay.ticks):
+        if tick == restore:
+            engine.reindex_free(state)
+            restore = next(restores, None)
+        if i < count and changes[i][0] == tick:
+            direction = DIRECTIONS[changes[i][1]]
+            i += 1
+        # set every tick: a new level resets the snake's heading
+        state.direction = direction
+        step(state)
+        if state.result == engine.NEXT:
+            if level == last:
+                return state, tick + 1
+            level += 1
+            state = new_state(replay.mode, level, state.score, rng, pack)
+        elif state.result == engine.OVER:
+            return state, tick + 1
+    return state, replay.ticks
+
+
+def verify(replay):
+    """True if the replay ends on its last tick with the recorded score"""
+    state, ticks = simulate(replay)
+    return state.result == engine.OVER and ticks == replay.ticks and state.score == replay.score
+
+
+def _verify_file(path):
+    try:
+        return path, verify(Replay.load(path))
+    except (OSError, ValueError, IndexError):
+        return path, False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify replay files against their saved scores")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.jobs > 1:
+        with ProcessPoolExecutor(args.jobs) as pool:
+            results = list(pool.map(_verify_file, args.files, chunksize=64))
+    else:
+        results = [_verify_file(path) for path in args.files]
+    elapsed = time.perf_counter() - start
+
+    failed = [path for path, ok in results if not ok]
+    for path in failed:
+        print(f"FAILED {path}")
+    print(f"{len(results) - len(failed)}/{len(results)} verified "
+          f"in {elapsed:.2f}s ({len(results) / elapsed:,.0f} replays/s)")
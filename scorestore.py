@@ -0,0 +1,181 @@
+"""Crash-safe high score storage shared by every running game.
+
+Each score is appended as one JSON line to ``scores.log``, an append-only
+journal that is the full score history, so saving a score costs one small
+write however many scores exist. The per-mode top-K tables are kept in
+memory and caught up from the journal, and every ``compact_every`` scores
+they are written to ``scores.json`` (temp file + atomic rename) together
+with the journal offset they cover, so startup only reads the journal's
+tail. A crash can leave at worst a torn last journal line, which is
+skipped; ``scores.json`` is never half-written.
+
+Writers hold an exclusive lock on ``scores.lock`` (``flock`` or
+``msvcrt.locking``) so two game instances never lose each other's scores.
+Files live in ``DATA_DIR``: next to the game (or its frozen executable),
+or ``$SNAKE_DATA_DIR`` when set, never relative to the working directory.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+if getattr(sys, "frozen", False):
+    _HOME = os.path.dirname(sys.executable)
+else:
+    _HOME = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get("SNAKE_DATA_DIR", _HOME)
+
+MODES = ("level", "survival", "world")
+TOP_K = 5
+COMPACT_EVERY = 64  # journal records between snapshot rewrites
+
+# ---------------- LOCKING ----------------
+@contextmanager
+def file_lock(path):
+    """Exclusive lock across processes for the duration of the block"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s
+                    pass
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, data):
+    """Replace ``path`` with ``data`` so readers see the old or new file, never half"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+# ---------------- STORE ----------------
+class ScoreStore:
+    """Per-mode top-K tables backed by a journal of every score"""
+
+    def __init__(self, directory=DATA_DIR, keep=TOP_K, compact_every=COMPACT_EVERY):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, "scores.json")
+        self.journal_path = os.path.join(directory, "scores.log")
+        self.lock_path = os.path.join(directory, "scores.lock")
+        self.keep = keep
+        self.compact_every = compact_every
+        self.top = {mode: [] for mode in MODES}
+        self.offset = 0  # journal bytes already folded into self.top
+        self.pending = 0  # journal records newer than the snapshot
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for mode, scores in data.items():
+            if isinstance(scores, list):
+                self.top[mode] = sorted(scores, reverse=True)[:self.keep]
+        self.offset = data.get("offset", 0)
+
+    def _fold(self, mode, score):
+        top = self.top.setdefault(mode, [])
+        if len(top) < self.keep or score > top[-1]:
+            top.append(score)
+            top.sort(reverse=True)
+            del top[self.keep:]
+
+    def _catch_up(self):
+        """Fold in journal records appended since we last looked"""
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return
+        end = data.rfind(b"\n") + 1  # a torn last line waits (or is skipped)
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+                self._fold(record["mode"], record["score"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            self.pending += 1
+        self.offset += end
+
+    def scores(self):
+        """{mode: top scores, best first}"""
+        self._catch_up()
+        return {mode: list(top) for mode, top in self.top.items()}
+
+    def add(self, mode, score):
+        """Record a finished game; safe with other processes doing the same"""
+        self.add_many([(mode, score)])
+
+    def add_many(self, scores):
+        """Record several (mode, score) pairs with one locked write and fsync"""
+        os.makedirs(self.directory, exist_ok=True)
+        now = round(time.time())
+        data = "".join(json.dumps({"mode": mode, "score": score, "time": now}) + "\n"
+                       for mode, score in scores).encode()
+        with file_lock(self.lock_path):
+            self._catch_up()
+            with open(self.journal_path, "ab") as f:
+                if f.tell() > self.offset:  # torn line left by a crash
+                    f.write(b"\n")
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                self.offset = f.tell()
+            for mode, score in scores:
+                self._fold(mode, score)
+                self.pending += 1
+            if self.pending >= self.compact_every:
+                self._compact()
+
+    def compact(self):
+        """Rewrite the top-K snapshot so startup skips the journal read so far"""
+        os.makedirs(self.directory, exist_ok=True)
+        with file_lock(self.lock_path):
+            self._catch_up()
+            self._compact()
+
+    def _compact(self):
+        data = dict(self.top, offset=self.offset)
+        atomic_write(self.snapshot_path, json.dumps(data).encode())
+        self.pending = 0
+
+    def history(self, mode=None):
+        """Every recorded score, oldest first, as journal records"""
+        try:
+            with open(self.journal_path, "rb") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if mode is None or record.get("mode") == mode:
+                yield record
@@ -0,0 +1,264 @@
+"""Snake segment drawing and the pre-rendered sprite cache behind it.
+
+``draw_snake_segment()`` is the reference artwork. Its look depends only on
+the segment role and on which way its neighbours lie, so ``SnakeSprites``
+renders every variant once and ``draw_snake()`` draws the whole snake with
+a single ``Surface.blits()`` call, pixel-identical to drawing each segment.
+"""
+import pygame
+
+from engine import BLOCK
+
+# sprites are padded so the head's tongue can poke into the next cell
+PAD = 5
+
+# ---------------- SEGMENT ARTWORK ----------------
+def draw_snake_segment(surface, pos, is_head=False, is_tail=False, prev_pos=None, next_pos=None):
+    """Draw realistic snake segment with scales and texture"""
+    x, y = pos
+    
+    if is_head:
+        # HEAD - More detailed
+        # Base circle for head
+        pygame.draw.circle(surface, (40, 180, 100), (x + BLOCK//2, y + BLOCK//2), BLOCK//2)
+        pygame.draw.circle(surface, (50, 220, 120), (x + BLOCK//2, y + BLOCK//2), BLOCK//2 - 2)
+        
+        # Eyes
+        if prev_pos:
+            # Determine direction for eye placement
+            dx = x - prev_pos[0]
+            dy = y - prev_pos[1]
+            
+            if dx > 0:  # Moving right
+                eye1_pos = (x + 14, y + 6)
+                eye2_pos = (x + 14, y + 14)
+            elif dx < 0:  # Moving left
+                eye1_pos = (x + 6, y + 6)
+                eye2_pos = (x + 6, y + 14)
+            elif dy > 0:  # Moving down
+                eye1_pos = (x + 6, y + 14)
+                eye2_pos = (x + 14, y + 14)
+            else:  # Moving up
+                eye1_pos = (x + 6, y + 6)
+                eye2_pos = (x + 14, y + 6)
+        else:
+            eye1_pos = (x + 14, y + 6)
+            eye2_pos = (x + 14, y + 14)
+        
+        # Draw eyes
+        pygame.draw.circle(surface, (255, 255, 255), eye1_pos, 3)
+        pygame.draw.circle(surface, (0, 0, 0), eye1_pos, 2)
+        pygame.draw.circle(surface, (255, 255, 255), eye2_pos, 3)
+        pygame.draw.circle(surface, (0, 0, 0), eye2_pos, 2)
+        
+        # Tongue (small red forked line)
+        if prev_pos:
+            if dx > 0:  # Right
+                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK, y + BLOCK//2), (x + BLOCK + 4, y + BLOCK//2 - 2), 1)
+                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK, y + BLOCK//2), (x + BLOCK + 4, y + BLOCK//2 + 2), 1)
+            elif dx < 0:  # Left
+                pygame.draw.line(surface, (255, 50, 50), (x, y + BLOCK//2), (x - 4, y + BLOCK//2 - 2), 1)
+                pygame.draw.line(surface, (255, 50, 50), (x, y + BLOCK//2), (x - 4, y + BLOCK//2 + 2), 1)
+            elif dy > 0:  # Down
+                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK//2, y + BLOCK), (x + BLOCK//2 - 2, y + BLOCK + 4), 1)
+                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK//2, y + BLOCK), (x + BLOCK//2 + 2, y + BLOCK + 4), 1)
+            else:  # Up
+                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK//2, y), (x + BLOCK//2 - 2, y - 4), 1)
+                pygame.draw.line(surface, (255, 50, 50), (x + BLOCK//2, y), (x + BLOCK//2 + 2, y - 4), 1)
+    
+    elif is_tail:
+        # TAIL - Tapered end
+        if prev_pos:
+            # Determine tail direction
+            dx = prev_pos[0] - x
+            dy = prev_pos[1] - y
+            
+            # Base color for tail
+            tail_color = (35, 170, 90)
+            tail_tip_color = (25, 140, 70)
+            
+            if dx > 0:  # Tail pointing left
+                # Draw tapered polygon
+                points = [
+                    (x + BLOCK, y + 2),
+                    (x + BLOCK, y + BLOCK - 2),
+                    (x + 2, y + BLOCK//2)
+                ]
+                pygame.draw.polygon(surface, tail_color, points)
+                pygame.draw.polygon(surface, tail_tip_color, points, 2)
+                
+            elif dx < 0:  # Tail pointing right
+                points = [
+                    (x, y + 2),
+                    (x, y + BLOCK - 2),
+                    (x + BLOCK - 2, y + BLOCK//2)
+                ]
+                pygame.draw.polygon(surface, tail_color, points)
+                pygame.draw.polygon(surface, tail_tip_color, points, 2)
+                
+            elif dy > 0:  # Tail pointing up
+                points = [
+                    (x + 2, y + BLOCK),
+                    (x + BLOCK - 2, y + BLOCK),
+                    (x + BLOCK//2, y + 2)
+                ]
+                pygame.draw.polygon(surface, tail_color, points)
+                pygame.draw.polygon(surface, tail_tip_color, points, 2)
+                
+            else:  # Tail pointing down
+                points = [
+                    (x + 2, y),
+                    (x + BLOCK - 2, y),
+                    (x + BLOCK//2, y + BLOCK - 2)
+                ]
+                pygame.draw.polygon(surface, tail_color, points)
+                pygame.draw.polygon(surface, tail_tip_color, points, 2)
+            
+            # Add tip highlight
+            if dx > 0:
+                pygame.draw.circle(surface, (30, 150, 80), (x + 2, y + BLOCK//2), 2)
+            elif dx < 0:
+                pygame.draw.circle(surface, (30, 150, 80), (x + BLOCK - 2, y + BLOCK//2), 2)
+            elif dy > 0:
+                pygame.draw.circle(surface, (30, 150, 80), (x + BLOCK//2, y + 2), 2)
+            else:
+                pygame.draw.circle(surface, (30, 150, 80), (x + BLOCK//2, y + BLOCK - 2), 2)
+        else:
+            # Fallback if no prev_pos
+            pygame.draw.circle(surface, (35, 170, 90), (x + BLOCK//2, y + BLOCK//2), BLOCK//3)
+    
+    else:
+        # BODY - Scale pattern
+        # Base body color with gradient
+        rect = pygame.Rect(x + 1, y + 1, BLOCK - 2, BLOCK - 2)
+        
+        # Dark border for body segment
+        pygame.draw.rect(surface, (30, 150, 80), rect, border_radius=4)
+        
+        # Main body color
+        inner_rect = rect.inflate(-2, -2)
+        pygame.draw.rect(surface, (45, 200, 110), inner_rect, border_radius=3)
+        
+        # Scale pattern (diamond shapes)
+        center_x = x + BLOCK//2
+        center_y = y + BLOCK//2
+        
+        # Draw scale texture
+        scale_color = (35, 170, 90)
+        pygame.draw.circle(surface, scale_color, (center_x, center_y), 3)
+        
+        # Add some dots for texture
+        pygame.draw.circle(surface, (55, 220, 120), (x + 5, y + 5), 1)
+        pygame.draw.circle(surface, (55, 220, 120), (x + 15, y + 5), 1)
+        pygame.draw.circle(surface, (55, 220, 120), (x + 5, y + 15), 1)
+        pygame.draw.circle(surface, (55, 220, 120), (x + 15, y + 15), 1)
+        
+        # Belly stripe (lighter colored stripe in middle)
+        if prev_pos and next_pos:
+            dx_prev = x - prev_pos[0]
+            dy_prev = y - prev_pos[1]
+            dx_next = next_pos[0] - x
+            dy_next = next_pos[1] - y
+            
+            # Vertical movement
+            if dx_prev == 0 or dx_next == 0:
+                pygame.draw.rect(surface, (60, 240, 130), (x + 7, y + 2, 6, BLOCK - 4), border_radius=2)
+            # Horizontal movement
+            else:
+                pygame.draw.rect(surface, (60, 240, 130), (x + 2, y + 7, BLOCK - 4, 6), border_radius=2)
+
+
+# ---------------- SPRITE CACHE ----------------
+def _heading(dx, dy):
+    """Same precedence as the branches in draw_snake_segment()"""
+    if dx > 0:
+        return "R"
+    if dx < 0:
+        return "L"
+    if dy > 0:
+        return "D"
+    return "U"
+
+
+def segment_key(pos, is_head=False, is_tail=False, prev_pos=None, next_pos=None):
+    """Sprite variant that draw_snake_segment() would produce for these args"""
+    x, y = pos
+    if is_head:
+        if prev_pos is None:
+            return ("head", None)
+        return ("head", _heading(x - prev_pos[0], y - prev_pos[1]))
+    if is_tail:
+        if prev_pos is None:
+            return ("tail", None)
+        return ("tail", _heading(prev_pos[0] - x, prev_pos[1] - y))
+    if prev_pos is None or next_pos is None:
+        return ("body", None)
+    if x - prev_pos[0] == 0 or next_pos[0] - x == 0:
+        return ("body", "V")
+    return ("body", "H")
+
+
+# neighbour offsets that reproduce each variant when rendering it
+_OFFSETS = {"R": (-BLOCK, 0), "L": (BLOCK, 0), "D": (0, -BLOCK), "U": (0, BLOCK), None: None}
+
+
+def _render(key):
+    role, variant = key
+    surf = pygame.Surface((BLOCK + 2 * PAD, BLOCK + 2 * PAD), pygame.SRCALPHA)
+    pos = (PAD, PAD)
+    prev_pos = next_pos = None
+    if role == "body":
+        if variant == "V":
+            prev_pos, next_pos = (PAD, PAD - BLOCK), (PAD, PAD + BLOCK)
+        elif variant == "H":
+            prev_pos, next_pos = (PAD - BLOCK, PAD), (PAD + BLOCK, PAD)
+    elif variant is not None:
+        dx, dy = _OFFSETS[variant]
+        # heads look back at the neck, tails look forward at it
+        sign = 1 if role == "head" else -1
+        prev_pos = (PAD + sign * dx, PAD + sign * dy)
+    draw_snake_segment(surf, pos, is_head=(role == "head"), is_tail=(role == "tail"),
+                       prev_pos=prev_pos, next_pos=next_pos)
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert_alpha()
+    return surf
+
+
+class SnakeSprites:
+    """Every head, tail and body variant rendered once"""
+
+    def __init__(self):
+        self.sprites = {}
+        for role in ("head", "tail"):
+            for variant in ("R", "L", "D", "U", None):
+                self.sprites[(role, variant)] = _render((role, variant))
+        for variant in ("V", "H", None):
+            self.sprites[("body", variant)] = _render(("body", variant))
+
+    def __getitem__(self, key):
+        return self.sprites[key]
+
+
+_sprites = None
+
+
+def get_sprites():
+    """Shared sprite set, built on first use (after the display exists)"""
+    global _sprites
+    if _sprites is None:
+        _sprites = SnakeSprites()
+    return _sprites
+
+
+def draw_snake(surface, snake):
+    """Draw realistic snake segments including tail in one blits() batch"""
+    sprites = get_sprites()
+    segments = list(snake)
+    last = len(segments) - 1
+    batch = []
+    for i, pos in enumerate(segments):
+        prev_pos = segments[i-1] if i > 0 else None
+        next_pos = segments[i+1] if i < last else None
+        sprite = sprites[segment_key(pos, i == 0, i == last, prev_pos, next_pos)]
+        batch.append((sprite, (pos[0] - PAD, pos[1] - PAD)))
+    surface.blits(batch, doreturn=False)
@@ -0,0 +1,320 @@
+"""Compact game state snapshots: per-tick rewind and suspended games.
+
+A snapshot holds what changes while a game is played: the snake's cells
+and direction, the items, the game and magnet timers, score, apples,
+speed, how the game ended and the RNG state. Cells are board indices
+(``y // block * cols + x // block``), u16 on boards of up to 65536 cells
+and u32 above, packed into the buffer with one ``struct.pack_into``; a
+per-board table maps indices back to the engine's pixel tuples, so
+decoding a cell is one list lookup.
+
+What it leaves out is fixed for the whole game (board, obstacles, level
+target and speeds) or rebuilt: the free-cell index, whose order decides
+where the next item spawns, is rebuilt in board order by
+``engine.reindex_free`` and the replay notes the tick it happened on
+(``Recorder.restore``), so rewound and resumed runs still verify.
+
+The RNG is a Mersenne Twister: 624 words that only change once every 624
+draws, plus a position. ``RewindBuffer`` keeps each distinct word block
+once, in a small table, and a snapshot stores which block and the
+position. The buffer keeps one snapshot per tick for the last few seconds
+in memory allocated once: records are written back to back into a
+bytearray, wrap around at its end and push out the oldest ones.
+
+Save files hold the fixed part, one snapshot with its RNG words and the
+replay so far; ``SaveWriter`` writes them on a background thread.
+
+Layout (little-endian)::
+
+    snapshot: TICK snake[length] item_cells[items] item_kinds[items] (u8)
+    save:     b"SNKS" SAVE speeds[speeds] (u16) obstacles[obstacles]
+              words[624] (u32) snapshot replay
+"""
+import os
+import random
+import struct
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import engine
+from body import SnakeBody
+from freecells import board_cells
+from replay import Replay
+from scorestore import DATA_DIR, atomic_write
+
+MAGIC = b"SNKS"
+VERSION = 1
+SAVE_DIR = os.path.join(DATA_DIR, "saves")
+
+MODES = ("survival", "level", "world")
+KINDS = ("food", "bomb", "magnet", "scissor")
+RESULTS = (None, engine.OVER, engine.NEXT)
+DEATHS = (None, "wall", "self", "obstacle", "bomb", "full")
+
+# Rewind buffer: seconds of game time kept, at up to RATE ticks per second
+REWIND_SECONDS = 10
+RATE = 30
+RING_BYTES = 1 << 20
+RNG_BLOCKS = 4
+
+# time, magnet_time, score, apples, speed, direction, alive | magnet << 1,
+# result, death, snake length, items, RNG position, RNG block
+TICK = struct.Struct("<IIIHHBBBBIIHI")
+WORDS = struct.Struct("<624I")
+# version, mode, level, total score, width, height, block, need, speeds,
+# obstacles, item limits (KINDS order), replay length
+SAVE = struct.Struct("<BBHIIIHHHI4II")
+
+
+class Board:
+    """Cell <-> index tables for one board size"""
+
+    __slots__ = ("cells", "index", "code", "size", "directions")
+
+    def __init__(self, width, height, block):
+        self.cells = board_cells(width, height, block)
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        self.code = "H" if len(self.cells) <= 0x10000 else "I"
+        self.size = struct.calcsize(self.code)
+        self.directions = ((0, -block), (0, block), (-block, 0), (block, 0))
+
+
+@lru_cache(maxsize=4)
+def board(width, height, block):
+    return Board(width, height, block)
+
+# ---------------- SNAPSHOTS ----------------
+def snapshot_size(state, board):
+    """Bytes ``write`` needs for ``state``"""
+    return TICK.size + len(state.snake) * board.size + len(state.items) * (board.size + 1)
+
+
+def write(state, board, buf, pos, rng_block, rng_pos):
+    """Encode ``state`` into ``buf`` at ``pos``; returns the end position"""
+    segments = state.snake.segments
+    items = state.items.cells
+    n, m = len(segments), len(items)
+    TICK.pack_into(buf, pos, state.time, state.magnet_time, state.score, state.apples, state.speed,
+                   board.directions.index(state.direction), state.alive | state.magnet_active << 1,
+                   RESULTS.index(state.result), DEATHS.index(state.death), n, m, rng_pos, rng_block)
+    pos += TICK.size
+    index = board.index.__getitem__
+    struct.pack_into(f"<{n}{board.code}", buf, pos, *map(index, segments))
+    pos += n * board.size
+    struct.pack_into(f"<{m}{board.code}", buf, pos, *map(index, items))
+    pos += m * board.size
+    struct.pack_into(f"{m}B", buf, pos, *map(KINDS.index, items.values()))
+    return pos + m
+
+
+def read(state, board, data, pos, words):
+    """Put ``state`` back to the snapshot at ``data[pos]``, drawing the RNG
+    words from ``words(block)``; returns the end position"""
+    (state.time, state.magnet_time, state.score, state.apples, state.speed, direction, flags,
+     result, death, n, m, rng_pos, rng_block) = TICK.unpack_from(data, pos)
+    pos += TICK.size
+    state.direction = board.directions[direction]
+    state.alive, state.magnet_active = bool(flags & 1), bool(flags & 2)
+    state.result, state.death = RESULTS[result], DEATHS[death]
+
+    cell = board.cells.__getitem__
+    state.snake = SnakeBody(map(cell, struct.unpack_from(f"<{n}{board.code}", data, pos)))
+    pos += n * board.size
+    cells = struct.unpack_from(f"<{m}{board.code}", data, pos)
+    pos += m * board.size
+    kinds = data[pos:pos + m]
+    items = state.items
+    items.clear()
+    for i, kind in zip(cells, kinds):
+        items.add(cell(i), KINDS[kind])
+
+    state.rng.setstate((3, words(rng_block) + (rng_pos,), None))
+    engine.reindex_free(state)
+    return pos + m
+
+
+def _rng_words(rng):
+    """(624 words, position) of a Random; engine games never use gauss()"""
+    words = rng.getstate()[1]
+    return words[:-1], words[-1]
+
+# ---------------- REWIND ----------------
+class RewindBuffer:
+    """Snapshots of every tick of the last ``seconds`` of game time, in a
+    buffer allocated once"""
+
+    def __init__(self, seconds=REWIND_SECONDS, size=RING_BYTES, rate=RATE, blocks=RNG_BLOCKS):
+        slots = seconds * rate
+        self.data = bytearray(size)
+        self.slots = slots
+        self.start = array("I", bytes(4 * slots))  # byte range of each record
+        self.end = array("I", bytes(4 * slots))
+        self.tick = array("I", bytes(4 * slots))  # replay ticks played when it was taken
+        self.time = array("I", bytes(4 * slots))  # state.time, to find how far back to go
+        self.block = array("I", bytes(4 * slots))  # RNG word block it uses
+        self.words = bytearray(WORDS.size * blocks)
+        self.blocks = blocks
+        self.board = None
+        self.reset()
+
+    def __len__(self):
+        return self.count
+
+    def reset(self, state=None, tick=0):
+        """Forget every snapshot; with a ``state``, start a new game with it"""
+        self.first = self.count = 0  # slot of the oldest record, records kept
+        self.head = 0  # where the next record goes
+        self.key = None  # the newest RNG word block stored
+        self.serial = -1  # its number; block n lives in slot n % blocks
+        if state is not None:
+            self.board = board(state.width, state.height, state.block)
+            self.record(state, tick)
+
+    def record(self, state, tick):
+        """Snapshot ``state`` after ``tick`` ticks of the run"""
+        key, rng_pos = _rng_words(state.rng)
+        if key != self.key:
+            self.serial += 1
+            # its table slot is taken over from block serial - blocks
+            while self.count and self.block[self.first] <= self.serial - self.blocks:
+                self._drop()
+            WORDS.pack_into(self.words, self.serial % self.blocks * WORDS.size, *key)
+            self.key = key
+
+        size = snapshot_size(state, self.board)
+        if size > len(self.data):  # too big to keep even alone
+            self.first = self.count = self.head = 0
+            return
+        pos = self.head
+        if pos + size > len(self.data):  # wrap; the records past the head are the oldest
+            while self.count and self.start[self.first] >= self.head:
+                self._drop()
+            pos = 0
+        end = pos + size
+        while self.count and (self.count == self.slots or
+                              (self.start[self.first] < end and self.end[self.first] > pos)):
+            self._drop()
+
+        slot = (self.first + self.count) % self.slots
+        write(state, self.board, self.data, pos, self.serial, rng_pos)
+        self.start[slot], self.end[slot] = pos, end
+        self.tick[slot], self.time[slot], self.block[slot] = tick, state.time, self.serial
+        self.count += 1
+        self.head = end
+
+    def _drop(self):
+        """Forget the oldest record"""
+        self.first = (self.first + 1) % self.slots
+        self.count -= 1
+
+    def rewind(self, state, ms):
+        """Put ``state`` back ``ms`` of game time (or as far as the buffer
+        goes) and drop the snapshots after it; returns the tick it is at"""
+        target = state.time - ms
+        n = self.count - 1
+        while n and self.time[(self.first + n) % self.slots] > target:
+            n -= 1
+        slot = (self.first + n) % self.slots
+        self.count = n + 1
+        self.head = self.end[slot]
+        words = lambda block: WORDS.unpack_from(self.words, block % self.blocks * WORDS.size)
+        read(state, self.board, self.data, self.start[slot], words)
+        return self.tick[slot]
+
+# ---------------- SAVE FILES ----------------
+def dump(state, replay):
+    """A save file for ``state`` and the ``replay`` recorded up to it"""
+    b = board(state.width, state.height, state.block)
+    recorded = replay.to_bytes()
+    key, rng_pos = _rng_words(state.rng)
+    obstacles = sorted(map(b.index.__getitem__, state.obstacles))
+    limits = [state.limits.get(kind, 0) for kind in KINDS]
+    out = bytearray(len(MAGIC) + SAVE.size + 2 * len(state.speeds) + b.size * len(obstacles)
+                    + snapshot_size(state, b) + WORDS.size + len(recorded))
+    out[:4] = MAGIC
+    SAVE.pack_into(out, 4, VERSION, MODES.index(state.mode), state.level, state.total_score,
+                   state.width, state.height, state.block, state.need, len(state.speeds),
+                   len(obstacles), *limits, len(recorded))
+    pos = 4 + SAVE.size
+    struct.pack_into(f"<{len(state.speeds)}H", out, pos, *state.speeds)
+    pos += 2 * len(state.speeds)
+    struct.pack_into(f"<{len(obstacles)}{b.code}", out, pos, *obstacles)
+    pos += b.size * len(obstacles)
+    WORDS.pack_into(out, pos, *key)
+    pos = write(state, b, out, pos + WORDS.size, 0, rng_pos)
+    out[pos:] = recorded
+    return bytes(out)
+
+
+def load(data):
+    """(state, replay) from a save file; ValueError if it is not one"""
+    if data[:4] != MAGIC:
+        raise ValueError("not a save file")
+    try:
+        (version, mode, level, total_score, width, height, block, need, speeds, obstacles,
+         *limits, recorded) = SAVE.unpack_from(data, 4)
+        if version != VERSION:
+            raise ValueError(f"unsupported save version {version}")
+        b = board(width, height, block)
+        state = engine.GameState.__new__(engine.GameState)
+        state.mode, state.level, state.total_score = MODES[mode], level, total_score
+        state.width, state.height, state.block = width, height, block
+        state.need = need
+        state.limits = dict(zip(KINDS, limits))
+        state.rng = random.Random()
+        state.items = engine.new_items(block)
+        pos = 4 + SAVE.size
+        state.speeds = struct.unpack_from(f"<{speeds}H", data, pos)
+        pos += 2 * speeds
+        state.obstacles = set(map(b.cells.__getitem__,
+                                  struct.unpack_from(f"<{obstacles}{b.code}", data, pos)))
+        pos += b.size * obstacles
+        words = WORDS.unpack_from(data, pos)
+        pos = read(state, b, data, pos + WORDS.size, lambda block: words)
+        replay = Replay.from_bytes(data[pos:pos + recorded])
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"corrupt save file: {e}") from None
+    return state, replay
+
+
+class SaveWriter:
+    """Suspended games, one per mode; files are written on a background thread"""
+
+    def __init__(self, directory=SAVE_DIR):
+        self.directory = directory
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+        self.pending = {}  # path -> Future of its latest write
+
+    def path(self, mode):
+        return os.path.join(self.directory, f"{mode}.snks")
+
+    def save(self, state, replay):
+        """Suspend ``state``; it is encoded now and written in the background"""
+        path = self.path(state.mode)
+        self.pending[path] = self.pool.submit(self._write, path, dump(state, replay))
+
+    def _write(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(path, data)
+
+    def take(self, mode):
+        """The game suspended in ``mode`` as (state, replay), removing it;
+        None if there is none or it cannot be read"""
+        path = self.path(mode)
+        future = self.pending.pop(path, None)
+        if future is not None:
+            future.exception()  # wait for it; a failed write leaves no file
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.remove(path)
+        except OSError:
+            return None
+        try:
+            return load(data)
+        except ValueError:
+            return None
+
+    def close(self):
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,119 @@
+"""Procedural sound effects, synthesized a whole buffer at a time.
+
+Each effect is a small spec: waveform, start and end frequency (a linear
+sweep), duration, volume and an ADSR envelope. ``samples()`` turns a spec
+into signed 16-bit mono samples; with NumPy the waveform and envelope are
+computed as arrays in a few calls, without it in one list comprehension
+into an ``array`` (never a call per sample into ``struct`` or ``wave``).
+
+``generate_asset.py`` writes these to ``assets/sounds`` at build time, and
+``make_sound()`` can instead build a ``pygame.mixer.Sound`` straight from
+the buffer at runtime, with no files involved.
+"""
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 44100
+VERSION = 1  # bump when the synthesis itself changes, to rebuild cached assets
+
+# name -> spec; omitted keys take the defaults from DEFAULT_SPEC
+SOUNDS = {
+    "eat.wav": {"freq": 600, "freq_end": 900, "duration": 0.12,
+                "envelope": (0.005, 0.04, 0.6, 0.05)},
+    "bomb.wav": {"wave": "square", "freq": 150, "freq_end": 40, "duration": 0.45,
+                 "volume": 0.6, "envelope": (0.002, 0.15, 0.4, 0.25)},
+    "power.wav": {"wave": "triangle", "freq": 700, "freq_end": 1400, "duration": 0.3,
+                  "envelope": (0.01, 0.05, 0.8, 0.1)},
+    "gameover.wav": {"wave": "saw", "freq": 300, "freq_end": 110, "duration": 0.8,
+                     "volume": 0.5, "envelope": (0.01, 0.2, 0.7, 0.3)},
+}
+DEFAULT_SPEC = {"wave": "sine", "freq": 440, "freq_end": None, "duration": 0.25,
+                "volume": 1.0, "envelope": None}  # envelope: (attack, decay, sustain, release)
+
+
+def spec_for(name):
+    return dict(DEFAULT_SPEC, **SOUNDS[name])
+
+# ---------------- SYNTHESIS ----------------
+def _envelope_points(spec):
+    """(time, gain) breakpoints of the ADSR envelope"""
+    duration = spec["duration"]
+    if spec["envelope"] is None:
+        return [0.0, duration], [1.0, 1.0]
+    attack, decay, sustain, release = spec["envelope"]
+    release_at = max(attack + decay, duration - release)
+    return [0.0, attack, attack + decay, release_at, duration], [0.0, 1.0, sustain, sustain, 0.0]
+
+
+def samples(spec, rate=SAMPLE_RATE):
+    """Signed 16-bit mono samples for ``spec`` as an ``array("h")``"""
+    n = int(rate * spec["duration"])
+    f0 = spec["freq"]
+    f1 = spec["freq_end"] if spec["freq_end"] is not None else f0
+    duration = spec["duration"]
+    times, gains = _envelope_points(spec)
+    shape = spec["wave"]
+    peak = 32767 * spec["volume"]
+
+    if np is not None:
+        t = np.arange(n) / rate
+        cycles = f0 * t + (f1 - f0) * t * t / (2 * duration)  # integral of the sweep
+        if shape == "sine":
+            wave = np.sin(2 * np.pi * cycles)
+        elif shape == "square":
+            wave = np.sign(np.sin(2 * np.pi * cycles))
+        elif shape == "saw":
+            wave = 2 * (cycles % 1.0) - 1
+        else:  # triangle
+            wave = 1 - 4 * np.abs((cycles + 0.25) % 1.0 - 0.5)
+        out = (peak * wave * np.interp(t, times, gains)).astype(np.int16)
+        return array("h", out.tobytes())
+
+    def envelope(t):
+        for k in range(1, len(times)):
+            if t <= times[k]:
+                span = times[k] - times[k - 1]
+                w = (t - times[k - 1]) / span if span else 1.0
+                return gains[k - 1] + (gains[k] - gains[k - 1]) * w
+        return gains[-1]
+
+    def wave(c):
+        if shape == "sine":
+            return math.sin(2 * math.pi * c)
+        if shape == "square":
+            s = math.sin(2 * math.pi * c)
+            return (s > 0) - (s < 0)
+        if shape == "saw":
+            return 2 * (c % 1.0) - 1
+        return 1 - 4 * abs((c + 0.25) % 1.0 - 0.5)
+
+    k = (f1 - f0) / (2 * duration)
+    return array("h", [int(peak * wave(f0 * t + k * t * t) * envelope(t))
+                       for t in (i / rate for i in range(n))])
+
+
+def pcm(spec, rate=SAMPLE_RATE, channels=1):
+    """Native-endian 16-bit PCM, the mono samples repeated per channel"""
+    mono = samples(spec, rate)
+    if channels > 1:
+        if np is not None:
+            mono = array("h", np.repeat(np.frombuffer(mono, np.int16), channels).tobytes())
+        else:
+            mono = array("h", [s for s in mono for _ in range(channels)])
+    return mono.tobytes()
+
+# ---------------- RUNTIME ----------------
+def make_sound(name):
+    """``pygame.mixer.Sound`` for effect ``name`` built in memory, or None if
+    the mixer isn't running signed 16-bit"""
+    import pygame
+
+    rate, fmt, channels = pygame.mixer.get_init()
+    if fmt != -16:
+        return None
+    return pygame.mixer.Sound(buffer=pcm(spec_for(name), rate, channels))
@@ -0,0 +1,81 @@
+"""Shared fonts and cached text surfaces.
+
+Every screen used to call ``font.render`` twice per string per frame (text
+and shadow) even when nothing changed. Here fonts come from one registry and
+rendered strings, including the text+shadow pair, are kept in a bounded LRU
+cache, so a steady-state frame rasterizes nothing. The hit/miss counters
+make that easy to check.
+
+The pair is stored as two surfaces drawn with one ``blits()`` call rather
+than flattened into one: flattening two antialiased layers onto a
+transparent surface changes the edge pixels.
+"""
+from collections import OrderedDict
+
+import pygame
+
+SHADOW_COLOR = (0, 0, 0)
+
+# ---------------- FONTS ----------------
+_fonts = {}
+
+def get_font(name="arial", size=26, bold=False):
+    """Shared SysFont instance, created once per (name, size, bold)"""
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+# ---------------- TEXT CACHE ----------------
+class TextCache:
+    """Bounded LRU of rendered text surfaces"""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key, build):
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = self.surfaces[key] = build()
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def text(self, font, text, color):
+        """Antialiased ``font.render(text, True, color)``"""
+        return self._get((font, text, tuple(color), None),
+                         lambda: font.render(text, True, color))
+
+    def shadowed(self, font, text, color, shadow_offset=2):
+        """(shadow, text) surface pair for draw_text_with_shadow()"""
+        return self._get((font, text, tuple(color), shadow_offset),
+                         lambda: (font.render(text, True, SHADOW_COLOR),
+                                  font.render(text, True, color)))
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.surfaces)}
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = self.misses = 0
+
+
+cache = TextCache()
+
+def render_text(font, text, color):
+    """Cached replacement for ``font.render(text, True, color)``"""
+    return cache.text(font, text, color)
+
+def draw_text_with_shadow(surface, text, font, color, x, y, shadow_offset=2):
+    """Draw text with shadow effect"""
+    shadow, text_surf = cache.shadowed(font, text, color, shadow_offset)
+    surface.blits(((shadow, (x + shadow_offset, y + shadow_offset)),
+                   (text_surf, (x, y))), doreturn=False)
@@ -0,0 +1,49 @@
+"""Fixed-timestep timing for the game loops.
+
+The simulation advances in whole ticks at the game's logical speed
+(``state.speed`` ticks per second) while frames are drawn at display rate.
+Each frame ``FixedStep.advance(dt)`` adds the real elapsed time to an
+accumulator and returns how many ticks to run; ``alpha`` is how far the
+frame sits between the last tick and the next, for interpolated drawing.
+
+A slow frame can't make the simulation spiral: the frame time counted is
+capped at ``max_frame`` ms and at most ``max_steps`` ticks run per frame.
+Time beyond that is dropped (the game briefly slows down instead) and
+counted in ``dropped``.
+"""
+
+
+class FixedStep:
+    """Accumulator turning frame times into simulation ticks"""
+
+    def __init__(self, rate, max_steps=3, max_frame=250):
+        self.rate = rate  # ticks per second; may change between frames
+        self.max_steps = max_steps
+        self.max_frame = max_frame
+        self.acc = 0.0  # ms not yet simulated
+        self.dropped = 0  # ticks skipped by the catch-up limit
+
+    @property
+    def interval(self):
+        return 1000 / self.rate
+
+    def advance(self, dt):
+        """Add ``dt`` ms of real time; returns the number of ticks to run"""
+        interval = self.interval
+        self.acc += min(dt, self.max_frame)
+        steps = int(self.acc // interval)
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+            self.acc %= interval
+        else:
+            self.acc -= steps * interval
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of the way from the last tick to the next"""
+        return min(1.0, self.acc / self.interval)
+
+    def reset(self):
+        self.acc = 0.0
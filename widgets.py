@@ -0,0 +1,258 @@
+"""Retained-mode UI widgets shared by the menu, high score and game over screens.
+
+Each widget renders itself once per visual state (normal / hover / selected)
+into a cached surface and re-renders only when that state or its text
+changes, so a steady-state frame is a handful of blits with no surface
+allocation.
+"""
+import pygame
+
+from textcache import draw_text_with_shadow, render_text
+
+# ---------------- COLORS ----------------
+TEXT_COLOR = (255, 255, 255)
+PANEL_COLOR = (25, 25, 50)
+HIGHLIGHT_COLOR = (80, 200, 255)
+SHADOW_ALPHA = 100
+
+NORMAL, HOVER, SELECTED = "normal", "hover", "selected"
+
+
+class Widget:
+    """Something drawn at ``rect`` from a cache of pre-rendered states"""
+
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        self.state = NORMAL
+        self.cache = {}
+
+    def invalidate(self):
+        self.cache.clear()
+
+    def surface_for(self, state):
+        surf = self.cache.get(state)
+        if surf is None:
+            surf = self.cache[state] = self.render(state)
+        return surf
+
+    def render(self, state):
+        raise NotImplementedError
+
+    def draw(self, surface):
+        surface.blit(self.surface_for(self.state), self.rect)
+
+
+# ---------------- PANEL ----------------
+class Panel(Widget):
+    """Semi-transparent panel with a rounded highlight border"""
+
+    def __init__(self, rect, alpha=200, color=PANEL_COLOR, border=HIGHLIGHT_COLOR,
+                 border_width=2, radius=10):
+        super().__init__(rect)
+        self.alpha = alpha
+        self.color = color
+        self.border = border
+        self.border_width = border_width
+        self.radius = radius
+
+    def render(self, state):
+        surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        surf.fill((*self.color, self.alpha))
+        pygame.draw.rect(surf, self.border, surf.get_rect(), self.border_width,
+                         border_radius=self.radius)
+        return surf
+
+
+class Backdrop(Widget):
+    """Full-screen background with nested translucent panels, baked once"""
+
+    def __init__(self, size, color, panel_color=PANEL_COLOR, alphas=(), inset=50):
+        super().__init__(((0, 0), size))
+        self.color = color
+        self.panel_color = panel_color
+        self.alphas = alphas
+        self.inset = inset
+
+    def render(self, state):
+        surf = pygame.Surface(self.rect.size)
+        surf.fill(self.color)
+        w, h = self.rect.size
+        for i, alpha in enumerate(self.alphas):
+            layer = pygame.Surface((w - i * 2 * self.inset, h - i * 2 * self.inset))
+            layer.set_alpha(alpha)
+            layer.fill(self.panel_color)
+            surf.blit(layer, (i * self.inset, i * self.inset))
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert()
+        return surf
+
+
+# ---------------- BUTTON ----------------
+class ButtonStyle:
+    """Colors and shape of a button in each state"""
+
+    def __init__(self, font, color, hover_color, border, hover_border,
+                 text_color=TEXT_COLOR, hover_text=TEXT_COLOR, alpha=240,
+                 border_width=3, hover_border_width=3, radius=10,
+                 shadow_offset=0, glow=False):
+        self.font = font
+        self.color = color
+        self.hover_color = hover_color
+        self.border = border
+        self.hover_border = hover_border
+        self.text_color = text_color
+        self.hover_text = hover_text
+        self.alpha = alpha
+        self.border_width = border_width
+        self.hover_border_width = hover_border_width
+        self.radius = radius
+        self.shadow_offset = shadow_offset
+        self.glow = glow  # extra outline around hovered buttons
+
+    @property
+    def pad(self):
+        return max(self.shadow_offset, 2 if self.glow else 0)
+
+
+class Button(Widget):
+    """Clickable button; hover and selected share the highlighted look"""
+
+    def __init__(self, rect, text, style, action=None):
+        super().__init__(rect)
+        self.text = text
+        self.style = style
+        self.action = action
+
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.invalidate()
+
+    def update(self, mouse_pos, selected=False):
+        """Pick the visual state from the mouse and selection"""
+        if selected:
+            self.state = SELECTED
+        elif self.rect.collidepoint(mouse_pos):
+            self.state = HOVER
+        else:
+            self.state = NORMAL
+        return self.state
+
+    @property
+    def hovered(self):
+        return self.state == HOVER
+
+    def render(self, state):
+        style = self.style
+        lit = state != NORMAL
+        pad = style.pad
+        w, h = self.rect.size
+        surf = pygame.Surface((w + 2 * pad, h + 2 * pad), pygame.SRCALPHA)
+        local = pygame.Rect(pad, pad, w, h)
+
+        # Button shadow
+        if style.shadow_offset:
+            shadow = pygame.Surface((w, h), pygame.SRCALPHA)
+            shadow.fill((0, 0, 0, SHADOW_ALPHA))
+            surf.blit(shadow, local.move(style.shadow_offset, style.shadow_offset))
+
+        # Button background
+        background = pygame.Surface((w, h), pygame.SRCALPHA)
+        background.fill((*(style.hover_color if lit else style.color), style.alpha))
+        surf.blit(background, local)
+
+        # Button border with glow effect
+        border = style.hover_border if lit else style.border
+        width = style.hover_border_width if lit else style.border_width
+        pygame.draw.rect(surf, border, local, width, border_radius=style.radius)
+        if lit and style.glow:
+            pygame.draw.rect(surf, border, local.inflate(4, 4), 2, border_radius=style.radius + 2)
+
+        # Button text
+        text_surf = render_text(style.font, self.text, style.hover_text if lit else style.text_color)
+        surf.blit(text_surf, text_surf.get_rect(center=local.center))
+
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert_alpha()
+        return surf
+
+    def draw(self, surface):
+        pad = self.style.pad
+        surface.blit(self.surface_for(self.state), (self.rect.x - pad, self.rect.y - pad))
+
+
+# ---------------- LABEL ----------------
+class Label:
+    """Single line of (optionally shadowed) text at a fixed spot"""
+
+    def __init__(self, text, font, color, pos, shadow_offset=0, center=False):
+        self.text = text
+        self.font = font
+        self.color = color
+        self.pos = pos
+        self.shadow_offset = shadow_offset
+        self.center = center
+
+    def set_text(self, text, color=None):
+        self.text = text
+        if color is not None:
+            self.color = color
+
+    def draw(self, surface):
+        x, y = self.pos
+        if self.center:
+            w, h = self.font.size(self.text)
+            x, y = x - w // 2, y - h // 2
+        if self.shadow_offset:
+            draw_text_with_shadow(surface, self.text, self.font, self.color, x, y, self.shadow_offset)
+        else:
+            surface.blit(render_text(self.font, self.text, self.color), (x, y))
+
+
+# ---------------- SCORE TABLE ----------------
+class ScoreTable(Widget):
+    """Ranked score rows inside a panel, re-rendered only when scores change"""
+
+    def __init__(self, rect, font, rank_color, rows=5, text_color=TEXT_COLOR,
+                 empty_text="No scores yet!", empty_color=(150, 150, 150),
+                 line_color=(60, 60, 80), row_height=60):
+        super().__init__(rect)
+        self.font = font
+        self.rank_color = rank_color  # rank_color(index) -> color
+        self.rows = rows
+        self.text_color = text_color
+        self.empty_text = empty_text
+        self.empty_color = empty_color
+        self.line_color = line_color
+        self.row_height = row_height
+        self.scores = ()
+
+    def set_scores(self, scores):
+        scores = tuple(scores[:self.rows])
+        if scores != self.scores:
+            self.scores = scores
+            self.invalidate()
+
+    def render(self, state):
+        surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        if not self.scores:
+            text = render_text(self.font, self.empty_text, self.empty_color)
+            surf.blit(text, text.get_rect(center=(self.rect.w // 2, 160)))
+            return surf
+
+        y = 20
+        for i, score in enumerate(self.scores):
+            # Rank number with medal icon
+            if i < 3:
+                medal = ["🥇", "🥈", "🥉"][i]
+                rank_text = f"{medal} #{i+1}"
+            else:
+                rank_text = f"#{i+1}"
+            surf.blit(render_text(self.font, rank_text, self.rank_color(i)), (50, y))
+            surf.blit(render_text(self.font, f"{score:,}", self.text_color), (350, y))
+
+            # Separator line
+            if i < len(self.scores) - 1:
+                pygame.draw.line(surf, self.line_color, (30, y + 35), (self.rect.w - 30, y + 35), 2)
+            y += self.row_height
+        return surf
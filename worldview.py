@@ -0,0 +1,217 @@
+"""Scrolling camera view for boards larger than the window.
+
+World mode's board is hundreds of cells across, so the window shows only
+the part around the head. ``Camera`` keeps the (interpolated) head centred,
+clamped to the world's edges. The static layer, background plus rocks and
+their glows, is split into ``CHUNK`` x ``CHUNK``-cell chunks; a chunk is
+rendered to its own surface the first time it scrolls into view and kept in
+an LRU cache, so a frame is a handful of chunk blits. Rocks are bucketed by
+the chunks their sprites touch once per game, never per frame.
+
+Moving entities are culled to the view as well: items come from the buckets
+of the state's ``ItemGrid`` under the view, and snake segments from the
+renderer's tile map, probing the view's cells when the snake is longer than
+the view is big. Nothing a frame does depends on the world's area or, past
+the window's worth of cells, on the snake's length.
+
+The camera moves every frame, so ``WorldRenderer.render`` always returns the
+whole window; it reuses ``GameRenderer``'s incremental snake tile map and
+item sprites.
+"""
+from collections import OrderedDict
+
+import pygame
+
+from renderer import RING_COLOR, GameRenderer
+from snake_sprites import PAD, get_sprites
+
+CHUNK = 16  # cells per chunk side
+CHUNK_CACHE = 48  # chunk surfaces kept; a 800x600 view touches at most 12
+DOT_EVERY = 4  # cells between the background's guide dots
+EDGE_COLOR = (80, 200, 255)
+OUTSIDE_COLOR = (5, 5, 15)
+
+
+class Camera:
+    """Window position in world pixels, following a point"""
+
+    def __init__(self, view_size, world_size):
+        self.width, self.height = view_size
+        self.world_width, self.world_height = world_size
+        self.x = self.y = 0
+
+    def _clamp(self, pos, view, world):
+        if world <= view:
+            return (world - view) // 2  # smaller than the window: centre it
+        return max(0, min(pos, world - view))
+
+    def follow(self, x, y):
+        """Centre the view on world point (x, y), staying inside the world"""
+        self.x = self._clamp(round(x) - self.width // 2, self.width, self.world_width)
+        self.y = self._clamp(round(y) - self.height // 2, self.height, self.world_height)
+
+
+class WorldRenderer(GameRenderer):
+    """Draws the part of a large world under the camera"""
+
+    def __init__(self, surface, art, bg_color, hud, hud_rect, ring_radius=0, block=20,
+                 stats=None, chunk=CHUNK, cache_size=CHUNK_CACHE):
+        self.chunk = chunk
+        self.chunk_px = chunk * block
+        self.cache_size = cache_size
+        self.chunks = OrderedDict()  # (cx, cy) -> surface, least recently used first
+        self.rocks = {}  # (cx, cy) -> obstacle cells whose sprite reaches into the chunk
+        self.source = None  # the obstacle set self.rocks was built from
+        self.camera = None
+        self.world = None  # (width, height) in pixels
+        super().__init__(surface, art, bg_color, hud, hud_rect, ring_radius, block,
+                         dirty=False, stats=stats)
+
+    def invalidate_static(self):
+        self.chunks.clear()
+        self.source = None
+        self.full = True
+
+    # ---------------- FRAME ----------------
+    def render(self, state, alpha=1.0):
+        """Draw the view around the head and return the window's rect"""
+        if state.obstacles is not self.source:
+            self._index_rocks(state)
+        if state.time != self.time or self.full:
+            self.time = state.time
+            self.slide_from = self.head if self._one_step(self.head, state.head) else None
+            self.tail_from = self._tail_from(state)
+            if self.full or not self._update_snake(state):
+                self._reset_snake(state)
+        self.head_pos = self._head_pos(alpha)
+        self.tail_pos = self._tail_pos(alpha)
+
+        half = self.block // 2
+        self.camera.follow(self.head_pos[0] + half, self.head_pos[1] + half)
+        screen_rect = self.surface.get_rect()
+        self._draw(state)
+        return [screen_rect]
+
+    def repaint(self, state, rect):
+        """Every frame is drawn whole, so there is nothing left to restore"""
+        return pygame.Rect(rect)
+
+    def _reset_snake(self, state):
+        self.full = False
+        self.tiles = self._snake_tiles(state.snake)
+        self.head, self.tail = state.snake.head, state.snake.tail
+        self.length = len(state.snake)
+
+    # ---------------- CHUNKS ----------------
+    def _index_rocks(self, state):
+        """Bucket the obstacles by every chunk their sprite overlaps"""
+        self.invalidate_static()
+        self.source = state.obstacles
+        self.camera = Camera(self.surface.get_size(), (state.width, state.height))
+        self.world = (state.width, state.height)
+        sprite, offset = self.item_sprites["obstacle"]
+        w, h = sprite.get_size()
+        size = self.chunk_px
+        rocks = {}
+        for x, y in state.obstacles:
+            for cy in range((y + offset) // size, (y + offset + h - 1) // size + 1):
+                for cx in range((x + offset) // size, (x + offset + w - 1) // size + 1):
+                    rocks.setdefault((cx, cy), []).append((x, y))
+        self.rocks = rocks
+
+    def _chunk(self, key):
+        """Surface of chunk ``key``, rendered on first use"""
+        surf = self.chunks.get(key)
+        if surf is not None:
+            self.chunks.move_to_end(key)
+            return surf
+        size, b = self.chunk_px, self.block
+        x0, y0 = key[0] * size, key[1] * size
+        world_w, world_h = self.world
+        surf = pygame.Surface((size, size))
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert()
+        surf.fill(OUTSIDE_COLOR)
+        inside = pygame.Rect(-x0, -y0, world_w, world_h)
+        surf.fill(self.bg_color, inside)
+
+        # faint guide dots so the scrolling shows on empty ground
+        dot = tuple(min(255, c + 25) for c in self.bg_color)
+        step = DOT_EVERY * b
+        for y in range(y0 - y0 % step, y0 + size, step):
+            for x in range(x0 - x0 % step, x0 + size, step):
+                if x < world_w and y < world_h:
+                    surf.fill(dot, (x - x0 + b // 2 - 1, y - y0 + b // 2 - 1, 2, 2))
+        pygame.draw.rect(surf, EDGE_COLOR, inside, 2)  # the walls
+
+        rocks = self.rocks.get(key)
+        if rocks:
+            sprite, offset = self.item_sprites["obstacle"]
+            surf.blits([(sprite, (x + offset - x0, y + offset - y0)) for x, y in rocks],
+                       doreturn=False)
+
+        self.chunks[key] = surf
+        if len(self.chunks) > self.cache_size:
+            self.chunks.popitem(last=False)
+        return surf
+
+    # ---------------- DRAWING ----------------
+    def _draw(self, state):
+        surface = self.surface
+        lap = self.stats.lap
+        cam = self.camera
+        b, m = self.block, self.margin
+        size = self.chunk_px
+
+        # Static chunks under the view
+        batch = []
+        for cy in range(cam.y // size, (cam.y + cam.height - 1) // size + 1):
+            for cx in range(cam.x // size, (cam.x + cam.width - 1) // size + 1):
+                batch.append((self._chunk((cx, cy)), (cx * size - cam.x, cy * size - cam.y)))
+        surface.blits(batch, doreturn=False)
+        lap("background")
+
+        # Cells whose drawing can reach into the view
+        left = (cam.x - m) // b * b
+        top = (cam.y - m) // b * b
+        right, bottom = cam.x + cam.width + m, cam.y + cam.height + m
+
+        # Snake: the sliding tail under it all, the head at its sliding
+        # position, then the visible segments
+        sprites = get_sprites()
+        tiles = self.tiles
+        head = self.head
+        hx, hy = self.head_pos
+        batch = [(sprites[tiles[head][0]], (hx - PAD - cam.x, hy - PAD - cam.y))]
+        if self.tail_pos:
+            tx, ty = self.tail_pos
+            batch.insert(0, (sprites[tiles[self.tail][0]], (tx - PAD - cam.x, ty - PAD - cam.y)))
+        cols, rows = (right - left) // b + 1, (bottom - top) // b + 1
+        if len(tiles) <= cols * rows:
+            near = [c for c in tiles if left <= c[0] < right and top <= c[1] < bottom]
+        else:
+            near = [c for c in ((x, y) for y in range(top, bottom, b) for x in range(left, right, b))
+                    if c in tiles]
+        near = sorted((c for c in near if c != head), key=lambda c: -tiles[c][1])
+        batch += [(sprites[tiles[c][0]], (c[0] - PAD - cam.x, c[1] - PAD - cam.y)) for c in near]
+        surface.blits(batch, doreturn=False)
+        lap("snake")
+
+        # Items with glow effect
+        item_sprites = self.item_sprites
+        batch = []
+        for (x, y), kind in state.items.within(left, top, right, bottom):
+            sprite, offset = item_sprites[kind]
+            batch.append((sprite, (x + offset - cam.x, y + offset - cam.y)))
+        surface.blits(batch, doreturn=False)
+
+        # Magnet radius
+        if self.ring_radius and state.magnet_active:
+            half = b // 2
+            pygame.draw.circle(surface, RING_COLOR, (hx + half - cam.x, hy + half - cam.y),
+                               self.ring_radius, 2)
+        lap("items")
+
+        # HUD Panel
+        self.hud(surface, state)
+        lap("hud")